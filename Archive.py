@@ -0,0 +1,159 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+An archive holds many campaigns in one file. Each campaign is stored as its own (optionally compressed) session snapshot, and a table
+of contents at the end of the file maps campaign names to where their bytes are. Listing the campaigns only reads the table of contents,
+and loading a campaign only reads that campaign's bytes.
+
+File layout:
+- MAGIC (8 bytes), then the offset and length of the table of contents (HEADER)
+- campaign snapshots, one after the other
+- the table of contents: a pickled {name: (offset, length)} dict
+
+Saving a campaign appends its snapshot and a new table of contents, then updates the header to point at it, so a crash while saving
+leaves the archive as it was. A new archive is built in memory and written with write_atomic(). Replaced and deleted campaigns leave
+their old bytes behind, and the archive is compacted once those outweigh the campaigns still in it.
+"""
+import os
+import pickle
+import struct
+from Autosave import write_atomic
+
+MAGIC = b"DNDARCH1"
+HEADER = struct.Struct("<QQ")
+
+class CampaignArchive:
+    """
+    A file that stores several campaigns
+
+    Parameters:
+    - filename (str): The archive file. Created on the first save if it does not exist
+    """
+    def __init__(self, filename="campaigns.dat"):
+        self.filename = filename
+
+    def read_header(self, f):
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.filename} is not a campaign archive.")
+        return HEADER.unpack(f.read(HEADER.size))
+
+    def read_contents(self, f):
+        """
+        Returns:
+        - contents (dict): {name: (offset, length)} for every campaign
+        - end (int): Where the table of contents ends. New data is written after it
+        """
+        toc_offset, toc_length = self.read_header(f)
+        if toc_length == 0:
+            # A header that was never pointed at a table of contents, left by a crash while creating the archive
+            return {}, len(MAGIC) + HEADER.size
+        f.seek(toc_offset)
+        return pickle.loads(f.read(toc_length)), toc_offset + toc_length
+
+    def list_campaigns(self):
+        """
+        Returns:
+        - names (list): The campaign names, in the order they were first saved
+        """
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, 'rb') as f:
+            return list(self.read_contents(f)[0])
+
+    def read_campaign(self, name):
+        """
+        Reads the saved bytes of one campaign
+
+        Parameters:
+        - name (str): The campaign to read
+
+        Returns:
+        - data (bytes): The campaign snapshot
+        """
+        with open(self.filename, 'rb') as f:
+            contents, _ = self.read_contents(f)
+            if name not in contents:
+                raise KeyError(f"No campaign named '{name}' in {self.filename}.")
+            offset, length = contents[name]
+            f.seek(offset)
+            return f.read(length)
+
+    def write_campaign(self, name, data):
+        """
+        Adds a campaign to the archive, or replaces the one with the same name
+
+        Parameters:
+        - name (str): The campaign name
+        - data (bytes): The campaign snapshot
+        """
+        if not os.path.exists(self.filename):
+            write_atomic(self.filename, self.pack({name: data}))
+            return
+        with open(self.filename, 'rb') as f:
+            contents, end = self.read_contents(f)
+        contents[name] = (end, len(data))
+        self.write_contents(contents, end, data)
+        self.compact_if_wasteful(contents, end + len(data))
+
+    def delete_campaign(self, name):
+        """
+        Removes a campaign from the table of contents. Its bytes are reclaimed by compact()
+        """
+        with open(self.filename, 'rb') as f:
+            contents, end = self.read_contents(f)
+        del contents[name]
+        self.write_contents(contents, end, b"")
+        self.compact_if_wasteful(contents, end)
+
+    def compact_if_wasteful(self, contents, toc_offset):
+        # The bytes before the table of contents that no campaign uses any more, against the ones still used
+        live = sum(length for _, length in contents.values())
+        if toc_offset - len(MAGIC) - HEADER.size - live > live:
+            self.compact()
+
+    def write_contents(self, contents, end, data):
+        with open(self.filename, 'r+b') as f:
+            # Everything after the current table of contents is unused, so the new data goes there
+            f.seek(end)
+            f.write(data)
+            toc = pickle.dumps(contents)
+            toc_offset = f.tell()
+            f.write(toc)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(len(MAGIC))
+            f.write(HEADER.pack(toc_offset, len(toc)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self):
+        """
+        Rewrites the archive without the bytes of replaced or deleted campaigns
+        """
+        with open(self.filename, 'rb') as f:
+            contents, _ = self.read_contents(f)
+            campaigns = {}
+            for name, (offset, length) in contents.items():
+                f.seek(offset)
+                campaigns[name] = f.read(length)
+        write_atomic(self.filename, self.pack(campaigns))
+
+    @staticmethod
+    def pack(campaigns):
+        """
+        Builds a whole archive in memory
+
+        Parameters:
+        - campaigns (dict): {name: snapshot bytes}
+
+        Returns:
+        - data (bytes): The archive file
+        """
+        position = len(MAGIC) + HEADER.size
+        contents = {}
+        for name, data in campaigns.items():
+            contents[name] = (position, len(data))
+            position += len(data)
+        toc = pickle.dumps(contents)
+        return MAGIC + HEADER.pack(position, len(toc)) + b"".join(campaigns.values()) + toc
@@ -0,0 +1,196 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Crash-safe saving. Files are written to a temp file, flushed to disk, and renamed over the target, so a crash in the middle of a save
+leaves the last good save in place. The autosave worker does this in the background so the menus never wait on the disk.
+
+The worker is a separate process with its own copy of the session. The copy is made once when autosave is turned on (or another
+session is loaded), and after that the worker applies the same journal records the session writes on every change. The menus only
+send it a few small records, and pickling the session for a save happens in the worker without holding up the menus.
+"""
+import os
+import sys
+import pickle
+import multiprocessing
+from Codec import encode
+
+# Session settings that change without a journal record, sent along with every save request
+SETTINGS = ("snapshot_format", "codec", "blob_directory")
+
+def write_atomic(filename, data, backups=0):
+    """
+    Writes a file so it is either fully replaced or left untouched
+
+    Parameters:
+    - filename (str): The file to write
+    - data (bytes): The new contents
+    - backups (int): How many older versions to keep as filename.1 (newest) to filename.N (oldest)
+    """
+    temp_name = filename + ".tmp"
+    with open(temp_name, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if backups > 0 and os.path.exists(filename):
+        for idx in range(backups - 1, 0, -1):
+            if os.path.exists(f"{filename}.{idx}"):
+                os.replace(f"{filename}.{idx}", f"{filename}.{idx + 1}")
+        os.replace(filename, f"{filename}.1")
+    os.replace(temp_name, filename)
+    sync_directory(filename)
+
+def sync_directory(filename):
+    """
+    Flushes the directory entry after a rename so the new name survives a power loss. Not possible on Windows, where it is skipped
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class AutosaveWorker:
+    """
+    Saves the session in the background after it changes
+
+    The worker process keeps a copy of the session, seeded from one pickle of it, and brings it up to date by applying the journal
+    records of every change. Applying the records, pickling, compressing, writing, syncing, and rotating the files all happen in the
+    worker. Records that arrive while a save is running are applied and written together by the next one.
+
+    Parameters:
+    - filename (str): The autosave file
+    - backups (int): How many older autosaves to keep
+    """
+    def __init__(self, filename="autosave.pkl", backups=3):
+        self.filename = filename
+        self.backups = backups
+        self.dirty = False
+        # Set when the worker's copy can't be trusted any more, the next poll() sends a new one
+        self.needs_seed = True
+        self.last_error = None
+        self.saves = 0
+        self.connection, worker_end = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_worker, args=(worker_end, filename, backups), name="autosave", daemon=True)
+        self.process.start()
+        worker_end.close()
+
+    def seed(self, driver):
+        """
+        Gives the worker a new copy of the session. Needed when autosave is turned on and whenever the session is replaced by a load
+
+        Parameters:
+        - driver (SessionDriver): The session to copy
+        """
+        self.connection.send(("seed", pickle.dumps(driver)))
+        self.needs_seed = False
+
+    def record(self, data):
+        """
+        Hands a journal record to the worker
+
+        Parameters:
+        - data (bytes): The pickled (op, args) record, as made by SessionJournal.record()
+        """
+        self.connection.send(("record", data))
+        self.dirty = True
+
+    def poll(self, driver):
+        """
+        Picks up what the worker reported and queues a save if the session changed since the last one
+
+        Parameters:
+        - driver (SessionDriver): The session to save
+        """
+        self.collect()
+        if self.needs_seed:
+            self.seed(driver)
+        if self.dirty:
+            self.request(driver)
+
+    def request(self, driver):
+        """
+        Asks the worker to write its copy of the session, with the current settings
+
+        Parameters:
+        - driver (SessionDriver): The session to save
+        """
+        self.dirty = False
+        self.connection.send(("save", {name: getattr(driver, name) for name in SETTINGS}))
+
+    def collect(self):
+        # Reads the worker's reports without waiting for any
+        while self.connection.poll():
+            kind, error = self.connection.recv()
+            if kind == "saved":
+                self.saves += 1
+            else:
+                self.last_error = error
+                if kind == "reseed":
+                    self.needs_seed = True
+                    self.dirty = True
+
+    def stop(self):
+        """
+        Writes any queued save and stops the worker process
+        """
+        self.connection.send(("stop", None))
+        self.process.join()
+        try:
+            self.collect()
+        except EOFError:
+            pass
+        self.connection.close()
+
+def run_worker(connection, filename, backups):
+    """
+    The autosave process. Applies records to its copy of the session and writes it when asked, reporting ("saved", None),
+    ("failed", error) when the file could not be written, or ("reseed", error) when its copy no longer matches the session
+    """
+    # Applying records runs the same code as the menus, which prints
+    sys.stdout = open(os.devnull, 'w')
+    replica = None
+    records = []
+    running = True
+    while running:
+        try:
+            kind, value = connection.recv()
+        except EOFError:
+            # The session closed without stopping autosave
+            return
+        settings = None
+        while True:
+            if kind == "seed":
+                replica = pickle.loads(value)
+                records = []
+            elif kind == "record":
+                records.append(value)
+            elif kind == "save":
+                settings = value
+            else:
+                running = False
+            # Everything already sent is taken in before saving, so a burst of changes is written once
+            if not running or not connection.poll():
+                break
+            kind, value = connection.recv()
+        if settings is None:
+            continue
+        try:
+            for data in records:
+                op, args = pickle.loads(data)
+                getattr(replica, "apply_" + op)(*args)
+            records = []
+            replica.__dict__.update(settings)
+            data = pickle.dumps(replica)
+        except Exception as e:
+            # Wait for a new copy, the records meant for this one are of no use
+            replica = None
+            records = []
+            connection.send(("reseed", str(e)))
+            continue
+        try:
+            write_atomic(filename, encode(data, settings["codec"]), backups)
+            connection.send(("saved", None))
+        except OSError as e:
+            connection.send(("failed", str(e)))
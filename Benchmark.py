@@ -0,0 +1,160 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Benchmarks for saving and loading sessions. Run "python Benchmark.py" from the folder with the other .py files. The sessions are
+synthetic: every player, mob, and world item is generated with the same few descriptions, which is close to how a real campaign
+repeats item text.
+
+Optional arguments are the session sizes to test, for example "python Benchmark.py 100 1000 10000".
+"python Benchmark.py memory" instead reports how many bytes each item, player, and mob takes with __slots__ and without.
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from Driver import SessionDriver
+from Player import player
+from Mob import mob
+from Item import item, ring, armor, weapon, estus, souls, spell, consumable
+from Codec import CODECS
+
+DESCRIPTIONS = [
+    "A straight sword with a plain hilt. Favoured by knights who value a balanced blade over a showy one. " * 2,
+    "Armor of the Undead Legion. Scarred by the fires of countless battles, it still turns aside most blows. " * 2,
+    "A ring engraved with the sigil of a forgotten goddess. It warms the wearer and steadies their resolve. " * 2,
+]
+
+def build_session(size):
+    """
+    Creates a session with size players, size mobs, and size world items. Every player carries a handful of items
+
+    Parameters:
+    - size (int): How many players, mobs, and world items to create
+
+    Returns:
+    - driver (SessionDriver): The generated session
+    """
+    driver = SessionDriver()
+    for idx in range(size):
+        description = DESCRIPTIONS[idx % len(DESCRIPTIONS)]
+        new_player = player(10 + idx % 10, 10, 12, 12, 8, 8, f"Player {idx}", 1)
+        new_player.set_hp()
+        new_player.set_mana()
+        new_player.set_spell_slots()
+        new_player.obtain_item(weapon(description, "Longsword", 1, 8, 10, 10, 0, 0))
+        new_player.obtain_item(armor(description, "Knight Helm", 10, 0, 0, 0, 3, 0))
+        new_player.obtain_item(estus("Estus Flask", description, 50, 0, 3, 3, 0, 0))
+        new_player.obtain_item(consumable(description, 5, "Firebomb"))
+        new_player.obtain_item(spell(description, "Soul Arrow", 1, 6, 0, 0, 10, 0, 10, 1))
+        driver.players.append(new_player)
+
+        new_mob = mob(100 + idx % 50, 12, f"Hollow {idx}")
+        new_mob.add_ability(weapon(description, "Broken Sword", 1, 4, 0, 0, 0, 0))
+        driver.mobs.append(new_mob)
+
+        if idx % 3 == 0:
+            driver.items.add(ring(description, f"Ring {idx}", 1, 0, 1, 0, 0, 0))
+        elif idx % 3 == 1:
+            driver.items.add(souls(description, 500, f"Soul of a Hollow {idx}"))
+        else:
+            driver.items.add(armor(description, f"Chain Leggings {idx}", 8, 0, 0, 0, 2, 3))
+    return driver
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def benchmark_codecs(sizes=(100, 1000, 10000)):
+    """
+    Reports file size, save latency, and load latency for every codec in Codec.CODECS
+
+    Parameters:
+    - sizes (tuple): Session sizes to test
+
+    Returns:
+    - results (list): One (size, codec, bytes, save seconds, load seconds) tuple per run
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            driver = build_session(size)
+            for codec in CODECS:
+                filename = os.path.join(folder, f"session_{size}_{codec}.pkl")
+                driver.codec = codec
+                _, save_time = timed(driver.write_snapshot, filename)
+                _, load_time = timed(SessionDriver.load_session, filename)
+                results.append((size, codec, os.path.getsize(filename), save_time, load_time))
+    return results
+
+def print_codec_results(results):
+    print(f"{'Size':>8} {'Codec':>6} {'File size':>12} {'Save (ms)':>10} {'Load (ms)':>10}")
+    for size, codec, file_size, save_time, load_time in results:
+        print(f"{size:>8} {codec:>6} {file_size:>12,} {save_time * 1000:>10.1f} {load_time * 1000:>10.1f}")
+
+def sample_objects():
+    """
+    One object of every slotted class, taken from a generated session
+    """
+    driver = build_session(3)
+    samples = {}
+    for obj in driver.players + driver.mobs + list(driver.items):
+        samples.setdefault(type(obj), obj)
+        for item_obj in getattr(obj, "inventory", {}).values():
+            samples.setdefault(type(item_obj), item_obj)
+    return list(samples.values())
+
+def unslotted_class(cls):
+    """
+    A plain class with a per-object __dict__ and the same fields, which is how the classes were stored before they used __slots__
+    """
+    return type(cls.__name__ + "_dict", (), {})
+
+def bytes_per_object(cls, fields, count):
+    """
+    Measures with tracemalloc how much memory count objects of cls take. Every copy shares the field values, so only the objects
+    themselves are counted
+    """
+    objects = []
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(count):
+        obj = cls.__new__(cls)
+        for name, value in fields.items():
+            setattr(obj, name, value)
+        objects.append(obj)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The list holding the objects is not part of the object size
+    return (after - before - sys.getsizeof(objects)) / count
+
+def benchmark_memory(count=10000):
+    """
+    Reports the bytes per object of every item, player, and mob class, with __slots__ and with a per-object __dict__. The __dict__
+    version of an item holds a copy of every field, the slotted one only its state and a reference to the shared template
+
+    Parameters:
+    - count (int): How many objects to create for each measurement
+
+    Returns:
+    - results (list): One (class name, bytes with __dict__, bytes with __slots__) tuple per class
+    """
+    results = []
+    for obj in sample_objects():
+        fields = obj.get_details() if isinstance(obj, item) else obj.__getstate__()
+        results.append((type(obj).__name__, bytes_per_object(unslotted_class(type(obj)), fields, count),
+                        bytes_per_object(type(obj), obj.__getstate__(), count)))
+    return results
+
+def print_memory_results(results):
+    print(f"{'Class':>12} {'__dict__ (B)':>13} {'__slots__ (B)':>14} {'Saved':>7}")
+    for name, dict_bytes, slot_bytes in results:
+        print(f"{name:>12} {dict_bytes:>13.0f} {slot_bytes:>14.0f} {1 - slot_bytes / dict_bytes:>7.0%}")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["memory"]:
+        print_memory_results(benchmark_memory())
+    else:
+        sizes = tuple(int(arg) for arg in sys.argv[1:]) or (100, 1000, 10000)
+        print_codec_results(benchmark_codecs(sizes))
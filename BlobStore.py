@@ -0,0 +1,169 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Content-addressed storage for item data. Every item is pickled on its own and stored in a blob directory under the SHA-256 hash of its
+bytes, and long descriptions get a blob of their own. A save in this format only holds the hashes, so an item that did not change since
+the last save, or that another campaign already stored, is never written again. Several campaigns can share one blob directory.
+
+File layout: MAGIC, a pickled header with the blob directory (relative to the save file), then the session pickle, compressed with the
+session codec.
+"""
+import io
+import os
+import pickle
+import hashlib
+from Item import item
+from Codec import encode, decode
+from Autosave import write_atomic
+
+MAGIC = b"DNDBLOB1"
+
+# Descriptions at least this long are stored as their own blob so items that share them only store the text once
+TEXT_BLOB_LENGTH = 64
+
+_stores = {}
+
+def open_blob_store(directory):
+    """
+    Returns the BlobStore for a directory, reusing the one already opened so known hashes are not checked on disk again
+    """
+    directory = os.path.abspath(directory)
+    if directory not in _stores:
+        _stores[directory] = BlobStore(directory)
+    return _stores[directory]
+
+class BlobStore:
+    """
+    A directory of blobs named by the SHA-256 hash of their contents
+
+    Parameters:
+    - directory (str): Where the blobs are stored. Created if it does not exist
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        # digest -> the same digest string, so every reference to a blob reuses one string and pickle stores it only once
+        self.known = {}
+        self.written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data):
+        """
+        Stores a blob unless it is already there
+
+        Parameters:
+        - data (bytes): The blob contents
+
+        Returns:
+        - digest (str): The hash the blob is stored under
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self.known:
+            return self.known[digest]
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, data)
+            self.written += 1
+        self.known[digest] = digest
+        return digest
+
+    def get(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+class _ItemPickler(pickle.Pickler):
+    """
+    Pickles one item, with a long description stored as a text blob
+    """
+    def __init__(self, buffer, store, description):
+        super().__init__(buffer)
+        self.store = store
+        self.description = description if isinstance(description, str) and len(description) >= TEXT_BLOB_LENGTH else None
+
+    def persistent_id(self, value):
+        if self.description is not None and value is self.description:
+            return ("text", self.store.put(value.encode("utf-8")))
+        return None
+
+class _SessionPickler(pickle.Pickler):
+    """
+    Pickles a session with every item replaced by (hash, number). The number keeps two identical items apart, while an item that is in
+    an inventory and an equipment slot gets the same number both times and loads as one object
+    """
+    def __init__(self, buffer, store):
+        super().__init__(buffer)
+        self.store = store
+        self.numbers = {}
+
+    def persistent_id(self, value):
+        if not isinstance(value, item):
+            return None
+        if id(value) not in self.numbers:
+            buffer = io.BytesIO()
+            _ItemPickler(buffer, self.store, getattr(value, "description", None)).dump(value)
+            self.numbers[id(value)] = ("item", self.store.put(buffer.getvalue()), len(self.numbers))
+        return self.numbers[id(value)]
+
+class _SessionUnpickler(pickle.Unpickler):
+    def __init__(self, data, store):
+        super().__init__(io.BytesIO(data))
+        self.store = store
+        self.loaded = {}
+
+    def persistent_load(self, pid):
+        if pid not in self.loaded:
+            if pid[0] == "text":
+                self.loaded[pid] = self.store.get(pid[1]).decode("utf-8")
+            else:
+                unpickler = pickle.Unpickler(io.BytesIO(self.store.get(pid[1])))
+                unpickler.persistent_load = self.persistent_load
+                self.loaded[pid] = unpickler.load()
+        return self.loaded[pid]
+
+def is_dedup_snapshot(data):
+    return data.startswith(MAGIC)
+
+def write_dedup_snapshot(driver, filename, directory):
+    """
+    Saves the session with its item data in a shared blob directory
+
+    Parameters:
+    - driver (SessionDriver): The session to save
+    - filename (str): Filename to store the snapshot as
+    - directory (str): The blob directory. Campaigns saved with the same directory share their item data
+
+    Returns:
+    - written (int): How many new blobs had to be written
+    """
+    store = open_blob_store(directory)
+    written = store.written
+    buffer = io.BytesIO()
+    _SessionPickler(buffer, store).dump(driver)
+    relative = os.path.relpath(store.directory, os.path.dirname(os.path.abspath(filename)))
+    header = pickle.dumps({"blobs": relative})
+    write_atomic(filename, MAGIC + header + encode(buffer.getvalue(), driver.codec))
+    return store.written - written
+
+def read_dedup_snapshot(filename, data):
+    """
+    Loads a session saved by write_dedup_snapshot()
+
+    Parameters:
+    - filename (str): The save file, used to find the blob directory
+    - data (bytes): The file contents
+
+    Returns:
+    - driver (SessionDriver): The loaded session
+    - directory (str): The blob directory it uses
+    """
+    stream = io.BytesIO(data)
+    stream.seek(len(MAGIC))
+    header = pickle.load(stream)
+    directory = os.path.join(os.path.dirname(os.path.abspath(filename)), header["blobs"])
+    session, codec = decode(stream.read())
+    driver = _SessionUnpickler(session, open_blob_store(directory)).load()
+    driver.codec = codec
+    return driver, os.path.normpath(directory)
@@ -0,0 +1,63 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Compression for saved sessions. A compressed save starts with MAGIC and one byte naming the codec, followed by the compressed pickle.
+Uncompressed saves are plain pickles with no header, so files saved before compression existed still load, and loading picks the
+codec from the header on its own.
+"""
+import bz2
+import lzma
+import zlib
+
+MAGIC = b"DNDCODEC"
+
+# name: (header byte, compress, decompress)
+CODECS = {
+    "none": (0, None, None),
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "bz2": (2, bz2.compress, bz2.decompress),
+    "lzma": (3, lzma.compress, lzma.decompress),
+}
+
+def check_codec(codec):
+    """
+    Raises a ValueError if the codec is not one of CODECS
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}'. Choose one of: {', '.join(CODECS)}.")
+
+def encode(data, codec="none"):
+    """
+    Compresses a pickled session and adds the codec header
+
+    Parameters:
+    - data (bytes): The pickled session
+    - codec (str): "none", "zlib", "bz2", or "lzma"
+
+    Returns:
+    - data (bytes): The file contents
+    """
+    check_codec(codec)
+    code, compress, _ = CODECS[codec]
+    if compress is None:
+        return data
+    return MAGIC + bytes([code]) + compress(data)
+
+def decode(data):
+    """
+    Undoes encode(), using the codec named in the header
+
+    Parameters:
+    - data (bytes): The file contents
+
+    Returns:
+    - data (bytes): The pickled session
+    - codec (str): The codec the file was saved with
+    """
+    if not data.startswith(MAGIC):
+        return data, "none"
+    code = data[len(MAGIC)]
+    for codec, (codec_code, _, decompress) in CODECS.items():
+        if codec_code == code:
+            return decompress(data[len(MAGIC) + 1:]), codec
+    raise ValueError(f"Save file uses an unknown codec ({code}).")
@@ -8,18 +8,120 @@ NOTE: This is desgined for a homebrew DARK SOULS III campaign, not for a traditi
 version
 """
 import pickle
+import random
 from Mob import mob
 from Player import player
 from Item import ring, armor, weapon, estus, souls, spell, consumable
+from Journal import SessionJournal
+from Codec import encode, decode, check_codec
+from Autosave import AutosaveWorker, write_atomic
+from SQLStore import SQLiteStore
+from BlobStore import is_dedup_snapshot, write_dedup_snapshot, read_dedup_snapshot
+from Archive import CampaignArchive
+from Registry import ItemRegistry
+from MobPool import MobPool
+from Dice import DiceEngine, damage_distribution
+import Simulator
+from Initiative import InitiativeTracker
+from StatusEffects import StatusEffect, TimingWheel, effects_of
+from Modifiers import STATS
+from Leveling import LEVEL_STATS, REQUIREMENT_STATS, affordable_levels, plan_stats
+from Loadout import ARMOR_SLOTS, MAX_RINGS, optimize_loadout, loadout_names, loadout_stats
+from SpellPlanner import plan_spells, spell_capacity, castable_spells
+from RequirementIndex import RequirementIndex
+from SearchIndex import SearchIndex
+from StatCurves import DEFAULT_CURVES, stat_curves
+from Snapshot import is_indexed_snapshot, open_indexed_snapshot, write_indexed_snapshot, detach_snapshot
+
+# Worlds with more items than this ask for an item name instead of listing every item
+ITEM_LIST_LIMIT = 50
+
+# What a party action can do to a group of players or mobs, see SessionDriver.party_action()
+PARTY_ACTIONS = {
+    "player": ("damage", "heal", "grant_souls", "consume_mana", "restore_flasks"),
+    "mob": ("damage", "heal"),
+}
 
 class SessionDriver:
     """
-    Instantiates an empty list of all players (player objects), mobs (mob objects), and items (item objects)
+    Instantiates an empty list of all players (player objects), mobs (mob objects), and a registry of world items (item objects)
+
+    Every change to the session goes through apply(), which runs the matching apply_<op> method and records it in the journal so
+    saving only has to write what changed since the last save.
     """
     def __init__(self):
         self.players = []
         self.mobs = []
-        self.items = []
+        self.items = ItemRegistry()
+        self.journal = SessionJournal()
+        self.snapshot_format = "pickle"
+        self.codec = "none"
+        self.blob_directory = "blobs"
+        self.stat_curves = DEFAULT_CURVES
+        self.dice = DiceEngine()
+        self.status_round = 0
+        self.mob_pool = None
+        self.effect_wheel = None
+        self.requirement_index = None
+        self.search_index = None
+        self.initiative = InitiativeTracker()
+        self.autosave = None
+        self.store = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["journal"] = self.journal.__getstate__()
+        state.pop("autosave", None)
+        state.pop("store", None)
+        state.pop("mob_pool", None)
+        state.pop("initiative", None)
+        state.pop("effect_wheel", None)
+        state.pop("requirement_index", None)
+        state.pop("search_index", None)
+        return state
+
+    def __setstate__(self, state):
+        # Sessions saved before the journal existed have no "journal" entry
+        journal_state = state.pop("journal", {})
+        self.__dict__.update(state)
+        self.__dict__.setdefault("snapshot_format", "pickle")
+        self.__dict__.setdefault("codec", "none")
+        self.__dict__.setdefault("blob_directory", "blobs")
+        self.__dict__.setdefault("stat_curves", DEFAULT_CURVES)
+        self.__dict__.setdefault("dice", DiceEngine())
+        self.__dict__.setdefault("status_round", 0)
+        # Sessions saved before the item registry kept world items in a list
+        if isinstance(self.items, list):
+            self.items = ItemRegistry(self.items)
+        self.mob_pool = None
+        self.effect_wheel = None
+        self.requirement_index = None
+        self.search_index = None
+        self.initiative = InitiativeTracker()
+        self.autosave = None
+        self.store = None
+        self.journal = SessionJournal()
+        self.journal.__setstate__(journal_state)
+
+    def apply(self, op, *args):
+        """
+        Applies a mutation to the session and records it in the journal
+
+        Parameters:
+        - op (str): Name of the operation. Runs the apply_<op> method
+        - args: Arguments for the operation. Players and mobs are referenced by index, items by inventory name or world item ID
+
+        Returns:
+        - result: Whatever the apply_<op> method returns
+        """
+        touched = self.store.before_apply(self, op, args) if self.store is not None else None
+        result = getattr(self, "apply_" + op)(*args)
+        record = self.journal.record(op, args)
+        if self.store is not None:
+            self.store.after_apply(self, op, args, result, touched)
+        if self.autosave is not None:
+            self.autosave.record(record)
+        return result
 
     def interact(self):
         """
@@ -52,9 +154,16 @@ class SessionDriver:
                     self.save_load_menu()
                 elif choice == "7":
                     print("Exiting session.")
+                    self.disable_autosave()
                     break
                 else:
                     print("Invalid choice. Please try again.")
+
+                if self.autosave is not None:
+                    if self.autosave.last_error is not None:
+                        print(f"Autosave failed: {self.autosave.last_error}")
+                        self.autosave.last_error = None
+                    self.autosave.poll(self)
             except Exception as e:
                 print(f"An unexpected error occurred: {e}. Operation canceled. You can continue your session.")
                 
@@ -95,6 +204,12 @@ class SessionDriver:
         print("8. Use item")
         print("9. Increment Item Amount")
         print("10. Level up")
+        print("11. Configure Stat Curves")
+        print("12. Party Actions")
+        print("13. Plan Level Ups")
+        print("14. Optimize Loadout")
+        print("15. Plan Spells")
+        print("16. Equippable Items")
 
         choice = input("Enter your choice: ").strip()
         if choice == "1":
@@ -117,9 +232,129 @@ class SessionDriver:
             self.increment()
         elif choice == "10":
             self.increase_player_stats()
+        elif choice == "11":
+            self.configure_stat_curves()
+        elif choice == "12":
+            self.party_menu()
+        elif choice == "13":
+            self.plan_level_ups()
+        elif choice == "14":
+            self.optimize_loadout()
+        elif choice == "15":
+            self.plan_spell_slots()
+        elif choice == "16":
+            self.equippable_items()
         else:
             print("Invalid choice.")
 
+    def party_menu(self):
+        """
+        Applies one action to several players at once, for example souls for the whole party after a boss or trap damage to everyone.
+        Either every chosen player is changed or, if one of them can't be, none are
+        """
+        if not self.players:
+            print("No players available.")
+            return
+        actions = PARTY_ACTIONS["player"]
+        print("\nParty Actions:")
+        for idx, action in enumerate(actions):
+            print(f"{idx + 1}. {action.replace('_', ' ').title()}")
+
+        try:
+            choice = int(input("Enter your choice: ")) - 1
+            if choice < 0 or choice >= len(actions):
+                print("Invalid choice.")
+                return
+            action = actions[choice]
+            player_indexes = self.select_several([f"{player_obj.get_name()} - HP: {player_obj.get_hp()}, Mana: {player_obj.get_mana()}, "
+                                                  f"Souls: {player_obj.get_souls()}" for player_obj in self.players],
+                                                 "player", action.replace("_", " "))
+            if player_indexes is None:
+                return
+            amount = 0 if action == "restore_flasks" else int(input("Enter the amount for each player: "))
+        except ValueError:
+            print("Invalid input. Choices, player numbers, and amounts must be numbers.")
+            return
+
+        try:
+            self.party_action(action, player_indexes, amount)
+            print(f"{action.replace('_', ' ').capitalize()} applied to {len(player_indexes)} players.")
+        except ValueError as e:
+            print(f"Nothing was changed. {e}")
+
+    def party_action(self, action, indexes, amount=0, kind="player"):
+        """
+        Applies one action to a group of players or mobs in a single journaled change. Everything is checked before anything is
+        changed, so if one target fails the check nothing happens to any of them
+
+        Parameters:
+        - action (str): One of PARTY_ACTIONS[kind]: "damage", "heal", "grant_souls", "consume_mana", or "restore_flasks"
+        - indexes (list): Indexes into self.players or self.mobs
+        - amount (int): The damage, healing, souls, or mana for each target. Not used by "restore_flasks"
+        - kind (str): "player" or "mob"
+
+        Returns:
+        - died (list): The mobs that died, for mob damage. None otherwise
+
+        Raises:
+        - ValueError: If the action, a target, or the amount is not valid. The session is not changed
+        """
+        indexes = list(indexes)
+        # Checked here as well as in apply_party, so a bad index is reported before the database looks the targets up
+        self.check_party(kind, action, indexes, amount)
+        return self.apply("party", kind, action, indexes, amount)
+
+    def check_party(self, kind, action, indexes, amount):
+        """
+        Checks a party action before anything is changed
+
+        Returns:
+        - targets (list): The players or mobs the action applies to
+
+        Raises:
+        - ValueError: With a message saying what is wrong
+        """
+        if action not in PARTY_ACTIONS.get(kind, ()):
+            raise ValueError(f"{kind.capitalize()}s can't {action.replace('_', ' ')}.")
+        group = self.players if kind == "player" else self.mobs
+        if not indexes:
+            raise ValueError(f"No {kind}s were chosen.")
+        if len(set(indexes)) != len(indexes):
+            raise ValueError(f"A {kind} was chosen more than once.")
+        if any(idx < 0 or idx >= len(group) for idx in indexes):
+            raise ValueError(f"Invalid {kind} number.")
+        if not isinstance(amount, int) or amount < 0:
+            raise ValueError("The amount must be a whole number that is not negative.")
+        targets = [group[idx] for idx in indexes]
+        if action == "consume_mana":
+            short = [f"{player_obj.get_name()} ({player_obj.get_mana()})" for player_obj in targets if player_obj.get_mana() < amount]
+            if short:
+                raise ValueError(f"Not enough mana: {', '.join(short)}.")
+        return targets
+
+    def apply_party(self, kind, action, indexes, amount):
+        targets = self.check_party(kind, action, indexes, amount)
+        if kind == "mob":
+            if action == "damage":
+                return self.apply_damage_mobs(indexes, amount)
+            return self.apply_heal_mobs(indexes, amount)
+
+        for player_obj in targets:
+            if action == "damage":
+                player_obj.take_damage(amount)
+                if player_obj.get_hp() <= 0:
+                    self.initiative.remove(player_obj)
+            elif action == "heal":
+                player_obj.hp = min(player_obj.get_HP(), player_obj.get_hp() + amount)
+            elif action == "grant_souls":
+                player_obj.add_souls(amount)
+            elif action == "consume_mana":
+                player_obj.use_mana(amount)
+            elif action == "restore_flasks":
+                for flask in player_obj.items_of_class(estus):
+                    flask.flask_bonfire()
+        return None
+
     def mob_menu(self):
         """
         This handles the mob menu UI, allowing the user to view and add "Weapons" to mobs. Giving a weapon to a mob is a way to give a mob
@@ -146,6 +381,13 @@ class SessionDriver:
         print("1. Damage Player")
         print("2. Damage Mob")
         print("3. Rest at Bonfire")
+        print("4. Damage Several Mobs")
+        print("5. Heal Several Mobs")
+        print("6. Roll Damage")
+        print("7. Set Dice Seed")
+        print("8. Simulate Encounter")
+        print("9. Initiative")
+        print("10. Status Effects")
 
         choice = input("Enter your choice: ").strip()
         if choice == "1":
@@ -154,6 +396,20 @@ class SessionDriver:
             self.damage_mob()
         elif choice == "3":
             self.rest_at_bonfire()
+        elif choice == "4":
+            self.damage_mobs()
+        elif choice == "5":
+            self.heal_mobs()
+        elif choice == "6":
+            self.roll_damage()
+        elif choice == "7":
+            self.set_dice_seed()
+        elif choice == "8":
+            self.simulate_encounter_menu()
+        elif choice == "9":
+            self.initiative_menu()
+        elif choice == "10":
+            self.status_effect_menu()
         else:
             print("Invalid choice.")
             
@@ -167,6 +423,7 @@ class SessionDriver:
         print("1. View Items")
         print("2. Pick Up Item")
         print("3. Drink from Flask")
+        print("4. Search Items")
 
         choice = input("Enter your choice: ").strip()
         if choice == "1":
@@ -175,6 +432,8 @@ class SessionDriver:
             self.pick_up_item()
         elif choice == "3":
             self.drink_from_flask()
+        elif choice == "4":
+            self.search_items()
         else:
             print("Invalid choice.")
 
@@ -186,6 +445,14 @@ class SessionDriver:
         print("\nSave/Load Session:")
         print("1. Save Session")
         print("2. Load Session")
+        print("3. Compact Session Journal")
+        print("4. Save Session (random-access format)")
+        print("5. Toggle Autosave")
+        print("6. Save Session (compressed)")
+        print("7. Use SQLite Database")
+        print("8. Save Session (shared item storage)")
+        print("9. Save Campaign to Archive")
+        print("10. Load Campaign from Archive")
 
         choice = input("Enter your choice: ").strip()
         if choice == "1":
@@ -194,37 +461,257 @@ class SessionDriver:
         elif choice == "2":
             filename = input("Enter filename to load session (default: session.pkl): ") or "session.pkl"
             try:
-                loaded_session = self.load_session(filename)
-                self.players = loaded_session.players
-                self.mobs = loaded_session.mobs
-                self.items = loaded_session.items
+                self.replace_session(self.load_session(filename))
                 print("Session loaded successfully.")
             except FileNotFoundError:
                 print(f"File {filename} not found. Please check the filename and try again.")
+        elif choice == "3":
+            filename = input("Enter filename to compact (default: session.pkl): ") or "session.pkl"
+            self.save_session(filename, compact=True)
+        elif choice == "4":
+            filename = input("Enter filename to save session (default: session.pkl): ") or "session.pkl"
+            self.save_session(filename, snapshot_format="indexed")
+        elif choice == "5":
+            if self.autosave is not None:
+                self.disable_autosave()
+                print("Autosave disabled.")
+                return
+            filename = input("Enter filename for autosaves (default: autosave.pkl): ") or "autosave.pkl"
+            backups = int(input("Number of older autosaves to keep (default: 3): ") or 3)
+            self.enable_autosave(filename, backups)
+            print(f"Autosave enabled. The session is saved to {filename} after every change.")
+        elif choice == "6":
+            filename = input("Enter filename to save session (default: session.pkl): ") or "session.pkl"
+            codec = input(f"Compression (none, zlib, bz2, lzma) (default: {self.codec}): ").strip().lower() or self.codec
+            try:
+                self.save_session(filename, snapshot_format="pickle", codec=codec)
+            except ValueError as e:
+                print(e)
+        elif choice == "7":
+            filename = input("Enter database filename (default: session.db): ") or "session.db"
+            if self.use_database(filename):
+                print(f"Session loaded from {filename}. Changes are saved to the database as they happen.")
+            else:
+                print(f"Session copied into {filename}. Changes are saved to the database as they happen.")
+        elif choice == "8":
+            filename = input("Enter filename to save session (default: session.pkl): ") or "session.pkl"
+            directory = input(f"Enter folder for shared item data (default: {self.blob_directory}): ") or self.blob_directory
+            self.save_session(filename, snapshot_format="dedup", blob_directory=directory)
+        elif choice == "9":
+            filename = input("Enter archive filename (default: campaigns.dat): ") or "campaigns.dat"
+            name = input("Enter campaign name: ").strip()
+            if not name:
+                print("Campaign name cannot be empty.")
+                return
+            self.save_campaign(filename, name)
+        elif choice == "10":
+            filename = input("Enter archive filename (default: campaigns.dat): ") or "campaigns.dat"
+            names = CampaignArchive(filename).list_campaigns()
+            if not names:
+                print(f"No campaigns found in {filename}.")
+                return
+            for idx, name in enumerate(names):
+                print(f"{idx + 1}: {name}")
+            campaign_index = int(input("Select campaign to load: ")) - 1
+            if campaign_index < 0 or campaign_index >= len(names):
+                print("Invalid campaign number.")
+                return
+            self.replace_session(self.load_campaign(filename, names[campaign_index]))
+            print(f"Campaign '{names[campaign_index]}' loaded successfully.")
         else:
             print("Invalid choice.")
 
-    def save_session(self, filename="session.pkl"):
+    def replace_session(self, loaded_session):
         """
-        This code will save the session as a .pkl file inside the directory where the .py files are held.
+        Switches this session over to a loaded one. Autosave stays as it is, and a database the session is kept in is rewritten with
+        the loaded session, so the rows never refer to the objects that were replaced
 
         Parameters: 
-        - filename (str): Filename to store the file as
+        - loaded_session (SessionDriver): The session that was loaded
+        """
+        self.players = loaded_session.players
+        self.mobs = loaded_session.mobs
+        self.mob_pool = None
+        self.effect_wheel = None
+        self.requirement_index = None
+        self.search_index = None
+        self.initiative = InitiativeTracker()
+        self.items = loaded_session.items
+        self.journal = loaded_session.journal
+        self.snapshot_format = loaded_session.snapshot_format
+        self.codec = loaded_session.codec
+        self.blob_directory = loaded_session.blob_directory
+        self.stat_curves = loaded_session.stat_curves
+        self.dice = loaded_session.dice
+        self.status_round = loaded_session.status_round
+        if self.autosave is not None:
+            self.autosave.needs_seed = True
+        if self.store is not None:
+            # write_session() commits the deletes together with the new rows
+            self.store.clear()
+            self.store.write_session(self)
+
+    def save_campaign(self, filename, name):
+        """
+        Saves the session into a campaign archive, replacing the campaign with the same name
+
+        Parameters: 
+        - filename (str): The archive file
+        - name (str): The campaign name
+        """
+        CampaignArchive(filename).write_campaign(name, self.snapshot_bytes())
+        print(f"Campaign '{name}' saved to {filename}!")
+
+    @staticmethod
+    def load_campaign(filename, name):
         """
-        with open(filename, 'wb') as f:
-            pickle.dump(self, f)
+        Loads one campaign from an archive. Only that campaign's bytes are read
+
+        Parameters: 
+        - filename (str): The archive file
+        - name (str): The campaign name
+        """
+        data, codec = decode(CampaignArchive(filename).read_campaign(name))
+        driver = pickle.loads(data)
+        driver.codec = codec
+        return driver
+
+    def use_database(self, filename="session.db"):
+        """
+        Keeps the session in an SQLite database. From then on every change only writes the rows it touched. If the database already
+        holds a session it replaces the current one, otherwise the current session is copied into it
+
+        Parameters: 
+        - filename (str): The database file
+
+        Returns:
+        - loaded (bool): True if the session was loaded from the database
+        """
+        if self.store is not None:
+            self.store.close()
+        self.store = SQLiteStore(filename)
+        if self.store.is_empty():
+            self.store.write_session(self)
+            return False
+        self.players, self.mobs, world_items = self.store.read_session()
+        self.status_round = self.store.read_setting("status_round", 0)
+        # Databases written before the dice and curves were stored keep the current ones
+        self.dice = self.store.read_setting("dice", self.dice)
+        self.stat_curves = self.store.read_setting("stat_curves", self.stat_curves)
+        self.mob_pool = None
+        self.effect_wheel = None
+        self.requirement_index = None
+        self.search_index = None
+        self.initiative = InitiativeTracker()
+        self.items = ItemRegistry(world_items)
+        if self.autosave is not None:
+            self.autosave.needs_seed = True
+        return True
+
+    def enable_autosave(self, filename="autosave.pkl", backups=3):
+        """
+        Starts saving the session in the background after every change. Saves are written to a temp file and renamed over the
+        autosave file, and the last few autosaves are kept as filename.1, filename.2, ...
+
+        Parameters: 
+        - filename (str): Filename to autosave to
+        - backups (int): How many older autosaves to keep
+        """
+        self.disable_autosave()
+        self.autosave = AutosaveWorker(filename, backups)
+        self.autosave.seed(self)
+
+    def disable_autosave(self):
+        """
+        Stops autosaving. A save that is still queued is written first
+        """
+        if self.autosave is not None:
+            self.autosave.stop()
+            self.autosave = None
+
+    def save_session(self, filename="session.pkl", compact=False, snapshot_format=None, codec=None, blob_directory=None):
+        """
+        This code will save the session as a .pkl file inside the directory where the .py files are held. If the file was already
+        saved or loaded this session, only the changes since then are appended to "<filename>.journal". The journal is folded back
+        into a full snapshot once it grows past journal.compact_every records.
+
+        Parameters: 
+        - filename (str): Filename to store the file as
+        - compact (bool): Always write a full snapshot and start a new journal
+        - snapshot_format (str): "pickle" for a single pickle, "indexed" for the random-access format that loads players, mobs,
+          and items only when they are used, or "dedup" to keep item data in a blob folder that several campaigns can share. Defaults
+          to the format the session was loaded or last saved in
+        - codec (str): Compression for "pickle" and "dedup" snapshots: "none", "zlib", "bz2", or "lzma". Stored in the file header so
+          loading detects it. Defaults to the codec the session was loaded or last saved with
+        - blob_directory (str): Folder for the item data of "dedup" snapshots
+        """
+        if codec is not None:
+            check_codec(codec)
+        if snapshot_format is not None and snapshot_format != self.snapshot_format:
+            self.snapshot_format = snapshot_format
+            compact = True
+        if codec is not None and codec != self.codec:
+            self.codec = codec
+            compact = True
+        if blob_directory is not None and blob_directory != self.blob_directory:
+            self.blob_directory = blob_directory
+            compact = True
+        if compact:
+            self.journal.compact(self, filename)
+        else:
+            self.journal.save(self, filename)
         print(f"Session saved to {filename}!")
 
+    def write_snapshot(self, filename):
+        """
+        Writes the whole session in the current snapshot format. Used by the journal when compacting
+
+        Parameters: 
+        - filename (str): Filename to store the snapshot as
+        """
+        if self.snapshot_format == "indexed":
+            write_indexed_snapshot(self, filename)
+            return
+        # A session opened from a random-access file still reads from it, so load the rest before the file can be overwritten
+        detach_snapshot(self)
+        if self.snapshot_format == "dedup":
+            write_dedup_snapshot(self, filename, self.blob_directory)
+        else:
+            write_atomic(filename, self.snapshot_bytes())
+
+    def snapshot_bytes(self):
+        """
+        Returns:
+        - data (bytes): The whole session pickled and compressed with the session codec
+        """
+        detach_snapshot(self)
+        return encode(pickle.dumps(self), self.codec)
+
     @staticmethod
     def load_session(filename="session.pkl"):
         """
         This code will load a session from a .pkl file. Ensure the .pkl file is found in the same location as the Driver.py
+        Any changes recorded in "<filename>.journal" after the snapshot was written are replayed on top of it. Random-access files
+        are opened without loading anything; players, mobs, and items are read from the file as they are used. Compressed files are
+        detected from their header.
 
         Parameters: 
         - filename (str): name of the file to load the session
         """
-        with open(filename, 'rb') as f:
-            return pickle.load(f)
+        if is_indexed_snapshot(filename):
+            driver = SessionDriver.__new__(SessionDriver)
+            driver.__setstate__(open_indexed_snapshot(filename))
+        else:
+            with open(filename, 'rb') as f:
+                data = f.read()
+            if is_dedup_snapshot(data):
+                driver, driver.blob_directory = read_dedup_snapshot(filename, data)
+            else:
+                data, codec = decode(data)
+                driver = pickle.loads(data)
+                driver.codec = codec
+        driver.journal.replay(driver, filename)
+        return driver
 
     def create_player(self):
         """
@@ -243,14 +730,49 @@ class SessionDriver:
             level = int(input("Level: "))
             
             new_player = player(vigor, attunement, strength, dex, intelligence, faith, name, level=1)
+            new_player.curves = self.stat_curves
             new_player.set_hp()
-            new_player.set_mana(None)
-            new_player.set_spell_slots(None)
-            self.players.append(new_player)
+            new_player.set_mana()
+            new_player.set_spell_slots()
+            self.apply("create_player", new_player)
             print("Player created successfully.")
         except ValueError:
             print("Invalid input. Please enter valid numeric values.")
 
+    def apply_create_player(self, new_player):
+        self.players.append(new_player)
+        for index in self.item_indexes():
+            index.add_owner(new_player)
+
+    def configure_stat_curves(self):
+        """
+        Lets the user change how vigor turns into max HP and attunement into max mana and spell slots for this campaign. Every player's
+        max HP and mana is recomputed right away. Spell slots only change for new players, since equipped spells already use them
+        """
+        try:
+            settings = []
+            for label, curve in (("HP", self.stat_curves.hp), ("Mana", self.stat_curves.mana)):
+                base, growth, threshold, diminishing_factor = curve.settings()
+                print(f"{label} curve (leave blank to keep the current value):")
+                settings.append((int(input(f"Base {label} ({base}): ") or base),
+                                 int(input(f"{label} per point ({growth}): ") or growth),
+                                 int(input(f"Diminishing returns start at ({threshold}): ") or threshold),
+                                 float(input(f"Diminishing factor ({diminishing_factor}): ") or diminishing_factor)))
+            slot_base, attunement_per_slot = self.stat_curves.slot_base, self.stat_curves.attunement_per_slot
+            settings.append((int(input(f"Base spell slots ({slot_base}): ") or slot_base),
+                             int(input(f"Attunement per spell slot ({attunement_per_slot}): ") or attunement_per_slot)))
+            if settings[2][1] <= 0:
+                print("Attunement per spell slot must be at least 1.")
+                return
+            self.apply("set_stat_curves", stat_curves(*settings))
+            print("Stat curves updated.")
+        except ValueError:
+            print("Invalid input. Please enter valid numeric values.")
+
+    def apply_set_stat_curves(self, curves):
+        self.stat_curves = curves
+        curves.apply_to(self.players)
+
     def use_item(self):
         """
         This will allow the user to consume a consumable item object that is inside a players inventory
@@ -271,7 +793,7 @@ class SessionDriver:
         player_obj = self.players[player_index]
 
         # Select an item to consume
-        consumable_items = [item for item in player_obj.get_inventory().values() if isinstance(item, consumable)]
+        consumable_items = player_obj.items_of_class(consumable)
         if not consumable_items:
             print(f"{player_obj.get_name()} has no consumable items in their inventory.")
             return
@@ -286,15 +808,28 @@ class SessionDriver:
                 return
 
             consumable_item = consumable_items[consumable_index]
-            if consumable_item.get_amount() - 1 <= 0:
-                print(f"{consumable_item.get_name()} consumed. {player_obj.get_name()} now has {consumable_item.get_amount() - 1} left.")
-                del player_obj.get_inventory()[consumable_item.get_name()]
-            else:
-                consumable_item.consume()
-                print(f"{consumable_item.get_name()} consumed. {player_obj.get_name()} now has {consumable_item.get_amount()} left.")
+            remaining = self.apply("use_item", player_index, consumable_item.get_name())
+            print(f"{consumable_item.get_name()} consumed. {player_obj.get_name()} now has {remaining} left.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+    def apply_use_item(self, player_index, item_name):
+        """
+        Consumes one of a consumable stack. The item is removed from the inventory once the last one is used
+
+        Returns:
+        - remaining (int): How many are left
+        """
+        player_obj = self.players[player_index]
+        consumable_item = player_obj.get_inventory()[item_name]
+        if consumable_item.get_amount() - 1 <= 0:
+            player_obj.drop_item(item_name)
+            for index in self.item_indexes():
+                index.remove(consumable_item)
+            return consumable_item.get_amount() - 1
+        consumable_item.consume()
+        return consumable_item.get_amount()
+
     def increment(self):
         """
         This will allow the user to consume add quantity to a consumable item. For example, if a player has the consumable "FireBomb" with 5
@@ -317,7 +852,7 @@ class SessionDriver:
         player_obj = self.players[player_index]
 
         # Select an item to increment
-        consumable_items = [item for item in player_obj.get_inventory().values() if isinstance(item, consumable)]
+        consumable_items = player_obj.items_of_class(consumable)
         if not consumable_items:
             print(f"{player_obj.get_name()} has no consumable items in their inventory.")
             return
@@ -332,12 +867,15 @@ class SessionDriver:
                 return
             consumable_item = consumable_items[consumable_index]
             add = int(input("Enter the amount to add: "))
-            consumable_item.addMore(add)
+            self.apply("increment", player_index, consumable_item.get_name(), add)
             print(f"{consumable_item.get_name()} consumed. {player_obj.get_name()} now has {consumable_item.get_amount()} left.")
             return
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+    def apply_increment(self, player_index, item_name, add):
+        self.players[player_index].get_inventory()[item_name].add_more(add)
+
 
     def create_mob(self):
         """
@@ -349,11 +887,26 @@ class SessionDriver:
             hp = int(input("HP: "))
             armor_class = int(input("Armor Class: "))
             new_mob = mob(hp, armor_class, name)
-            self.mobs.append(new_mob)
+            self.apply("create_mob", new_mob)
             print("Mob created successfully.")
         except ValueError:
             print("Invalid input. Please enter valid numeric values.")
 
+    def apply_create_mob(self, new_mob):
+        self.mobs.append(new_mob)
+        if self.mob_pool is not None:
+            self.mob_pool.add(new_mob)
+        for index in self.item_indexes():
+            index.add_owner(new_mob)
+
+    def get_mob_pool(self):
+        """
+        The MobPool holding every mob's hp, max hp, and armor class, built from the mob list the first time it is needed
+        """
+        if self.mob_pool is None:
+            self.mob_pool = MobPool(self.mobs)
+        return self.mob_pool
+
     def view_mobs(self):
         """
         Allow you to inspect the mobs you have created to view their Hp, name, and armor class
@@ -433,11 +986,17 @@ class SessionDriver:
                 print("Invalid item type.")
                 return
 
-            self.items.append(new_item)
+            self.apply("create_item", new_item)
             print(f"{item_type.capitalize()} created successfully.")
         except ValueError:
             print("Invalid input. Please enter valid numeric values.")
 
+    def apply_create_item(self, new_item):
+        item_id = self.items.add(new_item)
+        for index in self.item_indexes():
+            index.add(new_item, item_id)
+        return item_id
+
     def damage_player(self):
         """
         User is prompted to select a player to recieve damage.
@@ -457,11 +1016,422 @@ class SessionDriver:
 
             player_obj = self.players[player_index]
             damage = int(input(f"Enter damage to apply to {player_obj.get_name()}: "))
-            player_obj.take_damage(damage)
+            self.apply("damage_player", player_index, damage)
             print(f"{player_obj.get_name()} took {damage} damage. Current HP: {player_obj.get_hp()}")
         except ValueError:
             print("Invalid input. Damage and player number must be numbers.")
 
+    def roll_damage(self):
+        """
+        Rolls the damage of a player's equipped weapon or spell for one or more attacks. The total can be applied to a mob right away
+        """
+        if not self.players:
+            print("No players created yet. Create a player first.")
+            return
+
+        try:
+            for idx, player_obj in enumerate(self.players):
+                print(f"{idx + 1}: {player_obj.get_name()}")
+            player_index = int(input("Enter the player number who attacks: ")) - 1
+            if player_index < 0 or player_index >= len(self.players):
+                print("Invalid player number.")
+                return
+
+            attacks = self.players[player_index].equipped_items(weapon)
+            if not attacks:
+                print("This player has no weapon or spell equipped.")
+                return
+            for idx, attack in enumerate(attacks):
+                n, dice = attack.get_dice()
+                print(f"{idx + 1}: {attack.get_name()} ({n}d{dice})")
+            attack_index = int(input("Enter the weapon or spell number: ")) - 1
+            if attack_index < 0 or attack_index >= len(attacks):
+                print("Invalid weapon number.")
+                return
+            count = int(input("Enter the number of attacks: "))
+            if count <= 0:
+                print("The number of attacks must be at least 1.")
+                return
+
+            n, dice = attacks[attack_index].get_dice()
+            totals = self.apply("roll_dice", n, dice, count)
+            print(f"Rolls: {', '.join(str(total) for total in totals)}")
+            print(f"Total damage: {sum(totals)}")
+
+            if not self.mobs:
+                return
+            for idx, mob_obj in enumerate(self.mobs):
+                print(f"{idx + 1}: {mob_obj.get_name()} - HP: {mob_obj.get_hp()}")
+            answer = input("Enter a mob number to apply the total damage to, or press Enter to skip: ").strip()
+            if not answer:
+                return
+            mob_index = int(answer) - 1
+            if mob_index < 0 or mob_index >= len(self.mobs):
+                print("Invalid mob number.")
+                return
+            mob_obj = self.mobs[mob_index]
+            if self.apply("damage_mob", mob_index, sum(totals)):
+                print(f"{mob_obj.get_name()} has died.")
+            else:
+                print(f"{mob_obj.get_name()} took {sum(totals)} damage. Current HP: {mob_obj.get_hp()}")
+        except ValueError:
+            print("Invalid input. Please enter numbers.")
+
+    def apply_roll_dice(self, n, dice, count):
+        # Rolls are journaled like any other change, so a reload continues the dice where the session left off
+        return self.dice.roll_many(n, dice, count)
+
+    def set_dice_seed(self):
+        """
+        Sets the seed of the dice engine, so the same seed gives the same rolls again
+        """
+        answer = input(f"Current seed: {self.dice.seed}. Enter a new seed, or press Enter for a random one: ").strip()
+        try:
+            # A random seed is picked here, so the journal records the seed that was actually used
+            seed = int(answer) if answer else random.SystemRandom().getrandbits(32)
+        except ValueError:
+            print("Invalid input. The seed must be a number.")
+            return
+        self.apply("set_dice_seed", seed)
+        print(f"Dice seed set to {seed}.")
+
+    def apply_set_dice_seed(self, seed):
+        self.dice.reseed(seed)
+
+    def initiative_menu(self):
+        """
+        This handles the initiative UI: rolling initiative, moving through turns, and delaying or readying actions. Players and mobs
+        that die leave the turn order on their own
+        """
+        tracker = self.initiative
+        if tracker.current is not None:
+            print(f"\nRound {tracker.round}, {tracker.current.get_name()}'s turn")
+        print("\nInitiative Options:")
+        print("1. Roll Initiative")
+        print("2. Next Turn")
+        print("3. View Turn Order")
+        print("4. Delay Current Turn")
+        print("5. Ready Current Turn")
+        print("6. Act With Readied Combatant")
+        print("7. End Encounter")
+
+        choice = input("Enter your choice: ").strip()
+        try:
+            if choice == "1":
+                self.roll_initiative()
+            elif choice == "2":
+                started = tracker.round
+                combatant = tracker.next_turn()
+                if combatant is None:
+                    print("Nobody is in the fight. Roll initiative first.")
+                    return
+                if started and tracker.round != started:
+                    # A new round of the fight is a new round for status effects too
+                    self.advance_round()
+                    if combatant not in tracker:
+                        combatant = tracker.next_turn()
+                        if combatant is None:
+                            return
+                print(f"Round {tracker.round}: {combatant.get_name()}'s turn.")
+            elif choice == "3":
+                upcoming = tracker.upcoming()
+                print(f"Round {tracker.round}")
+                if tracker.current is not None:
+                    print(f"Acting: {tracker.current.get_name()} ({tracker.initiatives[tracker.current]})")
+                for combatant in upcoming:
+                    print(f"Next: {combatant.get_name()} ({tracker.initiatives[combatant]})")
+                for combatant in tracker.readied:
+                    print(f"Readied: {combatant.get_name()}")
+            elif choice == "4":
+                combatant = tracker.current
+                if combatant is None:
+                    print("It is nobody's turn.")
+                    return
+                initiative = int(input(f"Enter the initiative {combatant.get_name()} delays to: "))
+                if initiative >= tracker.initiatives[combatant]:
+                    print("A delayed turn must have a lower initiative.")
+                    return
+                tracker.delay(combatant, initiative)
+                print(f"{combatant.get_name()} will act at initiative {initiative}.")
+            elif choice == "5":
+                combatant = tracker.current
+                if combatant is None:
+                    print("It is nobody's turn.")
+                    return
+                tracker.ready(combatant)
+                print(f"{combatant.get_name()} readies an action.")
+            elif choice == "6":
+                readied = list(tracker.readied)
+                if not readied:
+                    print("Nobody has a readied action.")
+                    return
+                for idx, combatant in enumerate(readied):
+                    print(f"{idx + 1}: {combatant.get_name()}")
+                idx = int(input("Select the combatant who acts: ")) - 1
+                if idx < 0 or idx >= len(readied):
+                    print("Invalid selection.")
+                    return
+                tracker.trigger(readied[idx])
+                print(f"{tracker.next_turn().get_name()} acts now.")
+            elif choice == "7":
+                self.initiative = InitiativeTracker()
+                print("Encounter ended.")
+            else:
+                print("Invalid choice.")
+        except ValueError:
+            print("Invalid input. Please enter numbers.")
+
+    def status_effect_menu(self):
+        """
+        This handles the status effect UI: poison, bleed, buffs, and debuffs that last a number of rounds
+        """
+        print(f"\nStatus Effects (round {self.status_round}):")
+        print("1. Add Effect")
+        print("2. Remove Effect")
+        print("3. View Effects")
+        print("4. Advance Round")
+
+        choice = input("Enter your choice: ").strip()
+        try:
+            if choice == "1":
+                self.add_effect()
+            elif choice == "2":
+                self.remove_effect()
+            elif choice == "3":
+                shown = False
+                for target in self.players + self.mobs:
+                    for effect in effects_of(target).values():
+                        print(f"{target.get_name()}: {effect.describe(self.status_round)}")
+                        shown = True
+                if not shown:
+                    print("No active effects.")
+            elif choice == "4":
+                self.advance_round()
+            else:
+                print("Invalid choice.")
+        except ValueError:
+            print("Invalid input. Please enter numbers.")
+
+    def select_effect_target(self):
+        """
+        Lets the user choose a player or a mob
+
+        Returns:
+        - target (tuple): ("player" or "mob", index), or None if the input was invalid
+        """
+        kind = input("Player or mob? (p/m): ").strip().lower()
+        if kind not in ("p", "m"):
+            print("Invalid choice.")
+            return None
+        kind = "player" if kind == "p" else "mob"
+        targets = self.players if kind == "player" else self.mobs
+        if not targets:
+            print(f"No {kind}s available.")
+            return None
+        for idx, target in enumerate(targets):
+            print(f"{idx + 1}: {target.get_name()}")
+        index = int(input(f"Select {kind} number: ")) - 1
+        if index < 0 or index >= len(targets):
+            print(f"Invalid {kind} number.")
+            return None
+        return kind, index
+
+    def add_effect(self):
+        """
+        Puts a status effect on a player or mob. Effects can deal damage every few rounds, and effects on players can also change
+        their stats while they last
+        """
+        selected = self.select_effect_target()
+        if selected is None:
+            return
+        kind, index = selected
+        name = input("Effect name (for example Poison): ").strip()
+        rounds = int(input("How many rounds it lasts: "))
+        damage = int(input("Damage per tick (0 for none): "))
+        interval = int(input("Rounds between ticks: ")) if damage else 1
+        bonuses = {}
+        if kind == "player":
+            answer = input("Stat changes as stat=value separated by commas, for example strength=-2 (press Enter for none): ").strip()
+            for part in filter(None, (part.strip() for part in answer.split(","))):
+                stat, value = part.split("=")
+                if stat.strip() not in STATS:
+                    print(f"Unknown stat {stat.strip()}. Stats are: {', '.join(STATS)}")
+                    return
+                bonuses[stat.strip()] = int(value)
+        if not name or rounds <= 0 or damage < 0 or interval <= 0:
+            print("The effect needs a name, at least 1 round, and damage and ticks that are not negative.")
+            return
+        self.apply("add_effect", kind, index, name, rounds, damage, bonuses, interval)
+        print(f"{name} added.")
+
+    def remove_effect(self):
+        selected = self.select_effect_target()
+        if selected is None:
+            return
+        kind, index = selected
+        target = (self.players if kind == "player" else self.mobs)[index]
+        names = list(effects_of(target))
+        if not names:
+            print(f"{target.get_name()} has no active effects.")
+            return
+        for idx, name in enumerate(names):
+            print(f"{idx + 1}: {name}")
+        effect_index = int(input("Select effect to remove: ")) - 1
+        if effect_index < 0 or effect_index >= len(names):
+            print("Invalid effect number.")
+            return
+        self.apply("remove_effect", kind, index, names[effect_index])
+        print(f"{names[effect_index]} removed.")
+
+    def advance_round(self):
+        """
+        Moves status effects on by one round and prints what happened
+        """
+        events = self.apply("advance_round")
+        print(f"Round {self.status_round}.")
+        for _, message in events:
+            print(message)
+
+    def get_effect_wheel(self):
+        """
+        The timing wheel of every active status effect, built from the players' and mobs' effects the first time it is needed
+        """
+        if self.effect_wheel is None:
+            self.effect_wheel = TimingWheel(self.status_round)
+            for target in self.players + self.mobs:
+                for effect in effects_of(target).values():
+                    self.effect_wheel.schedule(effect.next_event(), (target, effect))
+        return self.effect_wheel
+
+    def apply_add_effect(self, kind, index, name, rounds, damage, bonuses, interval):
+        target = (self.players if kind == "player" else self.mobs)[index]
+        effect = StatusEffect(name, rounds, damage, bonuses, interval)
+        effect.start(self.status_round)
+        self.end_effect(target, name)
+        target.effects = {**effects_of(target), name: effect}
+        if effect.bonuses and isinstance(target, player):
+            target.set_modifier(effect.modifier_name(), effect.bonuses)
+        if self.effect_wheel is not None:
+            self.effect_wheel.schedule(effect.next_event(), (target, effect))
+
+    def apply_remove_effect(self, kind, index, name):
+        self.end_effect((self.players if kind == "player" else self.mobs)[index], name)
+
+    def end_effect(self, target, name):
+        """
+        Takes an effect off a player or mob. Its wheel entry is left behind and skipped when it comes up
+        """
+        effects = dict(effects_of(target))
+        effect = effects.pop(name, None)
+        if effect is None:
+            return
+        target.effects = effects
+        if effect.bonuses and isinstance(target, player):
+            target.remove_modifier(effect.modifier_name())
+
+    def apply_advance_round(self):
+        """
+        Moves to the next round. Only the effects that tick or expire this round are looked at. Mobs killed by an effect are removed
+        from the session
+
+        Returns:
+        - events (list): (player or mob, message) for every tick and every effect that wore off
+        """
+        wheel = self.get_effect_wheel()
+        due = wheel.advance()
+        self.status_round = wheel.now
+        events = []
+        for target, effect in due:
+            # Effects that were removed or replaced, and effects on mobs that already died, leave stale entries behind
+            if effects_of(target).get(effect.name) is not effect or (isinstance(target, mob) and target.get_hp() <= 0):
+                continue
+            if effect.next_tick == self.status_round:
+                target.take_damage(effect.damage)
+                events.append((target, f"{target.get_name()} takes {effect.damage} damage from {effect.name}."))
+                effect.next_tick += effect.interval
+            if effect.expires <= self.status_round:
+                self.end_effect(target, effect.name)
+                events.append((target, f"{effect.name} on {target.get_name()} wore off."))
+            else:
+                wheel.schedule(effect.next_event(), (target, effect))
+
+        for target in {id(target): target for target, _ in events}.values():
+            if target.get_hp() > 0:
+                continue
+            self.initiative.remove(target)
+            if isinstance(target, mob):
+                if self.mob_pool is not None:
+                    self.mob_pool.remove(target)
+                for index in self.item_indexes():
+                    index.remove_owner(target)
+                self.mobs.remove(target)
+                events.append((target, f"{target.get_name()} has died."))
+        return events
+
+    def roll_initiative(self):
+        """
+        Adds every player and mob that is not in the fight yet to the turn order. Each initiative can be typed in, or rolled on a d20
+        """
+        joining = [combatant for combatant in self.players + self.mobs
+                   if combatant not in self.initiative and combatant.get_hp() > 0]
+        if not joining:
+            print("Everyone is already in the fight.")
+            return
+        for combatant in joining:
+            answer = input(f"Initiative for {combatant.get_name()} (press Enter to roll a d20): ").strip()
+            initiative = int(answer) if answer else self.apply("roll_dice", 1, 20, 1)[0]
+            self.initiative.add(combatant, initiative)
+            print(f"{combatant.get_name()}: {initiative}")
+
+    def simulate_encounter_menu(self):
+        """
+        Simulates some of the players fighting some of the mobs many times, and prints how likely the party is to win
+        """
+        if not self.players or not self.mobs:
+            print("An encounter needs at least one player and one mob.")
+            return
+
+        try:
+            player_indexes = self.select_several([f"{player_obj.get_name()} - HP: {player_obj.get_hp()}" for player_obj in self.players],
+                                                 "player", "send into the fight")
+            if player_indexes is None:
+                return
+            mob_indexes = self.select_mobs("fight")
+            if mob_indexes is None:
+                return
+            trials = int(input("Enter the number of fights to simulate: "))
+            if trials <= 0:
+                print("The number of fights must be at least 1.")
+                return
+            answer = input("Enter a seed, or press Enter for a random one: ").strip()
+            result = self.simulate_encounter(player_indexes, mob_indexes, trials, int(answer) if answer else None)
+            print(result.summary())
+        except ValueError:
+            print("Invalid input. Please enter numbers.")
+
+    def simulate_encounter(self, player_indexes, mob_indexes, trials=1000, seed=None, workers=None):
+        """
+        Simulates players fighting mobs many times over. The session is not changed
+
+        Parameters:
+        - player_indexes (list): Indexes into self.players
+        - mob_indexes (list): Indexes into self.mobs
+        - trials (int): How many fights to simulate
+        - seed (int): The seed. The same seed gives the same result
+        - workers (int): How many processes to use. None uses every core
+
+        Returns:
+        - result (EncounterResult): Win probability, expected rounds, and expected flasks used
+        """
+        return Simulator.simulate_encounter([self.players[idx] for idx in player_indexes], [self.mobs[idx] for idx in mob_indexes],
+                                            trials, seed, workers)
+
+    def apply_damage_player(self, player_index, damage):
+        player_obj = self.players[player_index]
+        player_obj.take_damage(damage)
+        if player_obj.get_hp() <= 0:
+            self.initiative.remove(player_obj)
+
     def damage_mob(self):
         """
         Allows the user to damage a mob.
@@ -481,15 +1451,136 @@ class SessionDriver:
 
             mob_obj = self.mobs[mob_index]
             damage = int(input(f"Enter damage to apply to Mob {mob_index + 1}: "))
-            mob_obj.take_damage(damage)
+            died = self.apply("damage_mob", mob_index, damage)
             print(f"Mob {mob_index + 1} took {damage} damage. Current HP: {mob_obj.get_hp()}")
 
-            if mob_obj.get_hp() <= 0:
+            if died:
                 print(f"Mob {mob_index + 1} has died.")
-                self.mobs.pop(mob_index)
 
         except ValueError:
             print("Invalid input. Damage and mob number must be numbers.")
+
+    def apply_damage_mob(self, mob_index, damage):
+        """
+        Damages a mob and removes it from the session if it died
+
+        Returns:
+        - died (bool): True if the mob was removed
+        """
+        mob_obj = self.mobs[mob_index]
+        mob_obj.take_damage(damage)
+        if mob_obj.get_hp() <= 0:
+            if self.mob_pool is not None:
+                self.mob_pool.remove(mob_obj)
+            for index in self.item_indexes():
+                index.remove_owner(mob_obj)
+            self.initiative.remove(mob_obj)
+            self.mobs.pop(mob_index)
+            return True
+        return False
+
+    def select_mobs(self, action):
+        """
+        Lets the user choose several mobs at once
+
+        Parameters:
+        - action (str): What will be done to the mobs, used in the prompt
+
+        Returns:
+        - mob_indexes (list): Indexes into self.mobs, or None if the input was invalid
+        """
+        lines = [f"{mob_obj.get_name()} - HP: {mob_obj.get_hp()}/{mob_obj.get_max_hp()}, Armor Class: {mob_obj.get_armor_class()}"
+                 for mob_obj in self.mobs]
+        return self.select_several(lines, "mob", action)
+
+    def select_several(self, lines, kind, action):
+        """
+        Lists entries and lets the user choose several of them, as comma separated numbers or 'all'
+
+        Parameters:
+        - lines (list): The text shown for each entry
+        - kind (str): What the entries are, for example "mob"
+        - action (str): What will be done to them, used in the prompt
+
+        Returns:
+        - indexes (list): The chosen entries in ascending order, or None if the input was invalid
+        """
+        for idx, line in enumerate(lines):
+            print(f"{idx + 1}: {line}")
+        answer = input(f"Enter the {kind} numbers to {action}, separated by commas, or 'all': ").strip().lower()
+        if answer == "all":
+            return list(range(len(lines)))
+        indexes = sorted({int(part) - 1 for part in answer.split(",") if part.strip()})
+        if not indexes or indexes[0] < 0 or indexes[-1] >= len(lines):
+            print(f"Invalid {kind} number.")
+            return None
+        return indexes
+
+    def damage_mobs(self):
+        """
+        Applies the same damage to several mobs at once, for area attacks and cleaves
+        """
+        if not self.mobs:
+            print("No mobs created yet. Create a mob first.")
+            return
+
+        try:
+            mob_indexes = self.select_mobs("damage")
+            if mob_indexes is None:
+                return
+            damage = int(input("Enter damage to apply to each mob: "))
+            died = self.apply("damage_mobs", mob_indexes, damage)
+            print(f"{len(mob_indexes)} mobs took {damage} damage.")
+            if died:
+                print(f"{len(died)} mobs died: {', '.join(mob_obj.get_name() for mob_obj in died)}")
+        except ValueError:
+            print("Invalid input. Damage and mob numbers must be numbers.")
+
+    def apply_damage_mobs(self, mob_indexes, damage):
+        """
+        Damages several mobs in one pass over the mob pool and removes the ones that died
+
+        Parameters:
+        - mob_indexes (list): Indexes into self.mobs
+        - damage (int or list): The damage for every mob, or one amount per mob
+
+        Returns:
+        - died (list): The mobs that died
+        """
+        pool = self.get_mob_pool()
+        died = pool.take_damage([self.mobs[idx].slot for idx in mob_indexes], damage)
+        if died:
+            dead = {id(mob_obj) for mob_obj in died}
+            for idx in sorted(mob_indexes, reverse=True):
+                if id(self.mobs[idx]) in dead:
+                    self.initiative.remove(self.mobs[idx])
+                    for index in self.item_indexes():
+                        index.remove_owner(self.mobs[idx])
+                    pool.remove(self.mobs.pop(idx))
+        return died
+
+    def heal_mobs(self):
+        """
+        Heals several mobs at once, up to their max hp
+        """
+        if not self.mobs:
+            print("No mobs created yet. Create a mob first.")
+            return
+
+        try:
+            mob_indexes = self.select_mobs("heal")
+            if mob_indexes is None:
+                return
+            amount = int(input("Enter hp to restore to each mob: "))
+            self.apply("heal_mobs", mob_indexes, amount)
+            print(f"{len(mob_indexes)} mobs healed.")
+        except ValueError:
+            print("Invalid input. Healing and mob numbers must be numbers.")
+
+    def apply_heal_mobs(self, mob_indexes, amount):
+        pool = self.get_mob_pool()
+        pool.heal([self.mobs[idx].slot for idx in mob_indexes], amount)
+
     def viewMobs(self):
         """
         Display all mobs in the session with their stats.
@@ -500,7 +1591,7 @@ class SessionDriver:
 
         print("Mobs:")
         for idx, mobObj in enumerate(self.mobs):
-            print(f"Name : {self.get_name()} HP: {mobObj.hp}, Armor Class: {mobObj.armor_class}")
+            print(f"Name : {mobObj.get_name()} HP: {mobObj.get_hp()}, Armor Class: {mobObj.get_armor_class()}")
 
 
     def pick_up_item(self):
@@ -527,22 +1618,129 @@ class SessionDriver:
 
             player_obj = self.players[player_index]
 
-            # Show available items
-            print("Available Items:")
-            for idx, item_obj in enumerate(self.items):
-                print(f"{idx + 1}: {item_obj.get_name()}")
-            item_index = int(input("Enter the item number to pick up: ")) - 1
-
-            if item_index < 0 or item_index >= len(self.items):
-                print("Invalid item number.")
+            item_id = self.select_world_item("pick up")
+            if item_id is None:
                 return
 
             # Pick up the item
-            item_obj = self.items.pop(item_index)  
-            player_obj.get_inventory()[item_obj.get_name()] = item_obj  
+            item_obj = self.apply("pick_up", player_index, item_id)
             print(f"{player_obj.get_name()} picked up {item_obj.get_name()}.")
         except ValueError:
-            print("Invalid input. Player and item numbers must be numbers.")
+            print("Invalid input. Player numbers and item IDs must be numbers.")
+
+    def apply_pick_up(self, player_index, item_id):
+        item_obj = self.items.remove(item_id)
+        self.move_indexed(item_obj, self.players[player_index])
+        self.players[player_index].obtain_item(item_obj)
+        return item_obj
+
+    def item_indexes(self):
+        # The item indexes that have been built, which every change to where items are has to keep up to date
+        return [index for index in (self.requirement_index, self.search_index) if index is not None]
+
+    def move_indexed(self, item_obj, owner):
+        """
+        Keeps the item indexes up to date when an item is about to go into an inventory. An item with the same name already in the
+        inventory is replaced, so it leaves the indexes
+        """
+        replaced = owner.get_inventory().get(item_obj.get_name())
+        for index in self.item_indexes():
+            if replaced is not None:
+                index.remove(replaced)
+            index.add(item_obj, owner)
+
+    def indexed_entries(self):
+        # (item, place) of every item in the world and in inventories
+        entries = [(item_obj, item_id) for item_id, item_obj in self.items.items()]
+        entries += [(item_obj, owner) for owner in self.players + self.mobs for item_obj in owner.get_inventory().values()]
+        return entries
+
+    def get_requirement_index(self):
+        """
+        The requirement index of every weapon, spell, and armor in the world and in inventories, built the first time it is needed
+        """
+        if self.requirement_index is None:
+            self.requirement_index = RequirementIndex(self.indexed_entries())
+        return self.requirement_index
+
+    def get_search_index(self):
+        """
+        The search index of every item in the world and in inventories, built the first time it is needed
+        """
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.indexed_entries())
+        return self.search_index
+
+    def describe_place(self, place):
+        # Where an item index entry is, for the menus
+        if isinstance(place, int):
+            return f"World (ID {place})"
+        if isinstance(place, mob):
+            return f"Mob {place.get_name()}"
+        return f"{place.get_name()}'s inventory"
+
+    def equippable_items(self):
+        """
+        Lists every weapon, spell, and armor in the world and in inventories that a player meets the requirements of, and what one
+        more point of each stat would unlock
+        """
+        player_index = self.select_player()
+        if player_index is None:
+            return
+        if player_index < 0 or player_index >= len(self.players):
+            print("Invalid player number.")
+            return
+        player_obj = self.players[player_index]
+        index = self.get_requirement_index()
+        stats = tuple(player_obj.effective(stat) for stat in REQUIREMENT_STATS)
+
+        entries = index.equippable(stats)
+        print(f"{player_obj.get_name()} meets the requirements of {len(entries)} items:")
+        for item_obj, place in sorted(entries, key=lambda entry: entry[0].get_name())[:ITEM_LIST_LIMIT]:
+            print(f"- {item_obj.get_name()} ({self.describe_place(place)})")
+        if len(entries) > ITEM_LIST_LIMIT:
+            print(f"... and {len(entries) - ITEM_LIST_LIMIT} more.")
+
+        for stat in REQUIREMENT_STATS:
+            unlocked = index.unlocked_by(stats, stat)
+            names = sorted({item_obj.get_name() for item_obj, _ in unlocked})
+            shown = ", ".join(names[:10]) + (", ..." if len(names) > 10 else "")
+            print(f"One more {stat}: {len(unlocked)} items" + (f" ({shown})" if names else ""))
+
+    def apply_pick_up_item(self, player_index, item_index):
+        # Journals written before world items had IDs refer to them by list position
+        return self.apply_pick_up(player_index, self.items.id_at(item_index))
+
+    def select_world_item(self, action, item_class=None):
+        """
+        Lets the user choose a world item by its ID. In large worlds the user searches by name first, so the menu does not print every
+        item
+
+        Parameters:
+        - action (str): What will be done with the item, used in the prompt
+        - item_class (type): Only offer items of this class, for example weapon
+
+        Returns:
+        - item_id (int): The chosen item, or None if there was nothing to choose
+        """
+        if len(self.items) > ITEM_LIST_LIMIT:
+            name = input("Enter the item name to search for: ").strip()
+            matches = self.items.find(name, item_class)
+        else:
+            matches = self.items.of_class(item_class) if item_class is not None else self.items.items()
+        if not matches:
+            print("No matching items found.")
+            return None
+
+        print("Available Items:")
+        for item_id, item_obj in matches:
+            print(f"ID {item_id}: {item_obj.get_name()}")
+        item_id = int(input(f"Enter the item ID to {action}: "))
+
+        if item_id not in self.items or (item_class is not None and not isinstance(self.items[item_id], item_class)):
+            print("Invalid item ID.")
+            return None
+        return item_id
 
     def equip_item(self):
         """
@@ -580,17 +1778,22 @@ class SessionDriver:
         item_name = list(player_obj.get_inventory().keys())[item_index]
         item_obj = player_obj.get_inventory()[item_name]
 
-        if isinstance(item_obj, armor):
-            result = player_obj.equip_armor(item_obj)
-        elif isinstance(item_obj, ring):
-            result = player_obj.equip_ring(item_obj)
-        elif isinstance(item_obj, weapon):
-            result = player_obj.equip_weapon(item_obj)
-        else:
+        if not isinstance(item_obj, (armor, ring, weapon)):
             print("This item cannot be equipped.")
             return
 
-        print(result)
+        print(self.apply("equip_item", player_index, item_name))
+
+    def apply_equip_item(self, player_index, item_name):
+        player_obj = self.players[player_index]
+        item_obj = player_obj.get_inventory()[item_name]
+
+        if isinstance(item_obj, armor):
+            return player_obj.equip_armor(item_obj)
+        elif isinstance(item_obj, ring):
+            return player_obj.equip_ring(item_obj)
+        elif isinstance(item_obj, weapon):
+            return player_obj.equip_weapon(item_obj)
 
     def unequip_item(self):
         """
@@ -628,17 +1831,22 @@ class SessionDriver:
         item_name = list(player_obj.get_inventory().keys())[item_index]
         item_obj = player_obj.get_inventory()[item_name]
 
-        if isinstance(item_obj, armor):
-            result = player_obj.unequip_armor(item_obj)
-        elif isinstance(item_obj, ring):
-            result = player_obj.unequip_ring(item_obj)
-        elif isinstance(item_obj, weapon):
-            result = player_obj.unequip_weapon(item_obj)
-        else:
+        if not isinstance(item_obj, (armor, ring, weapon)):
             print("This item cannot be unequipped.")
             return
 
-        print(result)
+        print(self.apply("unequip_item", player_index, item_name))
+
+    def apply_unequip_item(self, player_index, item_name):
+        player_obj = self.players[player_index]
+        item_obj = player_obj.get_inventory()[item_name]
+
+        if isinstance(item_obj, armor):
+            return player_obj.unequip_armor(item_obj)
+        elif isinstance(item_obj, ring):
+            return player_obj.unequip_ring(item_obj)
+        elif isinstance(item_obj, weapon):
+            return player_obj.unequip_weapon(item_obj)
 
     def rest_at_bonfire(self):
         """
@@ -648,10 +1856,12 @@ class SessionDriver:
             print("No players created yet. Create a player first.")
             return
 
+        self.apply("rest_at_bonfire")
+
+    def apply_rest_at_bonfire(self):
         for player_obj in self.players:
             player_obj.bonfire()
-            inventory = player_obj.get_inventory()
-            flasks = [item for item in inventory.values() if isinstance(item, estus)]
+            flasks = player_obj.items_of_class(estus)
 
             if not flasks:
                 print(f"{player_obj.get_name()} has no flasks in their inventory.")
@@ -684,26 +1894,28 @@ class SessionDriver:
             mob_obj = self.mobs[mob_index]
 
             # Select a weapon
-            weapons = [item for item in self.items if isinstance(item, weapon)]
-
-            if not weapons:
+            if not self.items.has_class(weapon):
                 print("No weapons available to assign.")
                 return
 
-            for idx, weapon_obj in enumerate(weapons):
-                print(f"{idx + 1}: {weapon_obj.get_name()}")
-            weapon_index = int(input("Enter the weapon number to assign: ")) - 1
-
-            if weapon_index < 0 or weapon_index >= len(weapons):
-                print("Invalid weapon number.")
+            item_id = self.select_world_item("assign", weapon)
+            if item_id is None:
                 return
 
-            weapon_obj = weapons[weapon_index]
-            mob_obj.add_ability(weapon_obj)
-            self.items.remove(weapon_obj) 
+            weapon_obj = self.apply("arm_mob", mob_index, item_id)
             print(f"{weapon_obj.get_name()} added to Mob {mob_index + 1}.")
         except ValueError:
-            print("Invalid input. Mob and weapon numbers must be numbers.")
+            print("Invalid input. Mob numbers and item IDs must be numbers.")
+
+    def apply_arm_mob(self, mob_index, item_id):
+        weapon_obj = self.items.remove(item_id)
+        self.move_indexed(weapon_obj, self.mobs[mob_index])
+        self.mobs[mob_index].add_ability(weapon_obj)
+        return weapon_obj
+
+    def apply_add_weapon_to_mob(self, mob_index, item_index):
+        # Journals written before world items had IDs refer to them by list position
+        return self.apply_arm_mob(mob_index, self.items.id_at(item_index))
 
     def view_item_details(self):
         """
@@ -721,14 +1933,10 @@ class SessionDriver:
                 if not self.items:
                     print("No items available in the world.")
                     return
-                for idx, item in enumerate(self.items):
-                    print(f"{idx + 1}: {item.get_name()}")
-                item_index = int(input("Select item number to view details: ")) - 1
-                if item_index < 0 or item_index >= len(self.items):
-                    print("Invalid item number.")
+                item_id = self.select_world_item("view")
+                if item_id is None:
                     return
-                item = self.items[item_index]
-                print(vars(item))
+                self.show_item_details(self.items[item_id])
 
             elif choice == 2:
                 if not self.players:
@@ -748,8 +1956,7 @@ class SessionDriver:
                     print(f"{idx + 1}: {item_name}")
                 item_index = int(input("Select item number to view details: ")) - 1
                 item_name = list(player.get_inventory().keys())[item_index]
-                item = player.get_inventory()[item_name]
-                print(vars(item))
+                self.show_item_details(player.get_inventory()[item_name])
 
             elif choice == 3:
                 if not self.mobs:
@@ -769,8 +1976,7 @@ class SessionDriver:
                     print(f"{idx + 1}: {item_name}")
                 item_index = int(input("Select item number to view details: ")) - 1
                 item_name = list(mob.get_inventory().keys())[item_index]
-                item = mob.get_inventory()[item_name]
-                print(vars(item))
+                self.show_item_details(mob.get_inventory()[item_name])
 
             else:
                 print("Invalid choice.")
@@ -778,7 +1984,41 @@ class SessionDriver:
         except (ValueError, IndexError):
             print("Invalid input. Please try again.")
 
-    
+    def search_items(self):
+        """
+        Searches the names and descriptions of every item in the world, player inventories, and mob inventories, and shows the
+        details of the chosen hit. Every word has to match the start of a word of the item, and the best matches are listed first
+        """
+        query = input("Search for: ").strip()
+        hits, total = self.get_search_index().search(query, ITEM_LIST_LIMIT)
+        if not hits:
+            print("No items match.")
+            return
+        for idx, (score, item_obj, place) in enumerate(hits):
+            print(f"{idx + 1}: {item_obj.get_name()} - {self.describe_place(place)}")
+        if total > len(hits):
+            print(f"...and {total - len(hits)} more. Add words to narrow the search.")
+        choice = input("Enter a number to view the item, or press Enter to go back: ").strip()
+        if not choice:
+            return
+        try:
+            hit_index = int(choice) - 1
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+            return
+        if hit_index < 0 or hit_index >= len(hits):
+            print("Invalid item number.")
+            return
+        self.show_item_details(hits[hit_index][1])
+
+    def show_item_details(self, item_obj):
+        """
+        Prints an item's details, with the expected damage and percentiles for weapons and spells
+        """
+        print(item_obj.get_details())
+        if isinstance(item_obj, weapon):
+            print(damage_distribution(*item_obj.get_dice()).summary())
+
     def drink_from_flask(self):
         """
         Allows a player to drink from their Estus flask to restore mana or health
@@ -800,7 +2040,7 @@ class SessionDriver:
             player = self.players[player_index]
 
             # Check for flask in inventory
-            flasks = [item for item in player.get_inventory().values() if isinstance(item, estus)]
+            flasks = player.items_of_class(estus)
             if not flasks:
                 print(f"{player.get_name()} has no flask in their inventory.")
                 return
@@ -822,15 +2062,20 @@ class SessionDriver:
                 return
 
             # Drink from the flask
-            flask.charges -= 1
-            player.hp = min(player.get_HP(), player.get_hp() + flask.get_hp())  
-            player.mana = min(player.get_MANA(), player.get_mana() + flask.get_mana())  
+            self.apply("drink_from_flask", player_index, flask.get_name())
 
             print(f"{player.get_name()} drank from {flask.get_name()}. HP: {player.get_hp()}/{player.get_HP()}, Mana: {player.get_mana()}/{player.get_MANA()}, Remaining Charges: {flask.get_charges()}")
 
         except (ValueError, IndexError):
             print("Invalid input. Please try again.")
 
+    def apply_drink_from_flask(self, player_index, flask_name):
+        player = self.players[player_index]
+        flask = player.get_inventory()[flask_name]
+        flask.charges -= 1
+        player.hp = min(player.get_HP(), player.get_hp() + flask.get_hp())  
+        player.mana = min(player.get_MANA(), player.get_mana() + flask.get_mana())  
+
     def create_spell(self):
         """
         Allows the creation of a spell
@@ -847,7 +2092,7 @@ class SessionDriver:
         spell_slots_required = int(input("Spell Slots Required: "))
 
         new_spell = spell(description, name, n, dice, strength, dex, intelligence, faith, mana_cost, spell_slots_required)
-        self.items.append(new_spell)
+        self.apply("create_item", new_spell)
         print(f"Spell '{name}' created.")
 
     def equip_spell(self):
@@ -861,7 +2106,7 @@ class SessionDriver:
         player_obj = self.players[player_index]
 
         # Filter spells from the player's inventory
-        spells = [item for item in player_obj.get_inventory().values() if isinstance(item, spell)]
+        spells = player_obj.items_of_class(spell)
         if not spells:
             print("No spells available in the player's inventory.")
             return
@@ -873,11 +2118,99 @@ class SessionDriver:
             spell_index = int(input("Select spell to equip: ")) - 1
             selected_spell = spells[spell_index]
 
-            result = player_obj.equip_spell(selected_spell)
+            result = self.apply("equip_spell", player_index, selected_spell.get_name())
             print(result)
         except (ValueError, IndexError):
             print("Invalid selection.")
 
+    def apply_equip_spell(self, player_index, spell_name):
+        player_obj = self.players[player_index]
+        return player_obj.equip_spell(player_obj.get_inventory()[spell_name])
+
+    def plan_spell_slots(self):
+        """
+        Works out the best set of spells for a player's spell slots, by expected damage per mana or by priorities the user gives,
+        and equips it in one step
+        """
+        player_index = self.select_player()
+        if player_index is None:
+            return
+        if player_index < 0 or player_index >= len(self.players):
+            print("Invalid player number.")
+            return
+        player_obj = self.players[player_index]
+
+        spells = castable_spells(player_obj)
+        if not spells:
+            print(f"{player_obj.get_name()} has no spells they meet the requirements of.")
+            return
+        print("Score spells by:")
+        print("1. Expected Damage per Mana")
+        print("2. Priorities")
+        choice = input("Enter your choice: ").strip()
+        priorities = {}
+        if choice == "2":
+            try:
+                for spell_obj in spells:
+                    entered = input(f"Priority of {spell_obj.get_name()} ({spell_obj.get_spell_slot_cost()} slots, Enter for 0): ").strip()
+                    if entered:
+                        priorities[spell_obj.get_name()] = float(entered)
+            except ValueError:
+                print("Invalid input. Please enter a number.")
+                return
+        elif choice != "1":
+            print("Invalid choice.")
+            return
+
+        chosen, value, capacity = plan_spells(player_obj, "priority" if choice == "2" else "damage_per_mana", priorities)
+        used = sum(spell_obj.get_spell_slot_cost() for spell_obj in chosen)
+        print(f"Best spells for {capacity} spell slots ({used} used, worth {value:.2f}):")
+        for spell_obj in chosen:
+            print(f"- {spell_obj.get_name()} ({spell_obj.get_spell_slot_cost()} slots, {spell_obj.get_mana_cos()} mana)")
+        if {id(spell_obj) for spell_obj in chosen} == {id(spell_obj) for spell_obj in player_obj.equipped_items(spell)}:
+            print("These spells are already equipped.")
+            return
+        if input("Equip these spells? (y/n): ").strip().lower() != "y":
+            print("Plan discarded.")
+            return
+        try:
+            self.apply("equip_spells", player_index, [spell_obj.get_name() for spell_obj in chosen])
+        except ValueError as e:
+            print(e)
+            return
+        print(f"Spells equipped. {player_obj.get_stat('spell_slots')} spell slots left.")
+
+    def apply_equip_spells(self, player_index, spell_names):
+        """
+        Equips exactly these spells and unequips the others. The spell slots are counted again from the player's attunement. The set
+        is checked before anything changes
+
+        Parameters:
+        - player_index (int): Index into self.players
+        - spell_names (list): Names of spells in the player's inventory
+        """
+        player_obj = self.players[player_index]
+        inventory = player_obj.get_inventory()
+        wanted = [inventory.get(spell_name) for spell_name in spell_names]
+        for spell_name, spell_obj in zip(spell_names, wanted):
+            if not isinstance(spell_obj, spell):
+                raise ValueError(f"{player_obj.get_name()} has no spell named {spell_name}.")
+            missing = player_obj.check_requirements(*spell_obj.get_stats())
+            if missing is not None:
+                raise ValueError(f"{spell_name}: {missing}")
+        capacity = spell_capacity(player_obj)
+        if sum(spell_obj.get_spell_slot_cost() for spell_obj in wanted) > capacity:
+            raise ValueError(f"These spells need more than the {capacity} spell slots {player_obj.get_name()} has.")
+
+        for spell_obj in player_obj.equipped_items(spell):
+            if spell_obj not in wanted:
+                player_obj.unequip_spell(spell_obj)
+        # Slots freed or gained since the spells were equipped one by one are counted again here
+        player_obj.spell_slots = capacity - sum(spell_obj.get_spell_slot_cost() for spell_obj in player_obj.equipped_items(spell))
+        for spell_obj in wanted:
+            if not spell_obj.is_equipped():
+                player_obj.equip_spell(spell_obj)
+
     def increase_player_stats(self):
         """
         Allows a player to level up. If they have enough "Souls", they can spend them to level up, with each level increasing the cost
@@ -912,22 +2245,22 @@ class SessionDriver:
             stat_choice = int(input("Enter your choice: "))
 
             if stat_choice == 1:
-                player_obj.level_stat("vigor")
+                self.apply("level_stat", player_index, "vigor")
                 print("Vigor increased by 1.")
             elif stat_choice == 2:
-                player_obj.level_stat("attunement")
+                self.apply("level_stat", player_index, "attunement")
                 print("Attunement increased by 1.")
             elif stat_choice == 3:
-                player_obj.level_stat("strength")
+                self.apply("level_stat", player_index, "strength")
                 print("Strength increased by 1.")
             elif stat_choice == 4:
-                player_obj.level_stat("dex")
+                self.apply("level_stat", player_index, "dex")
                 print("Dexterity increased by 1.")
             elif stat_choice == 5:
-                player_obj.level_stat("intelligence")
+                self.apply("level_stat", player_index, "intelligence")
                 print("Intelligence increased by 1.")
             elif stat_choice == 6:
-                player_obj.level_stat("faith")
+                self.apply("level_stat", player_index, "faith")
                 print("Faith increased by 1.")
             else:
                 print("Invalid choice. No stats were increased.")
@@ -936,6 +2269,175 @@ class SessionDriver:
         except ValueError:
             print("Invalid input. Please enter valid numbers.")
 
+    def apply_level_stat(self, player_index, stat_name):
+        self.players[player_index].level_stat(stat_name)
+
+    def plan_level_ups(self):
+        """
+        Works out how many levels a player can afford and which stats to put them in to unlock the most items in their inventory
+        and the world, then applies the whole plan in one step
+        """
+        player_index = self.select_player()
+        if player_index is None:
+            return
+        if player_index < 0 or player_index >= len(self.players):
+            print("Invalid player number.")
+            return
+        player_obj = self.players[player_index]
+
+        levels, cost, next_cost = affordable_levels(player_obj.get_souls(), player_obj.get_soul_cost())
+        if not levels:
+            print(f"Not enough souls. {player_obj.get_name()} has {player_obj.get_souls()} souls, but needs {player_obj.get_soul_cost()}.")
+            return
+        print(f"{player_obj.get_name()} can afford {levels} levels for {cost} souls. The next level after that costs {next_cost}.")
+
+        allocation, unlocked = plan_stats(player_obj, levels, list(player_obj.get_inventory().values()) + list(self.items))
+        if unlocked:
+            print(f"Unlocks {len(unlocked)} items: {', '.join(item_obj.get_name() for item_obj in unlocked)}")
+        else:
+            print("No more items can be unlocked with these levels.")
+        for stat, points in allocation.items():
+            print(f"{stat}: +{points}")
+
+        spare = levels - sum(allocation.values())
+        if spare:
+            stat = input(f"Put the {spare} remaining levels in which stat ({', '.join(LEVEL_STATS)})? Press Enter to keep them: ").strip()
+            if stat in LEVEL_STATS:
+                allocation[stat] = allocation.get(stat, 0) + spare
+            elif stat:
+                print("Unknown stat, the remaining levels are kept.")
+        if not allocation:
+            return
+        if input("Apply this plan? (y/n): ").strip().lower() != "y":
+            print("Plan discarded.")
+            return
+        self.apply("level_up", player_index, allocation)
+        print(f"{player_obj.get_name()} is now level {player_obj.get_level()} with {player_obj.get_souls()} souls left.")
+
+    def apply_level_up(self, player_index, allocation):
+        """
+        Buys several levels at once, the same as calling level_stat once per level
+
+        Parameters:
+        - player_index (int): Index into self.players
+        - allocation (dict): {stat: levels}
+        """
+        player_obj = self.players[player_index]
+        for stat, points in allocation.items():
+            for _ in range(points):
+                player_obj.level_stat(stat)
+
+    def optimize_loadout(self):
+        """
+        Finds the armor, rings, and weapon from a player's inventory that give the most armor class or weapon damage, and equips
+        them all in one step
+        """
+        player_index = self.select_player()
+        if player_index is None:
+            return
+        if player_index < 0 or player_index >= len(self.players):
+            print("Invalid player number.")
+            return
+        player_obj = self.players[player_index]
+
+        print("Optimize for:")
+        print("1. Armor Class")
+        print("2. Weapon Damage")
+        objective = {"1": "armor_class", "2": "damage"}.get(input("Enter your choice: ").strip())
+        if objective is None:
+            print("Invalid choice.")
+            return
+
+        (armor_class, damage), loadout = optimize_loadout(player_obj, objective)
+        if objective == "damage":
+            armor_class, damage = damage, armor_class
+        current = {slot_name: getattr(player_obj, slot_name) for slot_name in ARMOR_SLOTS + ("WEAPON",)}
+        current["RINGS"] = player_obj.equipped_items(ring)
+
+        def names(value):
+            if isinstance(value, list):
+                return ", ".join(item_obj.get_name() for item_obj in value) or "-"
+            return value.get_name() if value is not None else "-"
+
+        print(f"{'Slot':<8} {'Current':<30} Proposed")
+        for slot_name in ARMOR_SLOTS + ("WEAPON", "RINGS"):
+            print(f"{slot_name:<8} {names(current[slot_name]):<30} {names(loadout[slot_name])}")
+        print(f"Armor class: {player_obj.armor_class} -> {armor_class}. Expected weapon damage: {damage:.2f}")
+
+        if all(current[slot_name] is loadout[slot_name] for slot_name in ARMOR_SLOTS + ("WEAPON",)) \
+                and set(map(id, current["RINGS"])) == set(map(id, loadout["RINGS"])):
+            print("The current loadout is already the best.")
+            return
+        if input("Equip this loadout? (y/n): ").strip().lower() != "y":
+            print("Loadout discarded.")
+            return
+        try:
+            self.apply("equip_loadout", player_index, loadout_names(loadout))
+        except ValueError as e:
+            print(e)
+            return
+        print(f"Loadout equipped. {player_obj.get_name()}'s armor class is now {player_obj.armor_class}.")
+
+    def apply_equip_loadout(self, player_index, loadout):
+        """
+        Swaps a player's whole loadout at once. The loadout is checked before anything changes, so a loadout that can't be equipped
+        leaves the player as they were
+
+        Parameters:
+        - player_index (int): Index into self.players
+        - loadout (dict): {slot name: item name or None} for the armor slots and WEAPON, and "RINGS": [ring names]. Slots left
+          out are emptied
+        """
+        player_obj = self.players[player_index]
+        inventory = player_obj.get_inventory()
+        ring_names = loadout.get("RINGS", [])
+        if len(ring_names) > MAX_RINGS or len(set(ring_names)) != len(ring_names):
+            raise ValueError(f"A loadout holds up to {MAX_RINGS} different rings.")
+
+        wanted = {}
+        for item_type, slot_name in enumerate(ARMOR_SLOTS + ("WEAPON",)):
+            item_name = loadout.get(slot_name)
+            if item_name is None:
+                wanted[slot_name] = None
+                continue
+            item_obj = inventory.get(item_name)
+            if slot_name == "WEAPON":
+                fits = isinstance(item_obj, weapon) and not isinstance(item_obj, spell)
+            else:
+                fits = isinstance(item_obj, armor) and item_obj.get_item_type() == item_type
+            if not fits:
+                raise ValueError(f"{player_obj.get_name()} has no {slot_name.lower()} item named {item_name}.")
+            wanted[slot_name] = item_obj
+        rings = [inventory.get(ring_name) for ring_name in ring_names]
+        if not all(isinstance(ring_obj, ring) for ring_obj in rings):
+            raise ValueError(f"{player_obj.get_name()} does not have all of the rings {', '.join(ring_names)}.")
+
+        stats = loadout_stats(player_obj, rings)
+        for slot_name, item_obj in wanted.items():
+            if item_obj is not None and any(need > have for need, have in zip(item_obj.get_stats()[:4], stats)):
+                raise ValueError(f"{player_obj.get_name()} does not meet the requirements of {item_obj.get_name()} with these rings.")
+
+        # Take off what is not kept first, then put the new rings on so their bonuses count for the other items
+        for ring_obj in player_obj.equipped_items(ring):
+            if ring_obj not in rings:
+                player_obj.unequip_ring(ring_obj)
+        for slot_name, item_obj in wanted.items():
+            equipped = getattr(player_obj, slot_name)
+            if equipped is not None and equipped is not item_obj:
+                if slot_name == "WEAPON":
+                    player_obj.unequip_weapon(equipped)
+                else:
+                    player_obj.unequip_armor(equipped)
+        for ring_obj in rings:
+            if not ring_obj.is_equipped():
+                player_obj.equip_ring(ring_obj)
+        for slot_name, item_obj in wanted.items():
+            if item_obj is not None and getattr(player_obj, slot_name) is not item_obj:
+                if slot_name == "WEAPON":
+                    player_obj.equip_weapon(item_obj)
+                else:
+                    player_obj.equip_armor(item_obj)
+
     def unequip_spell(self):
         """
         Unequips a spell from the spell slot
@@ -946,7 +2448,7 @@ class SessionDriver:
 
         player_obj = self.players[player_index]
 
-        equipped_spells = [item for item in player_obj.get_inventory().values() if isinstance(item, spell) and item.equipped]
+        equipped_spells = player_obj.equipped_items(spell)
         if not equipped_spells:
             print("No spells equipped.")
             return
@@ -958,11 +2460,15 @@ class SessionDriver:
             spell_index = int(input("Select spell to unequip: ")) - 1
             selected_spell = equipped_spells[spell_index]
 
-            result = player_obj.unequipSpell(selected_spell)
+            result = self.apply("unequip_spell", player_index, selected_spell.get_name())
             print(result)
         except (ValueError, IndexError):
             print("Invalid selection.")
 
+    def apply_unequip_spell(self, player_index, spell_name):
+        player_obj = self.players[player_index]
+        return player_obj.unequip_spell(player_obj.get_inventory()[spell_name])
+
     def select_player(self):
         """
         Provides logic for other methods to select a player they wish to perform an action on
@@ -1014,9 +2520,14 @@ class SessionDriver:
             return
 
         item_name = list(player_obj.get_inventory().keys())[item_index]
-        del player_obj.get_inventory()[item_name]
+        self.apply("delete_item", player_index, item_name)
         print(f"{item_name} has been deleted from {player_obj.get_name()}'s inventory.")
 
+    def apply_delete_item(self, player_index, item_name):
+        item_obj = self.players[player_index].drop_item(item_name)
+        for index in self.item_indexes():
+            index.remove(item_obj)
+
     def consume_mana(self):
         """
         When a player casts a spell, use this to drain their mana bar.
@@ -1042,11 +2553,14 @@ class SessionDriver:
             if mana_to_consume > player_obj.get_mana():
                 print(f"Not enough mana. {player_obj.get_name()} has only {player_obj.get_mana()} mana.")
             else:
-                player_obj.use_mana(mana_to_consume)
+                self.apply("consume_mana", player_index, mana_to_consume)
                 print(f"{mana_to_consume} mana consumed. Remaining mana: {player_obj.get_mana()}/{player_obj.get_MANA()}")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+    def apply_consume_mana(self, player_index, amount):
+        self.players[player_index].use_mana(amount)
+
     def consume_souls(self):
         """
         Souls Items are items that store souls without them being lost when they die. They can consume this item to gain the souls to be able to 
@@ -1068,7 +2582,7 @@ class SessionDriver:
         player_obj = self.players[player_index]
 
         # Select a soul item to consume
-        soul_items = [item for item in player_obj.get_inventory().values() if isinstance(item, souls)]
+        soul_items = player_obj.items_of_class(souls)
         if not soul_items:
             print(f"{player_obj.get_name()} has no soul items in their inventory.")
             return
@@ -1083,12 +2597,18 @@ class SessionDriver:
                 return
 
             soul_item = soul_items[soul_index]
-            player_obj.add_souls(soul_item.get_value())
-            del player_obj.get_inventory()[soul_item.get_name()]
+            self.apply("consume_souls", player_index, soul_item.get_name())
             print(f"{soul_item.get_name()} consumed. {player_obj.get_name()} now has {player_obj.get_souls()} souls.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+    def apply_consume_souls(self, player_index, item_name):
+        player_obj = self.players[player_index]
+        soul_item = player_obj.drop_item(item_name)
+        for index in self.item_indexes():
+            index.remove(soul_item)
+        player_obj.add_souls(soul_item.get_value())
+
     def remove_souls(self):
         """
         Logic for removing souls when a player dies.
@@ -1110,11 +2630,14 @@ class SessionDriver:
 
         try:
             souls_to_remove = int(input(f"Enter the amount of souls to remove from {player_obj.get_name()}: "))
-            player_obj.remove_souls(souls_to_remove)
+            self.apply("remove_souls", player_index, souls_to_remove)
             print(f"{souls_to_remove} souls removed. Remaining souls: {player_obj.get_souls()}.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+    def apply_remove_souls(self, player_index, amount):
+        self.players[player_index].remove_souls(amount)
+
     def view_players(self):
         """
         Provides information about a players stats
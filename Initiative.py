@@ -0,0 +1,234 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Initiative and turn order for combat. Players and mobs are kept in a priority heap by initiative, highest first, so adding a combatant,
+removing one that died, or moving one to a new initiative costs O(log n) however many are fighting.
+
+Each round the heap holds the combatants that have not acted yet. When it runs empty the next round starts with everyone in the fight.
+A combatant can delay (act later this round at a lower initiative, and keep that initiative) or ready (hold its action until the DM
+triggers it, then act straight away).
+
+The turn order is not saved with the session, a fight is tracked while the tracker is running.
+"""
+
+class IndexedHeap:
+    """
+    A binary min-heap that knows where every entry is, so any entry can be removed in O(log n), not just the smallest
+    """
+    __slots__ = ("keys", "entries", "positions")
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entry):
+        return entry in self.positions
+
+    def push(self, key, entry):
+        """
+        Adds an entry, or moves it if it is already in the heap
+        """
+        if entry in self.positions:
+            self.remove(entry)
+        self.keys.append(key)
+        self.entries.append(entry)
+        self.positions[entry] = len(self.entries) - 1
+        self.sift_up(len(self.entries) - 1)
+
+    def peek(self):
+        return self.entries[0] if self.entries else None
+
+    def pop(self):
+        entry = self.entries[0]
+        self.remove(entry)
+        return entry
+
+    def remove(self, entry):
+        position = self.positions.pop(entry)
+        last = len(self.entries) - 1
+        if position != last:
+            self.keys[position] = self.keys[last]
+            self.entries[position] = self.entries[last]
+            self.positions[self.entries[position]] = position
+        self.keys.pop()
+        self.entries.pop()
+        if position < len(self.entries):
+            # The entry moved into the gap can be smaller than its new parent or larger than its new children
+            self.sift_down(self.sift_up(position))
+
+    def ordered(self):
+        """
+        Returns:
+        - entries (list): The entries from smallest to largest key, without changing the heap
+        """
+        return [entry for _, entry in sorted(zip(self.keys, self.entries), key=lambda pair: pair[0])]
+
+    def swap(self, first, second):
+        self.keys[first], self.keys[second] = self.keys[second], self.keys[first]
+        self.entries[first], self.entries[second] = self.entries[second], self.entries[first]
+        self.positions[self.entries[first]] = first
+        self.positions[self.entries[second]] = second
+
+    def sift_up(self, position):
+        while position > 0:
+            parent = (position - 1) // 2
+            if self.keys[position] >= self.keys[parent]:
+                break
+            self.swap(position, parent)
+            position = parent
+        return position
+
+    def sift_down(self, position):
+        size = len(self.entries)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self.keys[child] < self.keys[smallest]:
+                    smallest = child
+            if smallest == position:
+                return position
+            self.swap(position, smallest)
+            position = smallest
+
+class InitiativeTracker:
+    """
+    The turn order of a fight. Combatants are player and mob objects
+    """
+    def __init__(self):
+        self.initiatives = {}
+        self.order = {}
+        self.counter = 0
+        self.pending = IndexedHeap()
+        self.readied = set()
+        self.round = 0
+        self.current = None
+
+    def __len__(self):
+        return len(self.initiatives)
+
+    def __contains__(self, combatant):
+        return combatant in self.initiatives
+
+    def key(self, combatant):
+        # Higher initiative goes first, and on a tie whoever joined the fight first
+        return (-self.initiatives[combatant], self.order[combatant])
+
+    def add(self, combatant, initiative):
+        """
+        Adds a combatant to the fight. A combatant that joins in the middle of a round acts this round if its initiative has not come
+        up yet, and from the next round otherwise
+
+        Parameters:
+        - combatant (player or mob): The combatant
+        - initiative (int): Its initiative roll
+        """
+        self.remove(combatant)
+        self.counter += 1
+        self.initiatives[combatant] = initiative
+        self.order[combatant] = self.counter
+        if self.round and (self.current is None or self.key(combatant) > self.key(self.current)):
+            self.pending.push(self.key(combatant), combatant)
+
+    def remove(self, combatant):
+        """
+        Takes a combatant out of the fight, for example when it dies. Does nothing if it is not in the fight
+        """
+        if combatant not in self.initiatives:
+            return
+        if combatant in self.pending:
+            self.pending.remove(combatant)
+        self.readied.discard(combatant)
+        del self.initiatives[combatant]
+        del self.order[combatant]
+        if self.current is combatant:
+            self.current = None
+
+    def next_turn(self):
+        """
+        Moves to the next combatant's turn, starting a new round when everyone has acted
+
+        Returns:
+        - combatant (player or mob): Whose turn it is, or None if nobody is in the fight
+        """
+        if not self.initiatives:
+            self.current = None
+            return None
+        if not self.pending:
+            self.start_round()
+        self.current = self.pending.pop()
+        return self.current
+
+    def start_round(self):
+        self.round += 1
+        # Readied actions that were never triggered are lost at the end of the round
+        self.readied.clear()
+        for combatant in self.initiatives:
+            self.pending.push(self.key(combatant), combatant)
+
+    def delay(self, combatant, initiative):
+        """
+        Lets a combatant act later this round. The new initiative is kept for the following rounds
+
+        Parameters:
+        - combatant (player or mob): The combatant, usually the one whose turn it is
+        - initiative (int): The new initiative, lower than the current one
+        """
+        self.initiatives[combatant] = initiative
+        self.counter += 1
+        self.order[combatant] = self.counter
+        self.readied.discard(combatant)
+        self.pending.push(self.key(combatant), combatant)
+        if self.current is combatant:
+            self.current = None
+
+    def ready(self, combatant):
+        """
+        Holds a combatant's action for this round until trigger() is called
+        """
+        if combatant in self.pending:
+            self.pending.remove(combatant)
+        self.readied.add(combatant)
+        if self.current is combatant:
+            self.current = None
+
+    def trigger(self, combatant):
+        """
+        A readied combatant acts now, ahead of everyone else. Its initiative becomes the one it acted at
+
+        Returns:
+        - combatant (player or mob): The combatant, or None if it had no readied action
+        """
+        if combatant not in self.readied:
+            return None
+        self.readied.discard(combatant)
+        if self.current is not None and self.current in self.initiatives:
+            self.initiatives[combatant] = self.initiatives[self.current]
+        self.counter += 1
+        # A negative order puts it ahead of everyone with the same initiative
+        self.order[combatant] = -self.counter
+        self.pending.push(self.key(combatant), combatant)
+        return combatant
+
+    def upcoming(self):
+        """
+        Returns:
+        - combatants (list): Who still acts this round, in order
+        """
+        return self.pending.ordered()
+
+    def rounds(self):
+        """
+        Goes through the fight round by round
+
+        Yields:
+        - turns (list): The combatants of each round in the order they act. Stops when nobody is left in the fight
+        """
+        while self.initiatives:
+            turns = [self.next_turn()]
+            while self.pending:
+                turns.append(self.next_turn())
+            yield turns
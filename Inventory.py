@@ -0,0 +1,111 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Inventory indexes for players and mobs. The inventory itself stays a {name: item} dict, and the owner keeps a second index of its
+items by class and of the items it has equipped, so listing a player's flasks or equipped spells only touches those items.
+
+The index is not saved. It is built from the inventory the first time it is used, so it works the same however the session was loaded.
+The inventory has to be changed through obtain_item(), drop_item(), and set_equipped() to keep the index up to date.
+"""
+from Slotted import Slotted
+
+class InventoryIndex:
+    """
+    The items of an inventory by class, and the equipped ones
+
+    Parameters:
+    - inventory (dict): The {name: item} inventory to index
+    """
+    __slots__ = ("by_class", "equipped")
+
+    def __init__(self, inventory):
+        self.by_class = {}
+        self.equipped = {}
+        for item_obj in inventory.values():
+            self.add(item_obj)
+
+    def add(self, item_obj):
+        self.by_class.setdefault(type(item_obj), {})[item_obj.get_name()] = item_obj
+        if item_obj.is_equipped():
+            self.equipped[item_obj.get_name()] = item_obj
+
+    def discard(self, item_obj):
+        bucket = self.by_class.get(type(item_obj))
+        if bucket is not None and bucket.get(item_obj.get_name()) is item_obj:
+            del bucket[item_obj.get_name()]
+            if not bucket:
+                del self.by_class[type(item_obj)]
+        if self.equipped.get(item_obj.get_name()) is item_obj:
+            del self.equipped[item_obj.get_name()]
+
+    def of_class(self, item_class):
+        return [item_obj for klass, bucket in self.by_class.items() if issubclass(klass, item_class) for item_obj in bucket.values()]
+
+class InventoryOwner(Slotted):
+    """
+    Base class for players and mobs. Keeps the inventory index next to the {name: item} inventory dict
+    """
+    __slots__ = ("inventory_index",)
+    unsaved_slots = ("inventory_index",)
+
+    def get_inventory_index(self):
+        if not hasattr(self, "inventory_index"):
+            self.inventory_index = InventoryIndex(self.inventory)
+        return self.inventory_index
+
+    def obtain_item(self, item):
+        """
+        Adds an item to the inventory. An item with the same name is replaced
+        """
+        replaced = self.inventory.get(item.get_name())
+        if replaced is item:
+            return
+        if replaced is not None:
+            self.get_inventory_index().discard(replaced)
+        self.inventory[item.get_name()] = item
+        self.get_inventory_index().add(item)
+
+    def drop_item(self, item_name):
+        """
+        Takes an item out of the inventory, equipped or not
+
+        Parameters:
+        - item_name (str): The name of the item
+
+        Returns:
+        - item (item): The removed item
+        """
+        item = self.inventory.pop(item_name)
+        self.get_inventory_index().discard(item)
+        return item
+
+    def set_equipped(self, item, status):
+        """
+        Marks an inventory item as equipped (1) or unequipped (0)
+        """
+        item.equipped = status
+        index = self.get_inventory_index()
+        if status:
+            index.equipped[item.get_name()] = item
+        elif index.equipped.get(item.get_name()) is item:
+            del index.equipped[item.get_name()]
+
+    def items_of_class(self, item_class):
+        """
+        Parameters:
+        - item_class (type): An item class, for example estus. Subclasses are included
+
+        Returns:
+        - items (list): The inventory items of that class
+        """
+        return self.get_inventory_index().of_class(item_class)
+
+    def equipped_items(self, item_class=None):
+        """
+        Parameters:
+        - item_class (type): Only return items of this class or its subclasses
+
+        Returns:
+        - items (list): The equipped inventory items
+        """
+        return [item for item in self.get_inventory_index().equipped.values() if item_class is None or isinstance(item, item_class)]
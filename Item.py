@@ -1,14 +1,122 @@
 # Sergiu Cociuba 
 # 2024-12-24
-class item:
+import weakref
+from Slotted import Slotted
+
+# Every template in use, by (item class, fields). Templates no item refers to anymore are dropped
+_templates = weakref.WeakValueDictionary()
+
+def item_template(item_class, fields):
+    """
+    Returns the shared template for an item, creating it the first time those fields are seen
+
+    Parameters:
+    - item_class (type): The item class, for example weapon
+    - fields (dict): The value of every field in item_class.template_fields
+
+    Returns:
+    - template (ItemTemplate): The template every item with the same class and fields shares
+    """
+    values = tuple(fields[name] for name in item_class.template_fields)
+    template = _templates.get((item_class, values))
+    if template is None:
+        template = ItemTemplate(item_class, values)
+        _templates[(item_class, values)] = template
+    return template
+
+class ItemTemplate:
     """
-    This is the parent class for all items.
+    The fields of an item that never change (name, description, dice, requirements, armor class...). Items with the same fields share
+    one template, so a copy of an item only stores its own state (equipped, charges, amount). Templates are immutable and are pickled
+    once per save, however many items use them.
+
+    Parameters:
+    - item_class (type): The item class the template is for
+    - values (tuple): The field values, in the order of item_class.template_fields
+    """
+    __slots__ = ("item_class", "values", "__weakref__")
+
+    def __init__(self, item_class, values):
+        object.__setattr__(self, "item_class", item_class)
+        object.__setattr__(self, "values", values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Item templates cannot be changed.")
+
+    def __reduce__(self):
+        # Loading goes through the registry so loaded items share templates with the ones already in memory
+        return item_template, (self.item_class, self.fields())
+
+    def fields(self):
+        return dict(zip(self.item_class.template_fields, self.values))
+
+class TemplateField:
+    """
+    A field that is read from the item's template
+
+    Parameters:
+    - name (str): The field name
+    - index (int): Where the field is in the template values
+    """
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj.template.values[self.index]
+
+    def __set__(self, obj, value):
+        raise AttributeError(f"'{self.name}' is part of the item template and cannot be changed.")
+
+class item(Slotted):
+    """
+    This is the parent class for all items. Items use __slots__ to keep them small, see Slotted.py. The fields listed in
+    template_fields live in a shared ItemTemplate and the slots only hold the item's own state
 
     Parameters:
     - description (str): this is a description of the item
+    - fields: The other template fields of the subclass
     """
-    def __init__(self, description):
-        self.description = description
+    __slots__ = ("template",)
+    template_fields = ("description",)
+    description = TemplateField("description", 0)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for index, name in enumerate(cls.template_fields):
+            setattr(cls, name, TemplateField(name, index))
+
+    def __init__(self, description, **fields):
+        self.template = item_template(type(self), {"description": description, **fields})
+
+    def __setstate__(self, state):
+        state = self.state_dict(state)
+        if "template" not in state:
+            # Saved before items had templates, when every field was stored on the item
+            state["template"] = item_template(type(self), {name: state.pop(name, None) for name in self.template_fields})
+        super().__setstate__(state)
+
+    def get_details(self):
+        """
+        Returns:
+        - details (dict): The template fields and the state of the item
+        """
+        details = self.template.fields()
+        details.update((name, value) for name, value in self.__getstate__().items() if name != "template")
+        return details
+
+    def spawn(self):
+        """
+        Makes another unequipped copy of the item, for example the same weapon for every mob. The copy shares the template and only
+        copies the item's own state
+        """
+        new_item = type(self).__new__(type(self))
+        new_item.__setstate__(self.__getstate__())
+        if hasattr(new_item, "equipped"):
+            new_item.equipped = 0
+        return new_item
 
     def get_item_type(self):
         """
@@ -35,15 +143,12 @@ class weapon(item):
     - intelligence (int): Intelligence requirement to use this weapon
     - faith (int): Faith requirement to use this weapon
     """
-    def __init__(self, description, name, n, dice, strength, dex, intelligence, faith):
-        self.name = name
-        super().__init__(description)
-        self.n = n
-        self.dice = dice
-        self.strength = strength
-        self.dex = dex
-        self.intelligence = intelligence
-        self.faith = faith
+    __slots__ = ("equipped",)
+    template_fields = item.template_fields + ("name", "n", "dice", "strength", "dex", "intelligence", "faith")
+
+    def __init__(self, description, name, n, dice, strength, dex, intelligence, faith, **fields):
+        super().__init__(description, name=name, n=n, dice=dice, strength=strength, dex=dex, intelligence=intelligence, faith=faith,
+                         **fields)
         self.equipped = 0
 
     def get_name(self):
@@ -55,6 +160,11 @@ class weapon(item):
         Returns the requirements of the weapon
         """
         return self.strength, self.dex, self.intelligence, self.faith
+    def get_dice(self):
+        """
+        Returns the damage dice of the weapon as (n, dice)
+        """
+        return self.n, self.dice
 
 class spell(weapon):
     """
@@ -72,12 +182,12 @@ class spell(weapon):
     - mana_cost (int): How much mana the spell costs to cast
     - spell_slots_required (int): How many spell slots you need to equip the spell
     """
-    
+    __slots__ = ()
+    template_fields = weapon.template_fields + ("mana_cost", "spell_slots_required")
+
     def __init__(self, description, name, n, dice, strength, dex, intelligence, faith, mana_cost, spell_slots_required):
-        self.name = name
-        super().__init__(description, name, n, dice, strength, dex, intelligence, faith)
-        self.mana_cost = mana_cost
-        self.spell_slots_required = spell_slots_required
+        super().__init__(description, name, n, dice, strength, dex, intelligence, faith, mana_cost=mana_cost,
+                         spell_slots_required=spell_slots_required)
 
     def get_mana_cos(self):
         return self.mana_cost
@@ -98,15 +208,12 @@ class ring(item):
     - intelligence (int): Intelligence bonus added to player stats
     - faith (int): Faith bonus added to player stats
     """
+    __slots__ = ("equipped",)
+    template_fields = item.template_fields + ("name", "vigor", "attunement", "strength", "dex", "intelligence", "faith")
+
     def __init__(self, description, name, vigor, attunement, strength, dex, intelligence, faith):
-        self.name = name
-        super().__init__(description)
-        self.vigor = vigor
-        self.attunement = attunement
-        self.strength = strength
-        self.dex = dex
-        self.intelligence = intelligence
-        self.faith = faith
+        super().__init__(description, name=name, vigor=vigor, attunement=attunement, strength=strength, dex=dex,
+                         intelligence=intelligence, faith=faith)
         self.equipped = 0
 
     def get_name(self):
@@ -134,16 +241,14 @@ class armor(item):
     - armor_class (int): How much AC this armor adds to the player
     - item_type (int): A number from 0-4 to indicate which armor slot the item can be used in ( 0: Helmet, 1: Arms, 2: Chest, 3: Legs, 4: Boots)
     """
+    __slots__ = ("equipped",)
+    # item_type is 0: Helmet, 1: Arms, 2: Chest, 3: Legs, 4: Boots
+    template_fields = item.template_fields + ("name", "strength", "dex", "intelligence", "faith", "armor_class", "item_type")
+
     def __init__(self, description, name, strength, dex, intelligence, faith, armor_class, item_type):
-        self.name = name
-        super().__init__(description)
-        self.strength = strength
-        self.dex = dex
-        self.intelligence = intelligence
-        self.faith = faith
+        super().__init__(description, name=name, strength=strength, dex=dex, intelligence=intelligence, faith=faith,
+                         armor_class=armor_class, item_type=item_type)
         self.equipped = 0
-        self.armor_class = armor_class
-        self.item_type = item_type  # 0: Helmet, 1: Arms, 2: Chest, 3: Legs, 4: Boots
 
     def get_name(self):
         return self.name
@@ -168,14 +273,14 @@ class estus(item):
     - modifier (int): Going to be used for upgrading the flask
     - flask_type (int): To signify if the flask heals mana or health.
     """
+    __slots__ = ("charges", "max_charges")
+    template_fields = item.template_fields + ("name", "hp", "mana", "flask_type")
+
     def __init__(self, name, description, hp, mana, charges, max_charges, modifier, flask_type):
-        self.name = name
-        super().__init__(description)
-        self.hp = hp * (1.00 + (0.10 * modifier))
-        self.mana = mana * (1.00 + (0.10 * modifier))
+        super().__init__(description, name=name, hp=hp * (1.00 + (0.10 * modifier)), mana=mana * (1.00 + (0.10 * modifier)),
+                         flask_type=flask_type)
         self.charges = charges
         self.max_charges = max_charges
-        self.flask_type = flask_type
 
     def drink(self):
         """
@@ -221,10 +326,11 @@ class souls(item):
     - value (int): How many souls to be given when consumed
     - name (str): Name of the item
     """
+    __slots__ = ()
+    template_fields = item.template_fields + ("name", "value")
+
     def __init__(self, description, value, name):
-        self.name = name
-        super().__init__(description)
-        self.value = value
+        super().__init__(description, name=name, value=value)
         
     def get_value(self):
         return self.value
@@ -240,10 +346,13 @@ class consumable(item):
     - amount (int): How many of the item a player has
     - name (str): Name of the item
     """
+    __slots__ = ("amount",)
+    template_fields = item.template_fields + ("name",)
+
     def __init__(self, description, amount, name):
-        self.name = name
-        super().__init__(description)
+        super().__init__(description, name=name)
         self.amount = amount
+
     def consume(self):
         self.amount = self.amount - 1
     def get_amount(self):
@@ -0,0 +1,146 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Append-only journal for a session. Every change the DM makes (damaging a player, picking up an item, leveling a stat, ...) is
+recorded as a small (operation, arguments) record. Saving only appends the new records to "<filename>.journal" instead of pickling
+the whole session again. Every so often the journal is compacted, meaning the full session is written as a base snapshot and the
+journal is started over.
+"""
+import os
+import io
+import uuid
+import pickle
+import contextlib
+
+class SessionJournal:
+    """
+    Keeps the records that have not been written yet and knows which snapshot file the journal on disk belongs to
+
+    Parameters:
+    - compact_every (int): How many records the journal file can hold before the next save compacts it into a new snapshot
+    """
+    def __init__(self, compact_every=200):
+        self.compact_every = compact_every
+        self.base_id = None
+        self.path = None
+        self.pending = []
+        self.records_on_disk = 0
+
+    def __getstate__(self):
+        # Only the snapshot identity is saved. Pending records are already part of the pickled session
+        return {"compact_every": self.compact_every, "base_id": self.base_id}
+
+    def __setstate__(self, state):
+        self.__init__(state.get("compact_every", 200))
+        self.base_id = state.get("base_id")
+
+    @staticmethod
+    def journal_path(filename):
+        return filename + ".journal"
+
+    def record(self, op, args):
+        """
+        Remembers a mutation so the next save can append it. The record is pickled right away, so objects passed in (a newly created
+        player or item) are stored as they were at this point and not as they look after later changes
+
+        Parameters:
+        - op (str): Name of the operation, matches a SessionDriver.apply_<op> method
+        - args (tuple): Arguments the operation was applied with
+
+        Returns:
+        - data (bytes): The pickled record
+        """
+        data = pickle.dumps((op, args))
+        self.pending.append(data)
+        return data
+
+    def needs_compaction(self, filename):
+        """
+        A full snapshot is needed when saving to a new file, when the snapshot/journal pair is missing, or when the journal is too long
+        """
+        if filename != self.path or self.base_id is None:
+            return True
+        if not os.path.exists(filename) or not os.path.exists(self.journal_path(filename)):
+            return True
+        return self.records_on_disk + len(self.pending) > self.compact_every
+
+    def save(self, driver, filename):
+        """
+        Saves the session. Appends the pending records to the journal, or compacts if a new snapshot is needed
+
+        Parameters:
+        - driver (SessionDriver): The session to save
+        - filename (str): Filename of the base snapshot
+
+        Returns:
+        - compacted (bool): True if a full snapshot was written
+        """
+        if self.needs_compaction(filename):
+            self.compact(driver, filename)
+            return True
+        if self.pending:
+            with open(self.journal_path(filename), 'ab') as f:
+                f.write(b"".join(self.pending))
+                f.flush()
+                os.fsync(f.fileno())
+            self.records_on_disk += len(self.pending)
+            self.pending = []
+        return False
+
+    def compact(self, driver, filename):
+        """
+        Folds the journal into a new base snapshot and starts an empty journal for it
+
+        Parameters:
+        - driver (SessionDriver): The session to save
+        - filename (str): Filename of the base snapshot
+        """
+        self.base_id = uuid.uuid4().hex
+        driver.write_snapshot(filename)
+        # The new journal header carries the new base id, so an older journal can never be replayed on top of this snapshot
+        with open(self.journal_path(filename), 'wb') as f:
+            pickle.dump({"base_id": self.base_id}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        self.path = filename
+        self.pending = []
+        self.records_on_disk = 0
+
+    def replay(self, driver, filename):
+        """
+        Applies the journal tail of a snapshot to a freshly loaded session
+
+        Parameters:
+        - driver (SessionDriver): The session loaded from the base snapshot
+        - filename (str): Filename of the base snapshot
+
+        Returns:
+        - count (int): How many records were replayed
+        """
+        self.path = filename
+        count = 0
+        try:
+            f = open(self.journal_path(filename), 'rb')
+        except FileNotFoundError:
+            return count
+        with f, contextlib.redirect_stdout(io.StringIO()):
+            try:
+                header = pickle.load(f)
+            except Exception:
+                header = None
+            if not isinstance(header, dict) or header.get("base_id") != self.base_id:
+                # Journal belongs to another snapshot. Force a compaction on the next save
+                self.path = None
+                return count
+            end = os.fstat(f.fileno()).st_size
+            while f.tell() < end:
+                try:
+                    op, args = pickle.load(f)
+                except Exception:
+                    # A torn record from a crash mid-append. Everything before it is kept, and the next save rewrites the snapshot
+                    self.path = None
+                    break
+                getattr(driver, "apply_" + op)(*args)
+                count += 1
+        self.records_on_disk = count
+        return count
@@ -0,0 +1,147 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Level-up planning. Every level costs the player's soul_cost, and each level raises soul_cost by 10% (rounded down). The planner works
+out how many levels a player can afford with their souls, and which stats to put the levels in to unlock the most items.
+
+Without the rounding, n levels would cost soul_cost * (1.1 ** n - 1) / 0.1, so the number of affordable levels has a closed form.
+Rounding down makes the real costs a little lower, so the closed form gives a lower bound, and the same formula with the smallest cost
+rounding can lead to gives an upper bound. The exact answer is found between the two in a cached table of running costs, which every
+player with the same soul_cost shares.
+
+The stat search only looks at the requirements still missing for each item. Items with the same missing requirements are grouped, and
+the best way to spend the remaining levels on the remaining stats is memoized, so the same question is never worked out twice.
+"""
+import math
+from bisect import bisect_right
+from functools import lru_cache
+
+from Item import weapon, armor
+
+# How much soul_cost grows per level
+SOUL_COST_GROWTH = 1.1
+
+# Stats that can be leveled, in the order of the level up menu
+LEVEL_STATS = ("vigor", "attunement", "strength", "dex", "intelligence", "faith")
+
+# Stats items can require, in the order of get_stats()
+REQUIREMENT_STATS = ("strength", "dex", "intelligence", "faith")
+
+class SoulCostTable:
+    """
+    The running cost of leveling from one soul_cost, filled in as far as it has been asked for
+
+    Parameters:
+    - soul_cost (int): The cost of the first level
+    """
+    __slots__ = ("costs", "totals")
+
+    def __init__(self, soul_cost):
+        # costs[n] is soul_cost after n levels, totals[n] the souls n levels cost
+        self.costs = [soul_cost]
+        self.totals = [0]
+
+    def extend_to(self, levels):
+        while len(self.totals) <= levels:
+            self.totals.append(self.totals[-1] + self.costs[-1])
+            self.costs.append(int(self.costs[-1] * SOUL_COST_GROWTH))
+
+@lru_cache(maxsize=128)
+def soul_cost_table(soul_cost):
+    return SoulCostTable(soul_cost)
+
+def geometric_levels(souls, soul_cost):
+    # Levels affordable if each level cost exactly 10% more than the last, from the sum of the geometric series
+    return int(math.log(1 + (SOUL_COST_GROWTH - 1) * souls / soul_cost) / math.log(SOUL_COST_GROWTH))
+
+def affordable_levels(souls, soul_cost):
+    """
+    How many levels a player can buy
+
+    Parameters:
+    - souls (int): The player's souls
+    - soul_cost (int): The cost of their next level
+
+    Returns:
+    - levels (int): How many levels they can afford
+    - cost (int): The souls those levels cost
+    - next_cost (int): soul_cost after those levels
+    """
+    if soul_cost <= 0:
+        raise ValueError("The soul cost must be positive.")
+    if soul_cost < 10:
+        # Rounding down keeps a cost below 10 from ever growing
+        levels = souls // soul_cost
+        return levels, levels * soul_cost, soul_cost
+
+    # Rounding 1.1 * cost down loses at most 0.9, so cost n is at least (soul_cost - 9) * 1.1 ** n + 9. That bounds the levels from
+    # above the same way the unrounded cost bounds them from below. One level of slack on each side covers float error in the logs
+    low = max(0, geometric_levels(souls, soul_cost) - 1)
+    high = geometric_levels(souls, soul_cost - 9) + 1
+    table = soul_cost_table(soul_cost)
+    table.extend_to(high + 1)
+    levels = bisect_right(table.totals, souls, low, high + 2) - 1
+    return levels, table.totals[levels], table.costs[levels]
+
+def requirements(item_obj):
+    """
+    Returns:
+    - requirements (tuple): (strength, dex, intelligence, faith) the item needs, or None if it has no requirements
+    """
+    if isinstance(item_obj, (weapon, armor)):
+        return tuple(item_obj.get_stats()[:4])
+    return None
+
+def plan_stats(player_obj, levels, candidates):
+    """
+    Finds how to spend levels on strength, dex, intelligence, and faith to unlock the most items, using the fewest levels for it
+
+    Parameters:
+    - player_obj (player): The player
+    - levels (int): How many levels can be spent
+    - candidates (iterable): Items to consider, for example the player's inventory and the world items. Copies of the same item
+      count once
+
+    Returns:
+    - allocation (dict): {stat: levels} for the stats that get levels
+    - unlocked (list): The items the allocation unlocks
+    """
+    current = [player_obj.effective(stat) for stat in REQUIREMENT_STATS]
+    groups = {}
+    seen = set()
+    for item_obj in candidates:
+        needed = requirements(item_obj)
+        if needed is None or id(item_obj.template) in seen:
+            continue
+        seen.add(id(item_obj.template))
+        missing = tuple(max(0, need - have) for need, have in zip(needed, current))
+        if any(missing) and sum(missing) <= levels:
+            groups.setdefault(missing, []).append(item_obj)
+    keys = tuple(groups)
+
+    @lru_cache(maxsize=None)
+    def best(stat_index, budget, remaining):
+        """
+        The best way to spend budget on the stats from stat_index on, for the groups in remaining
+
+        Returns:
+        - result (tuple): (items unlocked, -levels used, points per stat from stat_index on)
+        """
+        if stat_index == len(REQUIREMENT_STATS):
+            return (sum(len(groups[keys[group]]) for group in remaining), 0, ())
+        options = {0} | {keys[group][stat_index] for group in remaining if keys[group][stat_index] <= budget}
+        result = None
+        for points in sorted(options):
+            # Groups that need more of this stat than points are given up on
+            kept = tuple(group for group in remaining if keys[group][stat_index] <= points)
+            unlocked, used, rest = best(stat_index + 1, budget - points, kept)
+            option = (unlocked, used - points, (points,) + rest)
+            if result is None or option[:2] > result[:2]:
+                result = option
+        return result
+
+    _, _, points = best(0, levels, tuple(range(len(keys))))
+    allocation = {stat: amount for stat, amount in zip(REQUIREMENT_STATS, points) if amount}
+    unlocked = [item_obj for missing, items in groups.items()
+                if all(need <= points[idx] for idx, need in enumerate(missing)) for item_obj in items]
+    return allocation, unlocked
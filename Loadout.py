@@ -0,0 +1,263 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+The loadout optimizer. It picks the best set of equipment from a player's inventory: one piece of armor for each of the 5 armor
+slots, up to 4 rings, and one weapon, scored by total armor class or by the weapon's expected damage. Every piece has to meet its
+stat requirements, and ring bonuses count toward them, the same as when the items are equipped one by one.
+
+The search is a branch and bound over the slots. Each slot tries its items from best to worst, and the loadout's requirements are
+the highest requirement of each stat among the items picked so far. A branch is dropped when:
+- its items plus the best item of every slot left could not beat the best loadout found so far, or
+- no set of up to 4 rings raises the player's stats to its requirements. Adding items only raises them, so nothing below it can fit
+
+Whether rings can cover some requirements is a small search of its own, cached by the stats still missing. It drops a ring set when,
+for some group of stats, the points still missing in the group are more than the best free rings could add to the group together.
+
+Items and rings that can never be needed are left out before searching: an item another item of its slot beats with no higher
+requirements, and a ring that at least MAX_RINGS other rings match or beat on every stat.
+"""
+from itertools import combinations
+
+from Item import armor, ring, weapon, spell
+from Dice import damage_distribution
+
+# Armor slot names by armor item_type
+ARMOR_SLOTS = ("HELMET", "ARM", "CHEST", "LEG", "BOOT")
+
+# Stats items can require, in the order of get_stats()
+REQUIREMENT_STATS = ("strength", "dex", "intelligence", "faith")
+
+# Ring bonuses for the requirement stats, in the order of ring.get_stats()
+RING_REQUIREMENT_INDEXES = (2, 3, 4, 5)
+
+MAX_RINGS = 4
+
+# What the optimizer can maximize. The other value breaks ties
+OBJECTIVES = ("armor_class", "damage")
+
+# Every group of requirement stats, by index, that the ring search checks
+STAT_GROUPS = tuple(group for size in range(1, len(REQUIREMENT_STATS) + 1)
+                    for group in combinations(range(len(REQUIREMENT_STATS)), size))
+
+def expected_damage(weapon_obj):
+    return damage_distribution(*weapon_obj.get_dice()).expected
+
+def base_stats(player_obj):
+    """
+    The player's requirement stats without any rings, so the optimizer can add the rings it picks
+
+    Returns:
+    - stats (tuple): (strength, dex, intelligence, faith)
+    """
+    stack = player_obj.get_modifier_stack()
+    rings = player_obj.equipped_items(ring)
+    return tuple(getattr(player_obj, stat) + stack.totals[stat] - sum(ring_bonus(ring_obj)[idx] for ring_obj in rings)
+                 for idx, stat in enumerate(REQUIREMENT_STATS))
+
+def ring_bonus(ring_obj):
+    """
+    Returns:
+    - bonus (tuple): What the ring adds to (strength, dex, intelligence, faith)
+    """
+    stats = ring_obj.get_stats()
+    return tuple(stats[idx] for idx in RING_REQUIREMENT_INDEXES)
+
+def loadout_stats(player_obj, rings):
+    """
+    Returns:
+    - stats (tuple): The player's (strength, dex, intelligence, faith) with exactly these rings on
+    """
+    return tuple(have + sum(ring_bonus(ring_obj)[idx] for ring_obj in rings) for idx, have in enumerate(base_stats(player_obj)))
+
+def covers(better, worse):
+    # Whether better is at least worse in every position
+    return all(a >= b for a, b in zip(better, worse))
+
+def add(first, second):
+    return (first[0] + second[0], first[1] + second[1])
+
+class LoadoutSearch:
+    """
+    Finds the best loadout for a player
+
+    Parameters:
+    - player_obj (player): The player. Only items in their inventory are used
+    - objective (str): "armor_class" or "damage"
+    """
+    def __init__(self, player_obj, objective="armor_class"):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {objective}. Choose one of: {', '.join(OBJECTIVES)}")
+        self.objective = objective
+        self.base = base_stats(player_obj)
+        inventory = list(player_obj.get_inventory().values())
+        equipped = set(map(id, player_obj.equipped_items()))
+
+        # Each slot's items from best to worst as (score, requirements, item). The current items come first among equals
+        slots = {slot_name: [item_obj for item_obj in inventory
+                             if isinstance(item_obj, armor) and item_obj.get_item_type() == item_type]
+                 for item_type, slot_name in enumerate(ARMOR_SLOTS)}
+        slots["WEAPON"] = [item_obj for item_obj in inventory if isinstance(item_obj, weapon) and not isinstance(item_obj, spell)]
+        self.slots = {}
+        for slot_name, items in slots.items():
+            scored = sorted(((self.item_score(item_obj), tuple(item_obj.get_stats()[:4]), item_obj) for item_obj in items),
+                            key=lambda entry: (entry[0], id(entry[2]) in equipped), reverse=True)
+            self.slots[slot_name] = [entry for idx, entry in enumerate(scored)
+                                     if not any(other[0] >= entry[0] and covers(entry[1], other[1]) for other in scored[:idx])]
+
+        # The slots whose best item is worth the most go first, so good loadouts are found early. rest[k] is the most the slots
+        # from order[k] on could add
+        self.order = sorted(self.slots, key=lambda slot_name: self.slots[slot_name][0][0] if self.slots[slot_name] else (0, 0),
+                            reverse=True)
+        self.rest = [(0, 0)] * (len(self.order) + 1)
+        for k in range(len(self.order) - 1, -1, -1):
+            candidates = self.slots[self.order[k]]
+            self.rest[k] = add(self.rest[k + 1], candidates[0][0] if candidates else (0, 0))
+
+        # Rings that raise no requirement stat can't help. The current rings come first so ties keep them on
+        self.equipped_rings = player_obj.equipped_items(ring)
+        rings = sorted((ring_obj for ring_obj in inventory
+                        if isinstance(ring_obj, ring) and any(bonus > 0 for bonus in ring_bonus(ring_obj))),
+                       key=lambda ring_obj: (id(ring_obj) not in equipped, -sum(max(0, bonus) for bonus in ring_bonus(ring_obj))))
+        self.rings = self.undominated(rings)
+        self.bonuses = [ring_bonus(ring_obj) for ring_obj in self.rings]
+        # The most the other rings of a loadout could lower each stat
+        self.penalties = tuple(-sum(sorted(min(0, bonus[idx]) for bonus in self.bonuses)[:MAX_RINGS - 1])
+                               for idx in range(len(REQUIREMENT_STATS)))
+
+        # tops[start][free][group] is the most free rings from start on can add to the stats of STAT_GROUPS[group] together
+        self.tops = [None] * (len(self.rings) + 1)
+        largest = [[] for _ in STAT_GROUPS]
+        self.tops[len(self.rings)] = self.running_sums(largest)
+        for start in range(len(self.rings) - 1, -1, -1):
+            for group_index, group in enumerate(STAT_GROUPS):
+                added = sum(max(0, self.bonuses[start][idx]) for idx in group)
+                if added > 0:
+                    largest[group_index] = sorted(largest[group_index] + [added], reverse=True)[:MAX_RINGS]
+            self.tops[start] = self.running_sums(largest)
+        self.cache = {}
+
+    def item_score(self, item_obj):
+        # (objective value, tie-break value) the item adds to a loadout
+        value = item_obj.armor_class if isinstance(item_obj, armor) else expected_damage(item_obj)
+        if isinstance(item_obj, armor) == (self.objective == "armor_class"):
+            return (value, 0)
+        return (0, value)
+
+    def undominated(self, rings):
+        """
+        Drops the rings that at least MAX_RINGS other rings match or beat on every requirement stat. A loadout with such a ring can
+        always swap it for one of those rings without getting worse. Of identical rings, the first ones in the list are kept
+        """
+        bonuses = [ring_bonus(ring_obj) for ring_obj in rings]
+        kept = []
+        for idx, bonus in enumerate(bonuses):
+            dominating = 0
+            for other_idx, other in enumerate(bonuses):
+                if other_idx != idx and covers(other, bonus) and (other != bonus or other_idx < idx):
+                    dominating += 1
+                    if dominating == MAX_RINGS:
+                        break
+            if dominating < MAX_RINGS:
+                kept.append(rings[idx])
+        return kept
+
+    @staticmethod
+    def running_sums(largest):
+        return [tuple(sum(added[:free]) for added in largest) for free in range(MAX_RINGS + 1)]
+
+    def ring_cover(self, requirements):
+        """
+        Finds rings that raise the player's stats to some requirements
+
+        Parameters:
+        - requirements (tuple): (strength, dex, intelligence, faith) needed
+
+        Returns:
+        - rings (list): Up to MAX_RINGS rings that meet them, or None if no rings can
+        """
+        # Points the player has to spare count too, a ring can lower a stat
+        missing = tuple(need - have for need, have in zip(requirements, self.base))
+        if missing not in self.cache:
+            self.cache[missing] = self.find_rings(0, [], missing)
+        return self.cache[missing]
+
+    def find_rings(self, start, chosen, missing):
+        if not any(points > 0 for points in missing):
+            return [self.rings[position] for position in chosen]
+        if len(chosen) == MAX_RINGS:
+            return None
+        tops = self.tops[start][MAX_RINGS - len(chosen)]
+        if any(sum(max(0, missing[idx]) for idx in group) > most for group, most in zip(STAT_GROUPS, tops)):
+            return None
+        for position in range(start, len(self.rings)):
+            bonus = self.bonuses[position]
+            # A ring that only adds to stats with more to spare than the other rings could take away only uses up a ring slot
+            if not any(added > 0 and points > -penalty for added, points, penalty in zip(bonus, missing, self.penalties)):
+                continue
+            chosen.append(position)
+            found = self.find_rings(position + 1, chosen, tuple(points - added for points, added in zip(missing, bonus)))
+            chosen.pop()
+            if found is not None:
+                return found
+        return None
+
+    def search(self):
+        """
+        Returns:
+        - score (tuple): (objective value, tie-break value) of the best loadout
+        - loadout (dict): {slot name: item or None} for the armor slots and WEAPON, and "RINGS": [rings]
+        """
+        best = {"score": None, "items": None, "requirements": None}
+        # An empty slot is every slot's last option
+        empty = ((0, 0), (0,) * len(REQUIREMENT_STATS), None)
+
+        def visit(k, requirements, score, items):
+            if k == len(self.order):
+                if best["score"] is None or score > best["score"]:
+                    best.update(score=score, items=list(items), requirements=requirements)
+                return
+            for item_score, needs, item_obj in self.slots[self.order[k]] + [empty]:
+                reached = add(score, item_score)
+                if best["score"] is not None and add(reached, self.rest[k + 1]) <= best["score"]:
+                    # The slot's items are sorted, so the ones after this can't do better either
+                    return
+                raised = tuple(map(max, requirements, needs))
+                if self.ring_cover(raised) is None:
+                    continue
+                items.append(item_obj)
+                visit(k + 1, raised, reached, items)
+                items.pop()
+
+        visit(0, empty[1], (0, 0), [])
+        picked = dict(zip(self.order, best["items"]))
+        loadout = {slot_name: picked[slot_name] for slot_name in ARMOR_SLOTS + ("WEAPON",)}
+        rings = list(self.ring_cover(best["requirements"]))
+        # Rings on the player that the loadout doesn't need stay on if they can't lower a stat the loadout relies on
+        for ring_obj in self.equipped_rings:
+            if len(rings) < MAX_RINGS and ring_obj not in rings and all(bonus >= 0 for bonus in ring_bonus(ring_obj)):
+                rings.append(ring_obj)
+        loadout["RINGS"] = rings
+        return best["score"], loadout
+
+def optimize_loadout(player_obj, objective="armor_class"):
+    """
+    Finds the best loadout from a player's inventory
+
+    Parameters:
+    - player_obj (player): The player
+    - objective (str): "armor_class" for the most armor class, "damage" for the highest expected weapon damage
+
+    Returns:
+    - score (tuple): (objective value, tie-break value)
+    - loadout (dict): {slot name: item or None} for the armor slots and WEAPON, and "RINGS": [rings]
+    """
+    return LoadoutSearch(player_obj, objective).search()
+
+def loadout_names(loadout):
+    """
+    The loadout by item name, the way it is passed to SessionDriver.apply("equip_loadout", ...)
+    """
+    names = {slot_name: (item_obj.get_name() if item_obj is not None else None) for slot_name, item_obj in loadout.items()
+             if slot_name != "RINGS"}
+    names["RINGS"] = [ring_obj.get_name() for ring_obj in loadout["RINGS"]]
+    return names
@@ -1,43 +1,79 @@
 # Sergiu Cociuba
 # 2024-12-24
+from Inventory import InventoryOwner
 
-class mob:
+class mob(InventoryOwner):
     """
-    Mob class that can hold abilities in its inventory and take damage
+    Mob class that can hold abilities in its inventory and take damage. A mob in a MobPool (see MobPool.py) keeps its hp, max hp,
+    and armor class in the pool
 
     Parameters:
     - hp (int): How much hp the boss has
     - armor_class (int): The armor class of the boss
     - name (str): name of the boss
     """
+    __slots__ = ("hp", "armor_class", "inventory", "name", "max_hp", "effects", "pool", "slot")
+    unsaved_slots = InventoryOwner.unsaved_slots + ("pool", "slot")
+
     def __init__(self, hp, armor_class, name):
         self.hp = hp
+        self.max_hp = hp
         self.armor_class = armor_class
         self.inventory = {}
         self.name = name
+        self.effects = {}
+
+    def __getstate__(self):
+        self.sync()
+        return super().__getstate__()
+
+    def sync(self):
+        """
+        Copies the mob's values back from its pool entry, if it is in a pool
+        """
+        pool = getattr(self, "pool", None)
+        if pool is not None:
+            self.hp = pool.hp[self.slot]
+            self.max_hp = pool.max_hp[self.slot]
+            self.armor_class = pool.armor_class[self.slot]
     def add_ability(self, item):
-        self.inventory[item.get_name()] = item
+        self.obtain_item(item)
 
     def remove_ability(self,item):
-        del self.inventory[item.get_name()]
+        self.drop_item(item.get_name())
 
     def take_damage(self, damage):
-        self.hp = self.hp - damage
-        if self.hp <= 0:
+        pool = getattr(self, "pool", None)
+        if pool is not None:
+            pool.hp[self.slot] -= damage
+        else:
+            self.hp = self.hp - damage
+        if self.get_hp() <= 0:
             print("Boss has died")
 
     def heal_boss(self, hp):
-        self.hp = self.hp + hp
+        pool = getattr(self, "pool", None)
+        if pool is not None:
+            pool.hp[self.slot] += hp
+        else:
+            self.hp = self.hp + hp
         print("Boss has healed")
 
     def get_name(self):
         return self.name
 
     def get_hp(self):
-        return self.hp
+        pool = getattr(self, "pool", None)
+        return self.hp if pool is None else pool.hp[self.slot]
+
+    def get_max_hp(self):
+        # Mobs saved before max hp existed use the hp they were saved with
+        pool = getattr(self, "pool", None)
+        return getattr(self, "max_hp", self.hp) if pool is None else pool.max_hp[self.slot]
 
     def get_armor_class(self):
-        return self.armor_class
+        pool = getattr(self, "pool", None)
+        return self.armor_class if pool is None else pool.armor_class[self.slot]
     def get_inventory(self):
         return self.inventory
 
@@ -0,0 +1,102 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+A pool that stores the hp, max hp, and armor class of many mobs in flat arrays, one entry per mob, instead of one field on each mob
+object. Damage and healing for a whole group of mobs (area damage, cleave) is one pass over the arrays that returns the mobs that died,
+without printing anything per mob.
+
+Mobs added to the pool become views: get_hp(), take_damage(), and the other mob methods read and write the pool entry. The mob objects
+are still what is saved; the pool is rebuilt from them when it is needed.
+"""
+from array import array
+
+class MobPool:
+    """
+    Array storage for mob hp, max hp, and armor class. Values are whole numbers
+
+    Parameters:
+    - mobs (iterable): Mobs to add to the pool
+    """
+    def __init__(self, mobs=()):
+        self.hp = array("q")
+        self.max_hp = array("q")
+        self.armor_class = array("q")
+        self.views = []
+        for mob_obj in mobs:
+            self.add(mob_obj)
+
+    def __len__(self):
+        return len(self.views)
+
+    def add(self, mob_obj):
+        """
+        Moves a mob's hp, max hp, and armor class into the pool and makes the mob a view of its entry
+
+        Returns:
+        - slot (int): The entry the mob uses
+        """
+        if getattr(mob_obj, "pool", None) is not None:
+            mob_obj.pool.remove(mob_obj)
+        slot = len(self.views)
+        self.hp.append(mob_obj.hp)
+        self.max_hp.append(getattr(mob_obj, "max_hp", mob_obj.hp))
+        self.armor_class.append(mob_obj.armor_class)
+        self.views.append(mob_obj)
+        mob_obj.pool = self
+        mob_obj.slot = slot
+        return slot
+
+    def remove(self, mob_obj):
+        """
+        Takes a mob out of the pool. Its values are copied back onto the mob, and the last entry moves into the freed slot
+        """
+        mob_obj.sync()
+        slot = mob_obj.slot
+        last = len(self.views) - 1
+        if slot != last:
+            moved = self.views[last]
+            self.hp[slot] = self.hp[last]
+            self.max_hp[slot] = self.max_hp[last]
+            self.armor_class[slot] = self.armor_class[last]
+            self.views[slot] = moved
+            moved.slot = slot
+        self.hp.pop()
+        self.max_hp.pop()
+        self.armor_class.pop()
+        self.views.pop()
+        del mob_obj.pool, mob_obj.slot
+
+    def take_damage(self, slots, damage):
+        """
+        Damages a group of mobs in one pass
+
+        Parameters:
+        - slots (list): Pool entries of the mobs to damage
+        - damage (int or list): The damage for every mob, or one amount per mob in the same order as slots
+
+        Returns:
+        - died (list): The mobs that dropped to 0 hp or below because of this damage
+        """
+        hp = self.hp
+        amounts = damage if isinstance(damage, (list, tuple, array)) else [damage] * len(slots)
+        died = []
+        for slot, amount in zip(slots, amounts):
+            was_alive = hp[slot] > 0
+            hp[slot] -= amount
+            if was_alive and hp[slot] <= 0:
+                died.append(self.views[slot])
+        return died
+
+    def heal(self, slots, amount):
+        """
+        Heals a group of mobs in one pass, up to their max hp
+
+        Parameters:
+        - slots (list): Pool entries of the mobs to heal
+        - amount (int or list): The healing for every mob, or one amount per mob in the same order as slots
+        """
+        hp = self.hp
+        max_hp = self.max_hp
+        amounts = amount if isinstance(amount, (list, tuple, array)) else [amount] * len(slots)
+        for slot, value in zip(slots, amounts):
+            hp[slot] = min(max_hp[slot], hp[slot] + value)
@@ -0,0 +1,55 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+The modifier stack behind a player's effective stats. A player's own (base) stats are stored on the player, and everything that
+changes them (equipped rings, armor, the weapon, named modifiers such as buffs) is a source in the stack with a {stat: bonus} dict.
+The stack keeps the total bonus of every stat and caches the effective values. Changing a source only marks the stats it touches as
+dirty, so an effective stat is worked out again the first time it is read after a change and read from the cache after that.
+"""
+
+# Stats the stack can modify
+STATS = ("vigor", "attunement", "strength", "dex", "intelligence", "faith", "armor_class", "HP", "MANA")
+
+# Stats that are computed from another stat and have to be recomputed when it changes
+DERIVED = {"vigor": ("HP",), "attunement": ("MANA",)}
+
+class ModifierStack:
+    """
+    Bonuses from every source, the total per stat, and the cached effective stats
+    """
+    __slots__ = ("sources", "totals", "values", "dirty")
+
+    def __init__(self):
+        self.sources = {}
+        self.totals = dict.fromkeys(STATS, 0)
+        self.values = {}
+        self.dirty = set(STATS)
+
+    def add(self, source, bonuses):
+        """
+        Adds a source, replacing an earlier one with the same key
+
+        Parameters:
+        - source: The key of the source, for example the ring object or a modifier name
+        - bonuses (dict): {stat: bonus}
+        """
+        self.remove(source)
+        self.sources[source] = bonuses
+        for stat, amount in bonuses.items():
+            self.totals[stat] += amount
+            self.touch(stat)
+
+    def remove(self, source):
+        bonuses = self.sources.pop(source, None)
+        if bonuses is None:
+            return
+        for stat, amount in bonuses.items():
+            self.totals[stat] -= amount
+            self.touch(stat)
+
+    def touch(self, stat):
+        """
+        Marks a stat, and the stats computed from it, as changed
+        """
+        self.dirty.add(stat)
+        self.dirty.update(DERIVED.get(stat, ()))
@@ -1,7 +1,25 @@
 # Sergiu Cociuba
 # 2024-12-24
+from Inventory import InventoryOwner
+from Item import ring as ring_class
+from Modifiers import ModifierStack, STATS
+from StatCurves import DEFAULT_CURVES
+
+# The stats a ring adds to, in the order of ring.get_stats()
+RING_STATS = ("vigor", "attunement", "strength", "dex", "intelligence", "faith")
+ARMOR_SLOTS = ("HELMET", "ARM", "CHEST", "LEG", "BOOT")
+
+class player(InventoryOwner):
+    """
+    A player. vigor, attunement, strength, dex, intelligence, and faith are the player's own (base) stats. Equipped items and named
+    modifiers are added on top by a ModifierStack (see Modifiers.py); get_stat() and the HP, MANA, and armor_class properties give
+    the effective values
+    """
+    __slots__ = ("vigor", "attunement", "strength", "dex", "intelligence", "faith", "hp", "mana", "spell_slots", "inventory",
+                 "souls", "RING", "HELMET", "ARM", "LEG", "CHEST", "BOOT", "WEAPON", "name", "level", "soul_cost", "curves",
+                 "modifiers", "modifier_stack", "effects")
+    unsaved_slots = InventoryOwner.unsaved_slots + ("modifier_stack",)
 
-class player:
     def __init__(self, vigor, attunement, strength, dex, intelligence, faith, name, level):
         self.vigor = vigor
         self.attunement = attunement
@@ -12,10 +30,7 @@ class player:
         self.hp = None
         self.mana = None
         self.spell_slots = None
-        self.armor_class = 0
         self.inventory = {}
-        self.HP = None
-        self.MANA = None
         self.souls = 0
         self.RING = 0
         self.HELMET = None
@@ -27,67 +42,166 @@ class player:
         self.name = name
         self.level = level
         self.soul_cost = 500
-    def calculate_hp(self,vigor, base_hp = 0, growth_factor = 2, threshold = 40, diminishing_factor = 0.2):
+        self.curves = DEFAULT_CURVES
+        self.modifiers = {}
+        self.effects = {}
+
+    def __setstate__(self, state):
+        state = self.state_dict(state)
+        if "HP" in state:
+            # Saved before the modifier stack, when max HP, max mana, and armor class were stored and equipping a ring added its
+            # vigor and attunement to the player's own stats
+            for name in ("HP", "MANA", "armor_class"):
+                state.pop(name, None)
+            for item_obj in state["inventory"].values():
+                if isinstance(item_obj, ring_class) and item_obj.is_equipped():
+                    state["vigor"] = max(0, state["vigor"] - item_obj.vigor)
+                    state["attunement"] = max(0, state["attunement"] - item_obj.attunement)
+        super().__setstate__(state)
+
+    def get_modifier_stack(self):
         """
-        Calculate max HP based on the Vigor stat.
+        The modifier stack, built from the equipped items and named modifiers the first time it is needed
+        """
+        if not hasattr(self, "modifier_stack"):
+            stack = ModifierStack()
+            for source, bonuses in getattr(self, "modifiers", {}).items():
+                stack.add(source, bonuses)
+            for ring_obj in self.equipped_items(ring_class):
+                stack.add(ring_obj, dict(zip(RING_STATS, ring_obj.get_stats())))
+            for slot_name in ARMOR_SLOTS:
+                if getattr(self, slot_name) is not None:
+                    stack.add(getattr(self, slot_name), {"armor_class": getattr(self, slot_name).armor_class})
+            if self.WEAPON is not None:
+                # Weapons only have requirements, they do not add to any stat
+                stack.add(self.WEAPON, {})
+            self.modifier_stack = stack
+        return self.modifier_stack
+
+    def effective(self, stat_name):
+        """
+        The value of a stat with every modifier applied. Worked out again only if something it depends on changed
+
+        Parameters:
+        - stat_name (str): One of the stats in Modifiers.STATS
+
+        Returns:
+        - value (int): The effective value
+        """
+        stack = self.get_modifier_stack()
+        if stat_name in stack.dirty:
+            if stat_name == "HP":
+                value = self.calculate_hp(self.effective("vigor")) + stack.totals["HP"]
+            elif stat_name == "MANA":
+                value = self.calculate_mana(self.effective("attunement")) + stack.totals["MANA"]
+            else:
+                base = 0 if stat_name == "armor_class" else getattr(self, stat_name)
+                value = max(0, base + stack.totals[stat_name])
+            stack.values[stat_name] = value
+            stack.dirty.discard(stat_name)
+        return stack.values[stat_name]
+
+    @property
+    def HP(self):
+        return self.effective("HP")
+
+    @property
+    def MANA(self):
+        return self.effective("MANA")
+
+    @property
+    def armor_class(self):
+        return self.effective("armor_class")
+
+    def set_modifier(self, source, bonuses):
+        """
+        Adds a named modifier, such as a buff, or replaces the one with the same name. Named modifiers are saved with the player
+
+        Parameters:
+        - source (str): The modifier name
+        - bonuses (dict): {stat: bonus}, for example {"vigor": 2, "armor_class": 1}
+        """
+        self.modifiers = {**getattr(self, "modifiers", {}), source: bonuses}
+        self.get_modifier_stack().add(source, bonuses)
+        self.clamp_current()
+
+    def remove_modifier(self, source):
+        modifiers = dict(getattr(self, "modifiers", {}))
+        if modifiers.pop(source, None) is not None:
+            self.modifiers = modifiers
+            self.get_modifier_stack().remove(source)
+            self.clamp_current()
+
+    def store_max_stats(self, HP, MANA):
+        """
+        Stores max HP and mana that were already looked up on the stat curves (see StatCurves.apply_to) for the current vigor and
+        attunement
+        """
+        stack = self.get_modifier_stack()
+        stack.values["HP"] = HP + stack.totals["HP"]
+        stack.values["MANA"] = MANA + stack.totals["MANA"]
+        stack.dirty.difference_update(("HP", "MANA"))
+        self.clamp_current()
+
+    def clamp_current(self):
+        """
+        Lowers current HP and mana if the maximum dropped below them
+        """
+        if self.hp is not None and self.hp > self.HP:
+            self.hp = self.HP
+        if self.mana is not None and self.mana > self.MANA:
+            self.mana = self.MANA
+
+    def get_stat_curves(self):
+        """
+        The campaign's stat curves. Players saved before curves existed use the default curves
+        """
+        return getattr(self, "curves", DEFAULT_CURVES)
+    def calculate_hp(self, vigor):
+        """
+        Looks up max HP for a Vigor level on the campaign's HP curve, see StatCurves.py
 
         Parameters:
         - vigor (int): The Vigor level.
-        - base_hp (int): The base HP value. Default is 0.
-        - growth_factor (int): HP growth per Vigor point. Default is 2.
-        - threshold (int): The Vigor level where diminishing returns start. Default is 10.
-        - diminishing_factor (float): Reduces HP growth after threshold. Default is 0.2.
 
         Returns:
         - hp (float): The calculated HP.
         """
-        if vigor <= threshold:
-            return base_hp + (growth_factor * vigor)
-        else:
-            diminishing_pentalty = ((vigor - threshold) ** 2) * diminishing_factor
-            return base_hp + (growth_factor * vigor) - diminishing_pentalty
+        return self.get_stat_curves().hp.value(vigor)
     def set_hp(self):
-        self.hp = self.calculate_hp(self.vigor)
-        self.HP = self.calculate_hp(self.vigor)
+        self.hp = self.HP
     def set_HP(self, HP):
-        self.HP = HP
-    def calculate_mana(self, attunement, base_mana = 0, growth_factor = 25, threshold = 40, diminishing_factor = 0.2):
+        # A fixed max HP is a modifier that makes up the difference to the curve
+        self.remove_modifier("max HP")
+        self.set_modifier("max HP", {"HP": HP - self.HP})
+    def calculate_mana(self, attunement):
         """
-        Calculate mana based on the attunement stat.
+        Looks up max mana for an attunement level on the campaign's mana curve, see StatCurves.py
 
         Parameters:
         - attunement (int): The attunement level.
-        - base_mana (int): The base mana value. Default is 0.
-        - growth_factor (int): Mana growth per attunement point. Default is 25.
-        - threshold (int): The attunement level where diminishing returns start. Default is 40.
-        - diminishing_factor (float): Reduces mana growth after threshold. Default is 0.2.
 
         Returns:
         - mana (int): The calculated mana.
         """
-        if attunement <= threshold:
-            return base_mana + (growth_factor * attunement)
-        else:
-            diminishing_pentalty = ((attunement - threshold) ** 2) * diminishing_factor
-            return base_mana + (growth_factor * attunement) - diminishing_pentalty
-    def set_mana(self, mana):
-        self.mana = self.calculate_mana(self.attunement)
-        self.MANA = self.calculate_mana(self.attunement)
+        return self.get_stat_curves().mana.value(attunement)
+    def set_mana(self, mana=None):
+        # mana is ignored, max mana always comes from attunement. Kept so older callers still work
+        self.mana = self.MANA
 
-    def calculate_spell_slots(self, attunement, base_slots = 0):
+    def calculate_spell_slots(self, attunement):
         """
-        Calculate spell slots based on the attunement stat.
+        Looks up the spell slots for an attunement level, see StatCurves.py
 
         Parameters:
         - attunement (int): The attunement level.
-        - base_slots (int): The base spell slots. Default is 0.
 
         Returns:
         - slots (int): The calculated spell slots.
         """
-        return base_slots + (attunement // 5)
-    def set_spell_slots(self, spell_slots):
-        self.spell_slots = self.calculate_spell_slots(self.attunement)
+        return self.get_stat_curves().spell_slots(attunement)
+    def set_spell_slots(self, spell_slots=None):
+        self.spell_slots = self.calculate_spell_slots(self.effective("attunement"))
     
     def take_damage(self, damage):
         self.hp = self.hp - damage
@@ -108,54 +222,34 @@ class player:
         print("You have sucessfully drank a flask")
     
        
-    def obtain_item(self, item):
-        self.inventory[item.get_name()] = item
     def remove_item(self,item):
-        if item.is_equipped == 1:
+        if item.is_equipped() == 1:
             print("unequip this item first")
         else:
-            del self.inventory[item.get_name()]
+            self.drop_item(item.get_name())
 
     def unequip_ring(self, ring):
         if self.RING == 0:
             print("There are no rings equipped.")
             return
 
-        if ring.is_equipped == 0:
+        if not ring.is_equipped():
             print("The specified ring is not equipped.")
             return
 
-        vigor, attunement, strength, dex, intelligence, faith = ring.get_stats()
-
-        self.vigor = max(0, self.vigor - vigor)
-        self.HP = self.calculate_hp(self.vigor)
-        if self.hp > self.HP:  
-            self.hp = self.HP
-
-        self.attunement = max(0, self.attunement - attunement)
-        self.MANA = self.calculate_mana(self.attunement)
-        if self.mana > self.MANA:  
-            self.mana = self.MANA
-
-        self.strength = max(0, self.strength - strength)
-        self.dex = max(0, self.dex - dex)
-        self.intelligence = max(0, self.intelligence - intelligence)
-        self.faith = max(0, self.faith - faith)
+        self.get_modifier_stack().remove(ring)
+        self.clamp_current()
         self.RING = self.RING - 1
-        ring.set_equip_status(0)
+        self.set_equipped(ring, 0)
         print(f"Ring '{ring.get_name()}' unequipped.")
 
     def equip_ring(self, ring):
         if self.RING == 4:
             print("You must unequip a ring before equipping a new ring")
         else:
-            vigor, attunement, strength, dex, intelligence, faith = ring.get_stats()  
-            self.vigor = max(0, self.vigor + vigor)
-            self.HP = self.calculate_hp(self.vigor)    
-            self.attunement = max(0, self.attunement + attunement)
-            self.MANA = self.calculate_mana(self.attunement)   
+            self.get_modifier_stack().add(ring, dict(zip(RING_STATS, ring.get_stats())))
             self.RING = self.RING + 1
-            ring.set_equip_status(1)
+            self.set_equipped(ring, 1)
             print(f"Ring '{ring.get_name()}' equipped.")
     def unequip_armor(self, armor):
         # Extract armor stats and type
@@ -178,26 +272,38 @@ class player:
                 return f"{slot_name.capitalize()} slot is already empty."
 
             # Unequip the armor
+            self.get_modifier_stack().remove(getattr(self, slot_name))  # Update armor class
+            self.set_equipped(getattr(self, slot_name), 0)
             setattr(self, slot_name, None)  # Set slot to unequipped
-            self.armor_class -= armor_class  # Update armor class
-            self.armor_class = max(0, self.armor_class)  # Ensure armor class doesn't go below zero
             return f"{slot_name.capitalize()} unequipped successfully."
         else:
             return "Invalid item type."
 
 
+    def check_requirements(self, strength, dexterity, intelligence, faith):
+        """
+        Checks the player's effective stats (ring bonuses included) against an item's requirements
+
+        Returns:
+        - message (str): Why the item cannot be equipped, or None if it can
+        """
+        if self.effective("strength") < strength:
+            return f"You do not have enough strength to equip this item. Your strength is {self.effective('strength')}, but this item requires {strength} strength."
+        if self.effective("dex") < dexterity:
+            return f"You do not have enough dexterity to equip this item. Your dexterity is {self.effective('dex')}, but this item requires {dexterity} dexterity."
+        if self.effective("intelligence") < intelligence:
+            return f"You do not have enough intelligence to equip this item. Your intelligence is {self.effective('intelligence')}, but this item requires {intelligence} intelligence."
+        if self.effective("faith") < faith:
+            return f"You do not have enough faith to equip this item. Your faith is {self.effective('faith')}, but this item requires {faith} faith."
+        return None
+
     def equip_armor(self, armor):
         strength, dexterity, intelligence, faith, armor_class, item_type = armor.get_stats()
 
         # Check stat requirements
-        if self.strength < strength:
-            return f"You do not have enough strength to equip this item. Your strength is {self.strength}, but this item requires {strength} strength."
-        if self.dex < dexterity:
-            return f"You do not have enough dexterity to equip this item. Your dexterity is {self.dex}, but this item requires {dexterity} dexterity."
-        if self.intelligence < intelligence:
-            return f"You do not have enough intelligence to equip this item. Your intelligence is {self.intelligence}, but this item requires {intelligence} intelligence."
-        if self.faith < faith:
-            return f"You do not have enough faith to equip this item. Your faith is {self.faith}, but this item requires {faith} faith."
+        missing = self.check_requirements(strength, dexterity, intelligence, faith)
+        if missing is not None:
+            return missing
 
         # Armor slot mapping
         armor_slots = {
@@ -220,26 +326,24 @@ class player:
 
         # Equip the armor
         setattr(self, slot_name, armor)  # Store the armor object in the slot
-        self.armor_class += armor_class  # Update the armor class
+        self.set_equipped(armor, 1)
+        self.get_modifier_stack().add(armor, {"armor_class": armor_class})  # Update the armor class
 
         return f"{slot_name.capitalize()} equipped successfully."
 
     def equip_weapon(self, weapon):
         strength, dexterity, intelligence, faith = weapon.get_stats()
 
-        if self.strength < strength:
-            return f"You do not have enough strength to equip this item. Your strength is {self.strength}, but this item requires {strength} strength."
-        if self.dex < dexterity:
-            return f"You do not have enough dexterity to equip this item. Your dexterity is {self.dex}, but this item requires {dexterity} dexterity."
-        if self.intelligence < intelligence:
-            return f"You do not have enough intelligence to equip this item. Your intelligence is {self.intelligence}, but this item requires {intelligence} intelligence."
-        if self.faith < faith:
-            return f"You do not have enough faith to equip this item. Your faith is {self.faith}, but this item requires {faith} faith."
+        missing = self.check_requirements(strength, dexterity, intelligence, faith)
+        if missing is not None:
+            return missing
 
         if getattr(self, "WEAPON") is not None:  
             return f"WEAPON slot already equipped. Unequip it first."
 
         setattr(self, "WEAPON", weapon)  
+        self.set_equipped(weapon, 1)
+        self.get_modifier_stack().add(weapon, {})
 
         return f"WEAPON equipped successfully."
     def unequip_weapon(self, weapon):
@@ -247,6 +351,8 @@ class player:
         if getattr(self, "WEAPON") is None:
             return f"WEAPON slot is already empty."
         elif getattr(self, "WEAPON") is not None:
+            self.get_modifier_stack().remove(getattr(self, "WEAPON"))
+            self.set_equipped(getattr(self, "WEAPON"), 0)
             setattr(self, "WEAPON", None) 
             return f"WEAPON unequipped successfully."
         else:
@@ -261,8 +367,8 @@ class player:
             return "Not enough spell slots."
 
         self.spell_slots -= spell.spell_slots_required
-        self.inventory[spell.name] = spell
-        spell.equipped = 1
+        self.obtain_item(spell)
+        self.set_equipped(spell, 1)
         return f"Spell '{spell.name}' equipped."
 
     def unequip_spell(self, spell):
@@ -270,7 +376,7 @@ class player:
             return "This spell is not equipped."
 
         self.spell_slots += spell.spell_slots_required
-        spell.equipped = 0
+        self.set_equipped(spell, 0)
         return f"Spell '{spell.name}' unequipped."
 
     def use_mana(self, amount):
@@ -305,6 +411,8 @@ class player:
         current_value = getattr(self, stat_name, None)
         if current_value is not None:
             setattr(self, stat_name, current_value + 1)
+            if stat_name in STATS:
+                self.get_modifier_stack().touch(stat_name)
             if stat_name == "vigor":
                 self.set_hp()  
             elif stat_name == "attunement":
@@ -316,6 +424,8 @@ class player:
             print(f"Attribute '{stat_name}' not found.")
 
     def get_stat(self, stat_name):
+        if stat_name in STATS:
+            return self.effective(stat_name)
         return getattr(self, stat_name, None)
     def get_inventory(self):
         return self.inventory
@@ -0,0 +1,168 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+The world item registry. Every item lying in the world gets an ID that never changes while it is there, and the registry keeps
+indexes by ID, by name, by class, and by armor slot, so looking up or removing an item costs the same with ten items or 100k.
+
+IDs are never reused, so a journal record or a menu choice that names an ID always refers to the same item.
+
+The name, class, and slot indexes are built the first time one of them is needed. A registry opened from a random-access snapshot
+only unpickles its items when they are looked up by ID or when those indexes are first built.
+"""
+
+class ItemRegistry:
+    """
+    The items in the world, indexed by ID, name, class, and armor slot. Iterating the registry gives the items in the order they
+    were added
+
+    Parameters:
+    - items (iterable): Items to add, for example the world item list of an older save
+    """
+    def __init__(self, items=()):
+        self.next_id = 1
+        self.rebuild({})
+        for item_obj in items:
+            self.add(item_obj)
+
+    def __getstate__(self):
+        # The indexes are rebuilt on load, only the items and their IDs are saved
+        return {"next_id": self.next_id, "entries": self.entries}
+
+    def __setstate__(self, state):
+        self.next_id = state["next_id"]
+        self.rebuild(state["entries"])
+
+    def rebuild(self, entries):
+        self.entries = entries
+        # None until the first lookup by name, class, or slot
+        self.by_name = None
+        self.by_class = None
+        self.by_slot = None
+
+    def build_indexes(self):
+        if self.by_name is not None:
+            return
+        self.by_name = {}
+        self.by_class = {}
+        self.by_slot = {}
+        for item_id, item_obj in self.entries.items():
+            self.index(item_id, item_obj)
+
+    def index(self, item_id, item_obj):
+        self.by_name.setdefault(item_obj.get_name(), {})[item_id] = item_obj
+        self.by_class.setdefault(type(item_obj), {})[item_id] = item_obj
+        if item_obj.get_item_type() is not None:
+            self.by_slot.setdefault(item_obj.get_item_type(), {})[item_id] = item_obj
+
+    def add(self, item_obj):
+        """
+        Puts an item in the world
+
+        Parameters:
+        - item_obj (item): The item to add
+
+        Returns:
+        - item_id (int): The ID the item is stored under
+        """
+        item_id = self.next_id
+        self.next_id += 1
+        self.entries[item_id] = item_obj
+        if self.by_name is not None:
+            self.index(item_id, item_obj)
+        return item_id
+
+    def remove(self, item_id):
+        """
+        Takes an item out of the world
+
+        Parameters:
+        - item_id (int): The ID of the item
+
+        Returns:
+        - item_obj (item): The removed item
+        """
+        item_obj = self.entries.pop(item_id)
+        if self.by_name is None:
+            return item_obj
+        for index, key in ((self.by_name, item_obj.get_name()), (self.by_class, type(item_obj)),
+                           (self.by_slot, item_obj.get_item_type())):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del index[key]
+        return item_obj
+
+    def __getitem__(self, item_id):
+        return self.entries[item_id]
+
+    def __contains__(self, item_id):
+        return item_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def items(self):
+        """
+        Returns:
+        - items (list): (item ID, item) pairs in the order the items were added
+        """
+        return list(self.entries.items())
+
+    def id_at(self, position):
+        """
+        The ID of the item at a position in the order items were added. Only used to replay journals from before items had IDs,
+        which referred to world items by their list position
+        """
+        for idx, item_id in enumerate(self.entries):
+            if idx == position:
+                return item_id
+        raise IndexError("item position out of range")
+
+    def find(self, name, item_class=None):
+        """
+        Looks up items by name
+
+        Parameters:
+        - name (str): The exact item name
+        - item_class (type): Only return items of this class or its subclasses
+
+        Returns:
+        - items (list): (item ID, item) pairs
+        """
+        self.build_indexes()
+        return [(item_id, item_obj) for item_id, item_obj in self.by_name.get(name, {}).items()
+                if item_class is None or isinstance(item_obj, item_class)]
+
+    def has_class(self, item_class):
+        """
+        Returns:
+        - found (bool): True if the world holds an item of item_class or one of its subclasses
+        """
+        self.build_indexes()
+        # Empty buckets are removed, so only the classes need to be checked
+        return any(issubclass(klass, item_class) for klass in self.by_class)
+
+    def of_class(self, item_class, item_type=None):
+        """
+        Looks up items by class, for example every weapon (spells included) or every piece of armor for one slot
+
+        Parameters:
+        - item_class (type): The item class. Subclasses are included
+        - item_type (int): Only return armor for this slot (0: Helmet, 1: Arms, 2: Chest, 3: Legs, 4: Boots)
+
+        Returns:
+        - items (list): (item ID, item) pairs in the order the items were added
+        """
+        self.build_indexes()
+        if item_type is not None:
+            return [(item_id, item_obj) for item_id, item_obj in self.by_slot.get(item_type, {}).items()
+                    if isinstance(item_obj, item_class)]
+        buckets = [bucket for klass, bucket in self.by_class.items() if issubclass(klass, item_class)]
+        if len(buckets) == 1:
+            return list(buckets[0].items())
+        # Each bucket is in ID order, so merging them by ID keeps the order the items were added
+        return sorted((pair for bucket in buckets for pair in bucket.items()), key=lambda pair: pair[0])
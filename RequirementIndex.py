@@ -0,0 +1,189 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+An index of weapons, spells, and armor by their requirements (strength, dex, intelligence, faith), across the world and every
+inventory. It answers "what can this player equip" and "what would one more point of a stat unlock" without going through every item.
+
+Items with the same requirements share a bucket, and the distinct requirement vectors are kept in a k-d tree. A query is a box of
+requirement values: subtrees outside the box are skipped, subtrees inside it are reported whole, and only the ones on its edge are
+looked at more closely. On a catalog of n items a query looks at roughly n ** 0.75 vectors plus the items it returns.
+
+Items are added and removed as they move. A new requirement vector waits in a short list until there are enough of them to be worth
+rebuilding the tree for. The index is not saved, it is rebuilt from the session the first time it is needed.
+"""
+import math
+
+from Leveling import REQUIREMENT_STATS, requirements
+
+# Vectors per k-d tree leaf
+LEAF_SIZE = 16
+
+# New vectors kept out of the tree before it is rebuilt, on top of the square root of the vectors in it
+PENDING_LIMIT = 64
+
+class RequirementTree:
+    """
+    A static k-d tree over requirement vectors. Each node covers a contiguous run of self.points
+
+    Parameters:
+    - points (list): The vectors, all of the same length
+    """
+    __slots__ = ("points", "nodes")
+
+    def __init__(self, points):
+        self.points = list(points)
+        # (lowest corner, highest corner, start, end, left child, right child). Leaves have no children
+        self.nodes = []
+        if self.points:
+            self.build(0, len(self.points))
+
+    def build(self, start, end):
+        chunk = self.points[start:end]
+        low = tuple(map(min, *chunk)) if len(chunk) > 1 else chunk[0]
+        high = tuple(map(max, *chunk)) if len(chunk) > 1 else chunk[0]
+        node = len(self.nodes)
+        self.nodes.append(None)
+        if end - start <= LEAF_SIZE:
+            self.nodes[node] = (low, high, start, end, None, None)
+            return node
+        # Split on the widest dimension, at the median
+        dim = max(range(len(low)), key=lambda idx: high[idx] - low[idx])
+        chunk.sort(key=lambda point: point[dim])
+        self.points[start:end] = chunk
+        middle = (start + end) // 2
+        left = self.build(start, middle)
+        right = self.build(middle, end)
+        self.nodes[node] = (low, high, start, end, left, right)
+        return node
+
+    def within(self, low, high):
+        """
+        Parameters:
+        - low (tuple): The lowest value of each dimension
+        - high (tuple): The highest value of each dimension
+
+        Yields:
+        - point (tuple): Every vector inside the box
+        """
+        if not self.nodes:
+            return
+        stack = [0]
+        while stack:
+            node_low, node_high, start, end, left, right = self.nodes[stack.pop()]
+            if any(a > d or b < c for a, b, c, d in zip(node_low, node_high, low, high)):
+                continue
+            if all(c <= a and b <= d for a, b, c, d in zip(node_low, node_high, low, high)):
+                yield from self.points[start:end]
+            elif left is None:
+                for point in self.points[start:end]:
+                    if all(c <= value <= d for value, c, d in zip(point, low, high)):
+                        yield point
+            else:
+                stack.append(right)
+                stack.append(left)
+
+class RequirementIndex:
+    """
+    Weapons, spells, and armor by requirements. Each item is stored with its place: a world item ID, or the player or mob whose
+    inventory it is in
+
+    Parameters:
+    - entries (iterable): (item, place) pairs to start with. The tree is built once for all of them
+    """
+    def __init__(self, entries=()):
+        # {requirements: {id(item): (item, place)}}
+        self.buckets = {}
+        # {id(item): requirements}
+        self.indexed = {}
+        for item_obj, place in entries:
+            needed = requirements(item_obj)
+            if needed is not None:
+                self.buckets.setdefault(needed, {})[id(item_obj)] = (item_obj, place)
+                self.indexed[id(item_obj)] = needed
+        self.rebuild()
+
+    def __len__(self):
+        return len(self.indexed)
+
+    def add(self, item_obj, place):
+        """
+        Adds an item, or moves it if it is already indexed. Items without requirements are ignored
+        """
+        needed = requirements(item_obj)
+        if needed is None:
+            return
+        self.remove(item_obj)
+        bucket = self.buckets.get(needed)
+        new_vector = bucket is None
+        if new_vector:
+            bucket = self.buckets[needed] = {}
+            self.pending.append(needed)
+        bucket[id(item_obj)] = (item_obj, place)
+        self.indexed[id(item_obj)] = needed
+        # The rebuild drops empty buckets, so it waits until the item is in its bucket
+        if new_vector and len(self.pending) > PENDING_LIMIT + math.isqrt(len(self.tree.points)):
+            self.rebuild()
+
+    def remove(self, item_obj):
+        needed = self.indexed.pop(id(item_obj), None)
+        if needed is not None:
+            # Empty buckets stay until the next rebuild, so the tree does not change
+            del self.buckets[needed][id(item_obj)]
+
+    def add_owner(self, owner):
+        # Indexes every item in a player's or mob's inventory
+        for item_obj in owner.get_inventory().values():
+            self.add(item_obj, owner)
+
+    def remove_owner(self, owner):
+        for item_obj in owner.get_inventory().values():
+            self.remove(item_obj)
+
+    def rebuild(self):
+        self.buckets = {needed: bucket for needed, bucket in self.buckets.items() if bucket}
+        self.tree = RequirementTree(self.buckets)
+        self.pending = []
+
+    def within(self, low, high):
+        """
+        Parameters:
+        - low (tuple): The lowest requirement of each stat, in the order of REQUIREMENT_STATS
+        - high (tuple): The highest requirement of each stat
+
+        Returns:
+        - entries (list): (item, place) of every item with requirements in the box
+        """
+        found = []
+        for needed in self.tree.within(low, high):
+            found.extend(self.buckets[needed].values())
+        for needed in self.pending:
+            if all(c <= value <= d for value, c, d in zip(needed, low, high)):
+                found.extend(self.buckets[needed].values())
+        return found
+
+    def equippable(self, stats):
+        """
+        Parameters:
+        - stats (tuple): A player's effective (strength, dex, intelligence, faith)
+
+        Returns:
+        - entries (list): (item, place) of every item the stats meet the requirements of
+        """
+        return self.within((-math.inf,) * len(REQUIREMENT_STATS), tuple(stats))
+
+    def unlocked_by(self, stats, stat_name, points=1):
+        """
+        Parameters:
+        - stats (tuple): A player's effective (strength, dex, intelligence, faith)
+        - stat_name (str): The stat that would be raised, one of REQUIREMENT_STATS
+        - points (int): By how much
+
+        Returns:
+        - entries (list): (item, place) of the items the player can't equip now but could with the extra points
+        """
+        stat_index = REQUIREMENT_STATS.index(stat_name)
+        low = [-math.inf] * len(REQUIREMENT_STATS)
+        high = list(stats)
+        low[stat_index] = stats[stat_index] + 1
+        high[stat_index] = stats[stat_index] + points
+        return self.within(tuple(low), tuple(high))
@@ -0,0 +1,375 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+SQLite storage for a session. Players, mobs, and items are rows in a local database file, so a change to one player or one item
+only rewrites that row. Item rows carry their name, class, armor slot, owner, and equipped flag as indexed columns, so questions such
+as "all unequipped armor for slot 2" are answered by the database indexes instead of scanning every list.
+
+The objects themselves are stored pickled in the data column. Items a player or mob refers to (equipped armor, the WEAPON slot) are
+stored as a reference to the item's row, so they load as the same object as the one in the inventory.
+"""
+import io
+import pickle
+import sqlite3
+from Item import item, estus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (id INTEGER PRIMARY KEY, seq INTEGER NOT NULL, name TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS mobs (id INTEGER PRIMARY KEY, seq INTEGER NOT NULL, name TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    owner_kind TEXT,
+    owner_id INTEGER,
+    name TEXT,
+    item_class TEXT NOT NULL,
+    item_type INTEGER,
+    equipped INTEGER NOT NULL DEFAULT 0,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_name ON players (name);
+CREATE INDEX IF NOT EXISTS mobs_name ON mobs (name);
+CREATE INDEX IF NOT EXISTS items_name ON items (name);
+CREATE INDEX IF NOT EXISTS items_class ON items (item_class, item_type, equipped);
+CREATE INDEX IF NOT EXISTS items_owner ON items (owner_kind, owner_id, seq);
+CREATE INDEX IF NOT EXISTS items_equipped ON items (equipped);
+"""
+
+# Owner kinds stored in items.owner_kind. World items have no owner
+OWNER_KINDS = {"players": "player", "mobs": "mob"}
+
+# Operations that change an item in a player's inventory. The item is looked up before the change, since it might be removed
+INVENTORY_OPS = ("use_item", "increment", "equip_item", "unequip_item", "drink_from_flask", "equip_spell", "unequip_spell",
+                 "delete_item", "consume_souls")
+
+class _RowPickler(pickle.Pickler):
+    """
+    Pickles a player or mob with its inventory left out and the items it refers to replaced by their row id
+    """
+    def __init__(self, buffer, store, inventory):
+        super().__init__(buffer)
+        self.store = store
+        self.inventory = inventory
+
+    def persistent_id(self, value):
+        if value is self.inventory:
+            return "inventory"
+        if isinstance(value, item) and id(value) in self.store.item_rows:
+            return self.store.item_rows[id(value)]
+        return None
+
+class SQLiteStore:
+    """
+    A session stored in an SQLite database
+
+    Parameters:
+    - filename (str): The database file. Created if it does not exist
+    """
+    def __init__(self, filename="session.db"):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(SCHEMA)
+        # id(obj) -> row id, and row id -> obj so the ids stay valid while the store is open
+        self.item_rows = {}
+        self.owner_rows = {"players": {}, "mobs": {}}
+        self.objects = {}
+        self.seq = self.connection.execute(
+            "SELECT MAX(seq) FROM (SELECT seq FROM players UNION ALL SELECT seq FROM mobs UNION ALL SELECT seq FROM items)"
+        ).fetchone()[0] or 0
+
+    def close(self):
+        self.connection.close()
+
+    def is_empty(self):
+        return not any(self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in ("players", "mobs", "items"))
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def pickle_owner(self, obj):
+        buffer = io.BytesIO()
+        _RowPickler(buffer, self, getattr(obj, "inventory", None)).dump(obj)
+        return buffer.getvalue()
+
+    def insert_item(self, item_obj, owner_kind=None, owner_id=None):
+        cursor = self.connection.execute(
+            "INSERT INTO items (seq, owner_kind, owner_id, name, item_class, item_type, equipped, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.next_seq(), owner_kind, owner_id, item_obj.get_name(), type(item_obj).__name__, item_obj.get_item_type(),
+             int(bool(item_obj.is_equipped())), pickle.dumps(item_obj)))
+        self.item_rows[id(item_obj)] = cursor.lastrowid
+        self.objects[("items", cursor.lastrowid)] = item_obj
+
+    def update_item(self, item_obj):
+        self.connection.execute(
+            "UPDATE items SET name = ?, item_type = ?, equipped = ?, data = ? WHERE id = ?",
+            (item_obj.get_name(), item_obj.get_item_type(), int(bool(item_obj.is_equipped())), pickle.dumps(item_obj),
+             self.item_rows[id(item_obj)]))
+
+    def move_item(self, item_obj, owner_kind, owner_id):
+        self.connection.execute("UPDATE items SET seq = ?, owner_kind = ?, owner_id = ? WHERE id = ?",
+                                (self.next_seq(), owner_kind, owner_id, self.item_rows[id(item_obj)]))
+
+    def delete_item(self, item_obj):
+        row = self.item_rows.pop(id(item_obj))
+        del self.objects[("items", row)]
+        self.connection.execute("DELETE FROM items WHERE id = ?", (row,))
+
+    def drop_replaced(self, replaced):
+        for item_obj in replaced:
+            if id(item_obj) in self.item_rows:
+                self.delete_item(item_obj)
+
+    def insert_owner(self, table, obj):
+        # The owner's data is written last, once its items have rows it can refer to
+        cursor = self.connection.execute(f"INSERT INTO {table} (seq, name, data) VALUES (?, ?, ?)", (self.next_seq(), obj.get_name(), b""))
+        row = cursor.lastrowid
+        self.owner_rows[table][id(obj)] = row
+        self.objects[(table, row)] = obj
+        for item_obj in obj.get_inventory().values():
+            self.insert_item(item_obj, OWNER_KINDS[table], row)
+        self.update_owner(table, obj)
+
+    def update_owner(self, table, obj):
+        self.connection.execute(f"UPDATE {table} SET name = ?, data = ? WHERE id = ?",
+                                (obj.get_name(), self.pickle_owner(obj), self.owner_rows[table][id(obj)]))
+
+    def delete_owner(self, table, obj):
+        row = self.owner_rows[table].pop(id(obj))
+        del self.objects[(table, row)]
+        for item_obj in obj.get_inventory().values():
+            if id(item_obj) in self.item_rows:
+                self.delete_item(item_obj)
+        self.connection.execute(f"DELETE FROM {table} WHERE id = ?", (row,))
+
+    def read_setting(self, name, default=None):
+        """
+        Reads a session setting, such as the status effect round counter
+
+        Returns:
+        - value: The stored value, or default if it was never written
+        """
+        row = self.connection.execute("SELECT data FROM settings WHERE name = ?", (name,)).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def write_setting(self, name, value):
+        self.connection.execute("INSERT OR REPLACE INTO settings (name, data) VALUES (?, ?)", (name, pickle.dumps(value)))
+
+    def clear(self):
+        # Deletes every row. Row ids and sequence numbers are not reused
+        for table in ("players", "mobs", "items", "settings"):
+            self.connection.execute(f"DELETE FROM {table}")
+        self.item_rows = {}
+        self.owner_rows = {"players": {}, "mobs": {}}
+        self.objects = {}
+
+    def write_session(self, driver):
+        """
+        Copies a whole session into the (empty) database
+
+        Parameters:
+        - driver (SessionDriver): The session to store
+        """
+        with self.connection:
+            for item_obj in driver.items:
+                self.insert_item(item_obj)
+            for table in ("players", "mobs"):
+                for obj in getattr(driver, table):
+                    self.insert_owner(table, obj)
+            self.write_setting("status_round", driver.status_round)
+            self.write_setting("dice", driver.dice)
+            self.write_setting("stat_curves", driver.stat_curves)
+
+    def read_session(self):
+        """
+        Loads every player, mob, and world item from the database
+
+        Returns:
+        - players (list): Player objects in the order they were created
+        - mobs (list): Mob objects in the order they were created
+        - items (list): World items in the order they were created
+        """
+        items = {}
+        inventories = {"player": {}, "mob": {}}
+        world = []
+        rows = self.connection.execute("SELECT id, owner_kind, owner_id, data FROM items ORDER BY seq")
+        for row, owner_kind, owner_id, data in rows:
+            item_obj = items[row] = pickle.loads(data)
+            self.item_rows[id(item_obj)] = row
+            self.objects[("items", row)] = item_obj
+            if owner_kind is None:
+                world.append(item_obj)
+            else:
+                inventories[owner_kind].setdefault(owner_id, {})[item_obj.get_name()] = item_obj
+
+        owners = {}
+        for table, owner_kind in OWNER_KINDS.items():
+            owners[table] = []
+            for row, data in self.connection.execute(f"SELECT id, data FROM {table} ORDER BY seq"):
+                inventory = inventories[owner_kind].get(row, {})
+                unpickler = pickle.Unpickler(io.BytesIO(data))
+                unpickler.persistent_load = lambda pid, inventory=inventory: inventory if pid == "inventory" else items[pid]
+                obj = unpickler.load()
+                self.owner_rows[table][id(obj)] = row
+                self.objects[(table, row)] = obj
+                owners[table].append(obj)
+        return owners["players"], owners["mobs"], world
+
+    def find_items(self, name=None, item_class=None, item_type=None, equipped=None, owner=None):
+        """
+        Looks up items through the database indexes. Every argument is optional and they are combined with AND
+
+        Parameters:
+        - name (str): Item name
+        - item_class (str): Class name, such as "armor", "ring", "weapon", or "spell"
+        - item_type (int): Armor slot (0: Helmet, 1: Arms, 2: Chest, 3: Legs, 4: Boots)
+        - equipped (bool): Only equipped or only unequipped items
+        - owner: A player or mob object to search its inventory, or "world" for items nobody has picked up
+
+        Returns:
+        - items (list): Matching item objects
+        """
+        clauses = []
+        params = []
+        for column, value in (("name", name), ("item_class", item_class), ("item_type", item_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if equipped is not None:
+            clauses.append("equipped = ?")
+            params.append(int(bool(equipped)))
+        if owner == "world":
+            clauses.append("owner_kind IS NULL")
+        elif owner is not None:
+            table = "players" if id(owner) in self.owner_rows["players"] else "mobs"
+            clauses.append("owner_kind = ? AND owner_id = ?")
+            params.extend((OWNER_KINDS[table], self.owner_rows[table][id(owner)]))
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self.connection.execute(f"SELECT id FROM items{where} ORDER BY seq", params)
+        return [self.objects[("items", row)] for (row,) in rows]
+
+    def before_apply(self, driver, op, args):
+        """
+        Collects the objects an operation is about to change, while they can still be looked up by index or name
+
+        Returns:
+        - touched (list): Items and the player or mob the operation changes
+        """
+        if op in INVENTORY_OPS:
+            player_obj = driver.players[args[0]]
+            return [player_obj.get_inventory()[args[1]]] + list(_slot_items(player_obj))
+        if op == "pick_up":
+            # Picking up an item with the same name as one already carried replaces it in the inventory
+            item_obj = driver.items[args[1]]
+            replaced = driver.players[args[0]].get_inventory().get(item_obj.get_name())
+            return [item_obj] if replaced is None else [item_obj, replaced]
+        if op == "arm_mob":
+            item_obj = driver.items[args[1]]
+            replaced = driver.mobs[args[0]].get_inventory().get(item_obj.get_name())
+            return [item_obj] if replaced is None else [item_obj, replaced]
+        if op == "damage_mob":
+            return [driver.mobs[args[0]]]
+        if op in ("damage_mobs", "heal_mobs"):
+            return [driver.mobs[idx] for idx in args[0]]
+        if op == "party":
+            return [(driver.players if args[0] == "player" else driver.mobs)[idx] for idx in args[2]]
+        if op == "equip_spells":
+            player_obj = driver.players[args[0]]
+            inventory = player_obj.get_inventory()
+            return player_obj.equipped_items() + [inventory[name] for name in args[1] if name in inventory]
+        if op == "equip_loadout":
+            # Everything taken off and everything put on
+            player_obj = driver.players[args[0]]
+            inventory = player_obj.get_inventory()
+            names = [name for slot_name, name in args[1].items() if slot_name != "RINGS" and name is not None] + args[1].get("RINGS", [])
+            return player_obj.equipped_items() + [inventory[name] for name in names if name in inventory]
+        return []
+
+    def after_apply(self, driver, op, args, result, touched):
+        """
+        Writes the rows an operation changed. Most operations only touch one player row and one item row
+
+        Parameters:
+        - driver (SessionDriver): The session after the change
+        - op (str): The operation that was applied
+        - args (tuple): Its arguments
+        - result: What the operation returned
+        - touched (list): What before_apply() collected
+        """
+        with self.connection:
+            if op == "create_player":
+                self.insert_owner("players", args[0])
+            elif op == "create_mob":
+                self.insert_owner("mobs", args[0])
+            elif op == "create_item":
+                self.insert_item(args[0])
+            elif op == "pick_up":
+                self.move_item(touched[0], "player", self.owner_rows["players"][id(driver.players[args[0]])])
+                self.drop_replaced(touched[1:])
+            elif op == "arm_mob":
+                self.move_item(touched[0], "mob", self.owner_rows["mobs"][id(driver.mobs[args[0]])])
+                self.drop_replaced(touched[1:])
+            elif op == "damage_mob":
+                if result:
+                    self.delete_owner("mobs", touched[0])
+                else:
+                    self.update_owner("mobs", touched[0])
+            elif op in ("damage_mobs", "heal_mobs"):
+                died = {id(mob_obj) for mob_obj in result or ()}
+                for mob_obj in touched:
+                    if id(mob_obj) in died:
+                        self.delete_owner("mobs", mob_obj)
+                    else:
+                        self.update_owner("mobs", mob_obj)
+            elif op == "party":
+                died = {id(mob_obj) for mob_obj in result or ()}
+                table = args[0] + "s"
+                for obj in touched:
+                    if id(obj) in died:
+                        self.delete_owner(table, obj)
+                        continue
+                    self.update_owner(table, obj)
+                    if args[1] == "restore_flasks":
+                        for item_obj in obj.items_of_class(estus):
+                            self.update_item(item_obj)
+            elif op in ("add_effect", "remove_effect"):
+                table = args[0] + "s"
+                self.update_owner(table, getattr(driver, table)[args[1]])
+            elif op == "advance_round":
+                for target in {id(target): target for target, _ in result}.values():
+                    table = "mobs" if id(target) in self.owner_rows["mobs"] else "players"
+                    if table == "mobs" and target.get_hp() <= 0:
+                        self.delete_owner(table, target)
+                    else:
+                        self.update_owner(table, target)
+                self.write_setting("status_round", driver.status_round)
+            elif op in ("set_dice_seed", "roll_dice"):
+                self.write_setting("dice", driver.dice)
+            elif op == "set_stat_curves":
+                self.write_setting("stat_curves", driver.stat_curves)
+                for player_obj in driver.players:
+                    self.update_owner("players", player_obj)
+            elif op == "rest_at_bonfire":
+                for player_obj in driver.players:
+                    self.update_owner("players", player_obj)
+                    for item_obj in player_obj.get_inventory().values():
+                        if isinstance(item_obj, estus):
+                            self.update_item(item_obj)
+            else:
+                player_obj = driver.players[args[0]]
+                inventory = player_obj.get_inventory()
+                for item_obj in touched + list(_slot_items(player_obj)):
+                    if id(item_obj) not in self.item_rows:
+                        continue
+                    if inventory.get(item_obj.get_name()) is item_obj:
+                        self.update_item(item_obj)
+                    else:
+                        self.delete_item(item_obj)
+                self.update_owner("players", player_obj)
+
+def _slot_items(owner):
+    """
+    Items an owner holds in an equipment slot
+    """
+    return (value for value in owner.__getstate__().values() if isinstance(value, item))
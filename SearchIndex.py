@@ -0,0 +1,153 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Full-text search over item names and descriptions, across the world and every inventory. Names and descriptions are split into
+lowercase words, and an inverted index maps each word to the items that contain it, so a search only touches the items that match.
+
+Every word of a search has to match, either exactly or as the start of a word ("fla" finds "Flask"). The words of the index are kept
+sorted, so the words starting with a prefix are found by bisection. Hits are ranked by how rare the matched words are, with matches in
+the name counting more than matches in the description and exact words more than prefixes.
+
+Items are added and removed as they move. The index is not saved, it is rebuilt from the session the first time it is needed.
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+# How much a word counts when it is in the item's name, compared to its description
+NAME_WEIGHT = 3.0
+
+# How much a word that only starts with a search word counts, compared to an exact match
+PREFIX_WEIGHT = 0.5
+
+WORD = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """
+    Returns:
+    - words (list): The lowercase words of the text, letters and digits only
+    """
+    return WORD.findall(str(text).lower())
+
+@lru_cache(maxsize=4096)
+def item_words(name, description):
+    # {word: weight} of an item. Items made from the same template share one result
+    words = {word: 1.0 for word in tokenize(description)}
+    words.update((word, NAME_WEIGHT) for word in tokenize(name))
+    return words
+
+class SearchIndex:
+    """
+    An inverted index of items by the words of their name and description. Each item is stored with its place: a world item ID, or the
+    player or mob whose inventory it is in
+
+    Parameters:
+    - entries (iterable): (item, place) pairs to start with
+    """
+    def __init__(self, entries=()):
+        # {word: {id(item): weight}}
+        self.postings = {}
+        # {id(item): (item, place, words)}
+        self.documents = {}
+        for item_obj, place in entries:
+            self.insert(item_obj, place)
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def insert(self, item_obj, place):
+        words = item_words(item_obj.get_name(), item_obj.description)
+        self.documents[id(item_obj)] = (item_obj, place, words)
+        new_words = []
+        for word, weight in words.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                new_words.append(word)
+            posting[id(item_obj)] = weight
+        return new_words
+
+    def add(self, item_obj, place):
+        """
+        Adds an item, or moves it if it is already indexed
+        """
+        self.remove(item_obj)
+        for word in self.insert(item_obj, place):
+            insort(self.vocabulary, word)
+
+    def remove(self, item_obj):
+        document = self.documents.pop(id(item_obj), None)
+        if document is None:
+            return
+        for word in document[2]:
+            posting = self.postings[word]
+            del posting[id(item_obj)]
+            if not posting:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+
+    def add_owner(self, owner):
+        # Indexes every item in a player's or mob's inventory
+        for item_obj in owner.get_inventory().values():
+            self.add(item_obj, owner)
+
+    def remove_owner(self, owner):
+        for item_obj in owner.get_inventory().values():
+            self.remove(item_obj)
+
+    def words_starting(self, prefix):
+        # The indexed words that start with prefix, from the sorted vocabulary
+        position = bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(prefix):
+            yield self.vocabulary[position]
+            position += 1
+
+    def rarity(self, word, term):
+        # What a matching word counts for a search word: more for words few items have, and less when the word only starts with it
+        weight = math.log(1 + len(self.documents) / len(self.postings[word]))
+        return weight if word == term else weight * PREFIX_WEIGHT
+
+    def search(self, query, limit=None):
+        """
+        Parameters:
+        - query (str): The words to search for
+        - limit (int): How many of the best hits to return. None returns all of them
+
+        Returns:
+        - hits (list): (score, item, place) of the best items that match all the words, best first
+        - total (int): How many items match
+        """
+        # {term: {word it starts: what the word counts}}
+        terms = {term: {word: self.rarity(word, term) for word in self.words_starting(term)} for term in tokenize(query)}
+        if not terms:
+            return [], 0
+        # The term with the fewest items to look at goes first, the others only have to check the items it matched
+        sizes = {term: sum(len(self.postings[word]) for word in words) for term, words in terms.items()}
+        scores = None
+        for term in sorted(terms, key=sizes.get):
+            rarities = terms[term]
+            if scores is None or sizes[term] <= len(scores):
+                # The best match of this term in each item, from the postings of the words it starts
+                matched = {}
+                for word, rarity in rarities.items():
+                    for key, weight in self.postings[word].items():
+                        if matched.get(key, 0) < weight * rarity:
+                            matched[key] = weight * rarity
+                scores = matched if scores is None else {key: score + matched[key] for key, score in scores.items() if key in matched}
+            else:
+                narrowed = {}
+                for key, score in scores.items():
+                    best = max((weight * rarities[word] for word, weight in self.documents[key][2].items() if word in rarities),
+                               default=None)
+                    if best is not None:
+                        narrowed[key] = score + best
+                scores = narrowed
+            if not scores:
+                return [], 0
+        hits = ((score, *self.documents[key][:2]) for key, score in scores.items())
+        order = lambda hit: (-hit[0], hit[1].get_name())
+        hits = sorted(hits, key=order) if limit is None else heapq.nsmallest(limit, hits, key=order)
+        return hits, len(scores)
@@ -0,0 +1,214 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+A Monte Carlo encounter simulator. A party of players fights a group of mobs many times over and the results are averaged into a win
+probability, the expected number of rounds, and the expected number of flasks drunk.
+
+The combatants are copied into plain tuples before simulating, so the session itself never changes. Trials run in fixed-size batches
+spread over a ProcessPoolExecutor. Each batch gets its own seed drawn from the encounter seed, so the same seed gives the same result
+however many processes are used.
+
+The combat rules are kept simple:
+- Every round each player acts, then each mob acts. Players attack the living mob with the least hp, mobs attack a random player
+- An attack hits when a d20 is at least the target's armor class. A 20 always hits and a 1 always misses
+- A player below half of their max HP drinks a health flask instead of attacking, if they have one with charges left
+- A player attacks with the equipped weapon or spell that has the best expected damage and that they have the mana for. A player who
+  could cast a better spell with more mana drinks a mana flask instead, if they have one
+- Mobs attack with a random weapon from their inventory. Players and mobs without a weapon attack with UNARMED dice
+- The party loses if every player drops to 0 hp, or if the mobs are still alive after max_rounds
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from Dice import DiceEngine
+from Item import weapon, spell, estus
+
+# Damage dice (n, dice) of an attack without a weapon
+UNARMED = (1, 4)
+
+# Trials per batch. Batches are the unit of work sent to a process, and each one has its own seed
+BATCH_SIZE = 250
+
+# Rounds after which the fight counts as lost
+MAX_ROUNDS = 100
+
+class EncounterResult:
+    """
+    The averaged outcome of many simulated fights
+
+    Parameters:
+    - trials (int): How many fights were simulated
+    - wins (int): How many of them the party won
+    - rounds (int): The rounds of all fights added up
+    - flasks (int): The flasks drunk in all fights added up
+    - seed (int): The seed of the encounter, to run it again
+    """
+    __slots__ = ("trials", "wins", "rounds", "flasks", "seed")
+
+    def __init__(self, trials, wins, rounds, flasks, seed):
+        self.trials = trials
+        self.wins = wins
+        self.rounds = rounds
+        self.flasks = flasks
+        self.seed = seed
+
+    def win_probability(self):
+        return self.wins / self.trials if self.trials else 0.0
+
+    def expected_rounds(self):
+        return self.rounds / self.trials if self.trials else 0.0
+
+    def expected_flasks(self):
+        return self.flasks / self.trials if self.trials else 0.0
+
+    def summary(self):
+        return (f"Trials: {self.trials} (seed {self.seed})\n"
+                f"Win probability: {self.win_probability():.1%}\n"
+                f"Expected rounds: {self.expected_rounds():.2f}\n"
+                f"Expected flasks used: {self.expected_flasks():.2f}")
+
+def combatant_player(player_obj):
+    """
+    Copies what the simulator needs from a player
+
+    Returns:
+    - combatant (tuple): (hp, max HP, mana, armor class, attacks, flasks). Attacks are (n, dice, mana cost) and flasks are
+      (hp, mana, charges)
+    """
+    attacks = [item_obj.get_dice() + (item_obj.get_mana_cos() if isinstance(item_obj, spell) else 0,)
+               for item_obj in player_obj.equipped_items(weapon)]
+    flasks = [(flask.get_hp(), flask.get_mana(), flask.get_charges()) for flask in player_obj.items_of_class(estus)]
+    return (player_obj.get_hp(), player_obj.get_HP(), player_obj.get_mana(), player_obj.armor_class,
+            attacks or [UNARMED + (0,)], flasks)
+
+def combatant_mob(mob_obj):
+    """
+    Copies what the simulator needs from a mob
+
+    Returns:
+    - combatant (tuple): (hp, armor class, attacks). Attacks are (n, dice)
+    """
+    attacks = [item_obj.get_dice() for item_obj in mob_obj.items_of_class(weapon)]
+    return (mob_obj.get_hp(), mob_obj.get_armor_class(), attacks or [UNARMED])
+
+def expected_damage(attack):
+    return attack[0] * (attack[1] + 1) / 2
+
+def hits(d20, armor_class):
+    if d20 == 20:
+        return True
+    if d20 == 1:
+        return False
+    return d20 >= armor_class
+
+def simulate_batch(party, mobs, trials, seed, max_rounds=MAX_ROUNDS):
+    """
+    Simulates a batch of fights. This is what runs in each worker process
+
+    Parameters:
+    - party (list): Players from combatant_player()
+    - mobs (list): Mobs from combatant_mob()
+    - trials (int): How many fights to simulate
+    - seed (int): The seed of the batch
+    - max_rounds (int): Rounds after which the fight counts as lost
+
+    Returns:
+    - totals (tuple): (wins, rounds, flasks) added up over the batch
+    """
+    dice = DiceEngine(seed)
+    rng = dice.rng
+    # Each player's attacks from best to worst expected damage, so the first affordable one is the best
+    attack_orders = [sorted(member[4], key=expected_damage, reverse=True) for member in party]
+    wins = total_rounds = total_flasks = 0
+
+    for _ in range(trials):
+        player_hp = [member[0] for member in party]
+        player_mana = [member[2] for member in party]
+        charges = [[flask[2] for flask in member[5]] for member in party]
+        mob_hp = [mob_obj[0] for mob_obj in mobs]
+        rounds = 0
+
+        while rounds < max_rounds and any(hp > 0 for hp in player_hp) and any(hp > 0 for hp in mob_hp):
+            rounds += 1
+            for idx, member in enumerate(party):
+                if player_hp[idx] <= 0:
+                    continue
+                living = [mob_index for mob_index, hp in enumerate(mob_hp) if hp > 0]
+                if not living:
+                    break
+                flasks = member[5]
+
+                if player_hp[idx] * 2 < member[1]:
+                    flask_index = next((f for f, flask in enumerate(flasks) if flask[0] > 0 and charges[idx][f] > 0), None)
+                    if flask_index is not None:
+                        charges[idx][flask_index] -= 1
+                        total_flasks += 1
+                        player_hp[idx] = min(member[1], player_hp[idx] + flasks[flask_index][0])
+                        continue
+
+                attacks = attack_orders[idx]
+                attack = next(attack for attack in attacks + [UNARMED + (0,)] if attack[2] <= player_mana[idx])
+                if attack is not attacks[0]:
+                    flask_index = next((f for f, flask in enumerate(flasks) if flask[1] > 0 and charges[idx][f] > 0), None)
+                    if flask_index is not None:
+                        charges[idx][flask_index] -= 1
+                        total_flasks += 1
+                        player_mana[idx] += flasks[flask_index][1]
+                        continue
+
+                target = min(living, key=mob_hp.__getitem__)
+                player_mana[idx] -= attack[2]
+                if hits(rng.randint(1, 20), mobs[target][1]):
+                    mob_hp[target] -= dice.roll(attack[0], attack[1])
+
+            for mob_index, mob_obj in enumerate(mobs):
+                if mob_hp[mob_index] <= 0:
+                    continue
+                living = [idx for idx, hp in enumerate(player_hp) if hp > 0]
+                if not living:
+                    break
+                target = rng.choice(living)
+                if hits(rng.randint(1, 20), party[target][3]):
+                    player_hp[target] -= dice.roll(*rng.choice(mob_obj[2]))
+
+        if not any(hp > 0 for hp in mob_hp):
+            wins += 1
+        total_rounds += rounds
+
+    return wins, total_rounds, total_flasks
+
+def simulate_encounter(players, mobs, trials=1000, seed=None, workers=None, max_rounds=MAX_ROUNDS):
+    """
+    Simulates a party fighting a group of mobs
+
+    Parameters:
+    - players (list): The party, player objects
+    - mobs (list): The mobs, mob objects
+    - trials (int): How many fights to simulate
+    - seed (int): The seed of the encounter. None picks one, which is reported in the result
+    - workers (int): How many processes to use. None uses every core, 1 runs in this process
+    - max_rounds (int): Rounds after which the fight counts as lost
+
+    Returns:
+    - result (EncounterResult): The averaged outcome
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    party = [combatant_player(player_obj) for player_obj in players]
+    foes = [combatant_mob(mob_obj) for mob_obj in mobs]
+
+    # The batches and their seeds only depend on the trials and the seed, not on how many processes run them
+    seeds = random.Random(seed)
+    batches = [(min(BATCH_SIZE, trials - start), seeds.getrandbits(64)) for start in range(0, trials, BATCH_SIZE)]
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+
+    if workers <= 1:
+        totals = [simulate_batch(party, foes, size, batch_seed, max_rounds) for size, batch_seed in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_batch, party, foes, size, batch_seed, max_rounds) for size, batch_seed in batches]
+            totals = [future.result() for future in futures]
+
+    wins, rounds, flasks = (sum(column) for column in zip(*totals)) if totals else (0, 0, 0)
+    return EncounterResult(trials, wins, rounds, flasks, seed)
@@ -0,0 +1,45 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Base class for the classes that use __slots__ (items, players, and mobs). Slots store each field in a fixed spot on the object instead
+of a per-object __dict__, which saves a few hundred bytes per object when the world holds tens of thousands of items.
+
+Objects are still pickled as a plain {field: value} dict, the same state a __dict__ based object has, so sessions saved before the
+classes were slotted load into the slotted classes and the other way around.
+"""
+
+class Slotted:
+    __slots__ = ()
+    # Slots that only hold data derived from the other fields. They are not saved and get rebuilt when they are needed
+    unsaved_slots = ()
+
+    @classmethod
+    def slot_names(cls):
+        """
+        Returns:
+        - names (tuple): Every slot of the class and its parent classes, parents first
+        """
+        names = cls.__dict__.get("_slot_names")
+        if names is None:
+            names = tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ()))
+            setattr(cls, "_slot_names", names)
+        return names
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.slot_names() if name not in self.unsaved_slots and hasattr(self, name)}
+
+    @staticmethod
+    def state_dict(state):
+        """
+        Returns:
+        - state (dict): The pickled state as one {field: value} dict
+        """
+        # Pickles of objects that had both a __dict__ and slots store (dict, slots)
+        if isinstance(state, tuple):
+            dict_state, slot_state = state
+            state = {**(dict_state or {}), **(slot_state or {})}
+        return state
+
+    def __setstate__(self, state):
+        for name, value in self.state_dict(state).items():
+            setattr(self, name, value)
@@ -0,0 +1,477 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Random-access snapshot format. Instead of one big pickle, every player, mob, world item, and inventory is pickled on its own and an
+offset table at the front of the file says where each one lives. Loading only reads the header; the file is memory mapped and a
+player or mob is only unpickled the first time it is looked up (self.players[i]), and an inventory only the first time it is used
+(get_inventory()). World items are unpickled the first time they are looked up by ID; the item registry builds its name, class,
+and slot indexes on the first lookup that needs them.
+
+File layout:
+- MAGIC (8 bytes)
+- HEADER: offset/length of the session settings, then table offset/count for players, mobs, and items
+- records: the pickled objects and inventories
+- tables: one ENTRY per object (object offset/length, inventory offset/length)
+"""
+import io
+import os
+import mmap
+import pickle
+import struct
+from collections.abc import MutableSequence, MutableMapping
+from Item import item
+from Registry import ItemRegistry
+
+MAGIC = b"DNDLAZY1"
+HEADER = struct.Struct("<8Q")
+ENTRY = struct.Struct("<4Q")
+SECTIONS = ("players", "mobs", "items")
+
+def is_indexed_snapshot(filename):
+    """
+    Checks if a save file uses the random-access format
+
+    Parameters:
+    - filename (str): The save file
+
+    Returns:
+    - indexed (bool): True if the file starts with the random-access magic bytes
+    """
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def item_refs(owner):
+    """
+    Items that an owner holds outside of its inventory, such as equipped armor or the WEAPON slot. These are the same objects as the
+    ones in the inventory, so the inventory record stores a reference to the attribute instead of a second copy
+    """
+    return {name: value for name, value in owner.__getstate__().items() if isinstance(value, item)}
+
+class IndexedSnapshot:
+    """
+    A memory mapped random-access snapshot
+
+    Parameters:
+    - filename (str): The save file to open
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{filename} is not a random-access session file.")
+        fields = HEADER.unpack_from(self.map, len(MAGIC))
+        self.meta = (fields[0], fields[1])
+        self.tables = {name: (fields[2 + 2 * idx], fields[3 + 2 * idx]) for idx, name in enumerate(SECTIONS)}
+
+    def close(self):
+        self.map.close()
+
+    def read(self, offset, length):
+        return self.map[offset:offset + length]
+
+    def entry(self, section, index):
+        table_offset, _ = self.tables[section]
+        return ENTRY.unpack_from(self.map, table_offset + index * ENTRY.size)
+
+    def decode_owner(self, section, index):
+        """
+        Unpickles one player, mob, or item. Its inventory is left as a LazyInventory that is decoded when it is first used
+        """
+        obj_offset, obj_length, inv_offset, inv_length = self.entry(section, index)
+        inventory = LazyInventory(self, inv_offset, inv_length)
+        unpickler = pickle.Unpickler(io.BytesIO(self.read(obj_offset, obj_length)))
+        unpickler.persistent_load = lambda pid: inventory
+        obj = unpickler.load()
+        inventory.refs = item_refs(obj)
+        return obj
+
+    def settings(self):
+        return pickle.loads(self.read(*self.meta))
+
+class LazyInventory(MutableMapping):
+    """
+    An inventory dict that is only unpickled the first time it is used
+
+    Parameters:
+    - source (IndexedSnapshot): The snapshot the inventory is stored in
+    - offset (int): Where the pickled inventory starts
+    - length (int): Length of the pickled inventory
+    """
+    def __init__(self, source, offset, length):
+        self.source = source
+        self.offset = offset
+        self.length = length
+        self.refs = {}
+        self.data = None
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def is_loaded(self):
+        return self.data is not None
+
+    def load(self):
+        if self.data is None:
+            if self.length == 0:
+                self.data = {}
+            else:
+                unpickler = pickle.Unpickler(io.BytesIO(self.source.read(self.offset, self.length)))
+                unpickler.persistent_load = lambda pid: self.refs[pid]
+                self.data = unpickler.load()
+            self.source = None
+        return self.data
+
+    def raw(self):
+        return self.source.read(self.offset, self.length)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __setitem__(self, key, value):
+        self.load()[key] = value
+
+    def __delitem__(self, key):
+        del self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return repr(self.load()) if self.is_loaded() else "<inventory not loaded>"
+
+class LazyList(MutableSequence):
+    """
+    A list of players, mobs, or items that unpickles each entry the first time it is looked up. Opening it costs the same no matter
+    how many entries the snapshot holds
+
+    Parameters:
+    - source (IndexedSnapshot): The snapshot the entries are stored in
+    - section (str): "players", "mobs", or "items"
+    """
+    def __init__(self, source, section):
+        self.bind(source, section, {})
+
+    def bind(self, source, section, decoded):
+        self.source = source
+        self.section = section
+        self.count = source.tables[section][1]
+        self.decoded = decoded
+        # Until the list is reordered, position i is entry i of the snapshot table. Inserting or removing switches to an explicit
+        # list where undecoded entries are stored as their table index
+        self.slots = None
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def materialize(self):
+        if self.slots is None:
+            self.slots = [self.decoded[idx] if idx in self.decoded else _Pending(idx) for idx in range(self.count)]
+        return self.slots
+
+    def is_decoded(self, index):
+        if self.slots is None:
+            return index in self.decoded
+        return not isinstance(self.slots[index], _Pending)
+
+    def table_index(self, index):
+        return index if self.slots is None else self.slots[index].index
+
+    def decode(self, index):
+        if self.slots is None:
+            if index not in self.decoded:
+                self.decoded[index] = self.source.decode_owner(self.section, index)
+            return self.decoded[index]
+        value = self.slots[index]
+        if isinstance(value, _Pending):
+            value = self.slots[index] = self.source.decode_owner(self.section, value.index)
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.decode(idx) for idx in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("list index out of range")
+        return self.decode(index)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.materialize()[index] = value
+            return
+        if index < 0:
+            index += len(self)
+        if self.slots is None:
+            if index < 0 or index >= self.count:
+                raise IndexError("list assignment index out of range")
+            self.decoded[index] = value
+        else:
+            self.slots[index] = value
+
+    def __delitem__(self, index):
+        del self.materialize()[index]
+
+    def __len__(self):
+        return self.count if self.slots is None else len(self.slots)
+
+    def insert(self, index, value):
+        self.materialize().insert(index, value)
+
+    def __add__(self, other):
+        # Concatenating gives a plain list, like players + mobs on a session that was never saved
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"<{len(self)} {self.section}, {sum(self.is_decoded(idx) for idx in range(len(self)))} loaded>"
+
+class LazyEntries(MutableMapping):
+    """
+    The {item ID: item} entries of a world item registry opened from a snapshot. Each item is unpickled the first time it is looked up
+
+    Parameters:
+    - item_ids (list): The IDs, in the order of the snapshot's items table
+    - world_items (LazyList): The snapshot's items
+    """
+    def __init__(self, item_ids, world_items):
+        self.world_items = world_items
+        # An int is the position of an item that was not unpickled yet. Items are never ints
+        self.slots = dict(zip(item_ids, range(len(world_items))))
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+    def __getitem__(self, item_id):
+        value = self.slots[item_id]
+        if type(value) is int:
+            value = self.slots[item_id] = self.world_items[value]
+        return value
+
+    def __setitem__(self, item_id, item_obj):
+        self.slots[item_id] = item_obj
+
+    def __delitem__(self, item_id):
+        del self.slots[item_id]
+
+    def __contains__(self, item_id):
+        return item_id in self.slots
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def rebind(self, source):
+        # After a save the items are in the new file's table in the order of the entries
+        self.world_items = LazyList(source, "items")
+        self.slots = {item_id: position if type(value) is int else value
+                       for position, (item_id, value) in enumerate(self.slots.items())}
+
+    def __repr__(self):
+        return f"<{len(self)} world items, {sum(type(value) is not int for value in self.slots.values())} loaded>"
+
+class _Pending:
+    """
+    Placeholder for an entry that has not been unpickled yet
+    """
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+class _OwnerPickler(pickle.Pickler):
+    """
+    Pickles a player, mob, or item with its inventory left out
+    """
+    def __init__(self, buffer, inventory):
+        super().__init__(buffer)
+        self.inventory = inventory
+
+    def persistent_id(self, value):
+        return "inventory" if self.inventory is not None and value is self.inventory else None
+
+class _InventoryPickler(pickle.Pickler):
+    """
+    Pickles an inventory. Items the owner also holds in an equipment slot are stored as a reference to that slot
+    """
+    def __init__(self, buffer, slots):
+        super().__init__(buffer)
+        self.slots = slots
+
+    def persistent_id(self, value):
+        return self.slots.get(id(value))
+
+def _pickle_owner(obj):
+    buffer = io.BytesIO()
+    _OwnerPickler(buffer, getattr(obj, "inventory", None)).dump(obj)
+    return buffer.getvalue()
+
+def _pickle_inventory(obj):
+    buffer = io.BytesIO()
+    _InventoryPickler(buffer, {id(value): name for name, value in item_refs(obj).items()}).dump(dict(obj.inventory))
+    return buffer.getvalue()
+
+def _section_entries(driver, section):
+    """
+    Yields (source, table index, None) for each entry of a section that was never unpickled, so it can be copied as raw bytes, and
+    (None, None, obj) for the others
+    """
+    if section == "items":
+        entries = driver.items.entries
+        if not isinstance(entries, LazyEntries):
+            for obj in entries.values():
+                yield None, None, obj
+            return
+        world_items = entries.world_items
+        for item_id, value in entries.slots.items():
+            if type(value) is int and not world_items.is_decoded(value):
+                yield world_items.source, world_items.table_index(value), None
+            else:
+                yield None, None, entries[item_id]
+        return
+    sequence = getattr(driver, section)
+    lazy = isinstance(sequence, LazyList)
+    for idx in range(len(sequence)):
+        if lazy and not sequence.is_decoded(idx):
+            yield sequence.source, sequence.table_index(idx), None
+        else:
+            yield None, None, sequence[idx]
+
+def write_indexed_snapshot(driver, filename):
+    """
+    Writes the session in the random-access format. Entries that were never loaded are copied over as raw bytes without unpickling
+    them. The file is written next to the target and renamed over it, then every lazy list and inventory is pointed at the new file
+
+    Parameters:
+    - driver (SessionDriver): The session to save
+    - filename (str): Filename to store the snapshot as
+    """
+    temp_name = filename + ".tmp"
+    tables = {}
+    rebinds = []
+    old_sources = set()
+    with open(temp_name, 'wb') as f:
+        f.write(MAGIC)
+        f.write(bytes(HEADER.size))
+
+        def write_record(data):
+            offset = f.tell()
+            f.write(data)
+            return offset, len(data)
+
+        for section in SECTIONS:
+            entries = []
+            decoded = {}
+            for idx, (source, table_index, obj) in enumerate(_section_entries(driver, section)):
+                if source is not None:
+                    old_sources.add(source)
+                    obj_offset, obj_length, inv_offset, inv_length = source.entry(section, table_index)
+                    obj_entry = write_record(source.read(obj_offset, obj_length))
+                    inv_entry = write_record(source.read(inv_offset, inv_length))
+                    entries.append(obj_entry + inv_entry)
+                    continue
+
+                decoded[idx] = obj
+                obj_entry = write_record(_pickle_owner(obj))
+                inventory = getattr(obj, "inventory", None)
+                if inventory is None:
+                    inv_entry = (0, 0)
+                elif isinstance(inventory, LazyInventory) and not inventory.is_loaded() and \
+                        all(item_refs(obj).get(name) is value for name, value in inventory.refs.items()):
+                    # Untouched inventory whose equipment references still point at the same objects, copy it as is
+                    old_sources.add(inventory.source)
+                    inv_entry = write_record(inventory.raw())
+                    rebinds.append((inventory, inv_entry))
+                else:
+                    inv_entry = write_record(_pickle_inventory(obj))
+                    if isinstance(inventory, LazyInventory):
+                        inventory.load()
+                entries.append(obj_entry + inv_entry)
+            tables[section] = (entries, decoded)
+
+        header = []
+        meta = {name: value for name, value in driver.__getstate__().items() if name not in SECTIONS}
+        meta["item_ids"] = (driver.items.next_id, list(driver.items.entries))
+        header.extend(write_record(pickle.dumps(meta)))
+        for section in SECTIONS:
+            entries, _ = tables[section]
+            header.extend((f.tell(), len(entries)))
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+        f.seek(len(MAGIC))
+        f.write(HEADER.pack(*header))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # The old map has to be closed before the file it maps can be replaced on Windows
+    for source in old_sources:
+        source.close()
+    os.replace(temp_name, filename)
+    source = IndexedSnapshot(filename)
+    for section in SECTIONS:
+        _, decoded = tables[section]
+        sequence = getattr(driver, section)
+        if isinstance(sequence, LazyList):
+            sequence.bind(source, section, decoded)
+    if isinstance(driver.items.entries, LazyEntries):
+        driver.items.entries.rebind(source)
+    for inventory, (offset, length) in rebinds:
+        inventory.source = source
+        inventory.offset = offset
+        inventory.length = length
+
+def open_indexed_snapshot(filename):
+    """
+    Opens a random-access snapshot without unpickling any players, mobs, or items
+
+    Parameters:
+    - filename (str): The save file
+
+    Returns:
+    - state (dict): The session state, with players and mobs as LazyList objects
+    """
+    source = IndexedSnapshot(filename)
+    state = source.settings()
+    for section in SECTIONS:
+        state[section] = LazyList(source, section)
+    world_items = state["items"]
+    # Snapshots written before the item registry have no item IDs, their items are numbered in order
+    next_id, item_ids = state.pop("item_ids", (len(world_items) + 1, range(1, len(world_items) + 1)))
+    state["items"] = ItemRegistry()
+    state["items"].__setstate__({"next_id": next_id, "entries": LazyEntries(item_ids, world_items)})
+    return state
+
+def detach_snapshot(driver):
+    """
+    Loads everything that is still lazy and closes the memory map, so the session no longer depends on the file it was opened from.
+    Needed before that file is overwritten in another format
+
+    Parameters:
+    - driver (SessionDriver): The session to detach
+    """
+    sources = set()
+    for section in SECTIONS:
+        sequence = getattr(driver, section)
+        if not isinstance(sequence, LazyList):
+            continue
+        sources.add(sequence.source)
+        sequence = list(sequence)
+        for obj in sequence:
+            inventory = getattr(obj, "inventory", None)
+            if isinstance(inventory, LazyInventory):
+                inventory.load()
+        setattr(driver, section, sequence)
+    entries = driver.items.entries
+    if isinstance(entries, LazyEntries):
+        sources.add(entries.world_items.source)
+        driver.items.entries = dict(entries.items())
+    for source in sources:
+        source.close()
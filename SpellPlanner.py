@@ -0,0 +1,108 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Spell planning. A player has a fixed number of spell slots from their attunement, and each spell takes up some of them. Equipping
+spells one at a time fills the slots with whatever comes first, so the planner picks the set of spells worth the most that fits, a
+0/1 knapsack solved by dynamic programming over the slot count.
+
+Spells are worth their expected damage per point of mana by default, or whatever priorities the user gives them. Only spells the
+player meets the requirements of are considered.
+
+The table of best values is cached per set of spells and filled in as far as the slots asked for, so planning again after a level up
+or a ring that changes attunement only reads the table, or extends it by the new slots.
+"""
+from functools import lru_cache
+
+from Item import spell
+from Dice import damage_distribution
+
+# How spells can be scored
+SCORINGS = ("damage_per_mana", "priority")
+
+class SpellTable:
+    """
+    The knapsack table for a list of spells, filled in up to some number of slots
+
+    Parameters:
+    - spells (tuple): (slots, value) of each spell
+    """
+    __slots__ = ("spells", "rows")
+
+    def __init__(self, spells):
+        self.spells = spells
+        # rows[i][c] is the most value the first i spells can give in c slots
+        self.rows = [[0] for _ in range(len(spells) + 1)]
+
+    def extend_to(self, capacity):
+        for c in range(len(self.rows[0]), capacity + 1):
+            self.rows[0].append(0)
+            for i, (slots, value) in enumerate(self.spells):
+                best = self.rows[i][c]
+                if slots <= c and self.rows[i][c - slots] + value > best:
+                    best = self.rows[i][c - slots] + value
+                self.rows[i + 1].append(best)
+
+    def choose(self, capacity):
+        """
+        Returns:
+        - chosen (list): Indexes of the spells in the best set that fits in capacity slots
+        """
+        self.extend_to(capacity)
+        chosen = []
+        c = capacity
+        for i in range(len(self.spells), 0, -1):
+            if self.rows[i][c] != self.rows[i - 1][c]:
+                chosen.append(i - 1)
+                c -= self.spells[i - 1][0]
+        chosen.reverse()
+        return chosen
+
+@lru_cache(maxsize=128)
+def spell_table(spells):
+    return SpellTable(spells)
+
+def damage_per_mana(spell_obj):
+    # Spells that cost no mana count as costing 1
+    return damage_distribution(*spell_obj.get_dice()).expected / max(1, spell_obj.get_mana_cos())
+
+def spell_capacity(player_obj):
+    """
+    Returns:
+    - slots (int): How many spell slots the player has in total, for their current attunement
+    """
+    return player_obj.calculate_spell_slots(player_obj.effective("attunement"))
+
+def castable_spells(player_obj):
+    """
+    Returns:
+    - spells (list): The spells in the player's inventory that they meet the requirements of
+    """
+    return [spell_obj for spell_obj in player_obj.items_of_class(spell)
+            if player_obj.check_requirements(*spell_obj.get_stats()) is None]
+
+def plan_spells(player_obj, scoring="damage_per_mana", priorities=None):
+    """
+    Finds the best set of spells for a player's spell slots
+
+    Parameters:
+    - player_obj (player): The player
+    - scoring (str): "damage_per_mana" or "priority"
+    - priorities (dict): {spell name: priority} for "priority". Spells without one are worth 0 and are left out
+
+    Returns:
+    - chosen (list): The spells to equip
+    - value (float): What they are worth together
+    - capacity (int): The player's spell slots
+    """
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring {scoring}. Choose one of: {', '.join(SCORINGS)}")
+    priorities = priorities or {}
+    spells = [spell_obj for spell_obj in castable_spells(player_obj) if spell_obj.get_spell_slot_cost() >= 0]
+    if scoring == "priority":
+        values = [priorities.get(spell_obj.get_name(), 0) for spell_obj in spells]
+    else:
+        values = [damage_per_mana(spell_obj) for spell_obj in spells]
+    capacity = max(0, spell_capacity(player_obj))
+    table = spell_table(tuple((spell_obj.get_spell_slot_cost(), value) for spell_obj, value in zip(spells, values)))
+    chosen = table.choose(capacity)
+    return [spells[idx] for idx in chosen], sum(values[idx] for idx in chosen), capacity
@@ -0,0 +1,134 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Stat curves turn vigor into max HP, and attunement into max mana and spell slots. Each campaign can set its own curves (base value,
+growth per point, the level where diminishing returns start, and how strong they are). A curve is computed once for every stat level
+into a lookup table, so players read their max HP and mana from the table instead of working the formula out on every level up or
+ring change.
+
+Curves are shared: every player of a campaign points at the same StatCurves object, and loading a save gives back the shared object.
+"""
+import weakref
+from operator import itemgetter
+
+# Stat levels the tables cover. Higher levels (possible with rings) fall back to the formula
+MAX_STAT = 99
+
+_curves = weakref.WeakValueDictionary()
+
+def stat_curves(hp=(0, 2, 40, 0.2), mana=(0, 25, 40, 0.2), spell_slots=(0, 5)):
+    """
+    Returns the shared StatCurves for these settings, compiling the tables the first time they are used
+
+    Parameters:
+    - hp (tuple): (base, growth, threshold, diminishing factor) for max HP from vigor
+    - mana (tuple): (base, growth, threshold, diminishing factor) for max mana from attunement
+    - spell_slots (tuple): (base, attunement per slot) for spell slots from attunement
+
+    Returns:
+    - curves (StatCurves): The compiled curves
+    """
+    key = (tuple(hp), tuple(mana), tuple(spell_slots))
+    curves = _curves.get(key)
+    if curves is None:
+        curves = StatCurves(*key)
+        _curves[key] = curves
+    return curves
+
+class StatCurve:
+    """
+    A piecewise curve: base + growth per point, minus a squared penalty past the threshold
+
+    Parameters:
+    - base (int): The value at stat level 0
+    - growth (int): How much each stat point adds
+    - threshold (int): The stat level where diminishing returns start
+    - diminishing_factor (float): How strongly growth slows down past the threshold
+    """
+    __slots__ = ("base", "growth", "threshold", "diminishing_factor", "table")
+
+    def __init__(self, base, growth, threshold, diminishing_factor):
+        self.base = base
+        self.growth = growth
+        self.threshold = threshold
+        self.diminishing_factor = diminishing_factor
+        self.table = tuple(self.formula(stat) for stat in range(MAX_STAT + 1))
+
+    def formula(self, stat):
+        if stat <= self.threshold:
+            return self.base + (self.growth * stat)
+        else:
+            diminishing_pentalty = ((stat - self.threshold) ** 2) * self.diminishing_factor
+            return self.base + (self.growth * stat) - diminishing_pentalty
+
+    def value(self, stat):
+        if 0 <= stat <= MAX_STAT:
+            return self.table[stat]
+        return self.formula(stat)
+
+    def values(self, stats):
+        """
+        Looks up many stat levels at once
+
+        Parameters:
+        - stats (list): Stat levels
+
+        Returns:
+        - values (list): The curve value for each level, in the same order
+        """
+        if not stats:
+            return []
+        if 0 <= min(stats) and max(stats) <= MAX_STAT:
+            # itemgetter does every lookup in one C call
+            found = itemgetter(*stats)(self.table)
+            return list(found) if len(stats) > 1 else [found]
+        return [self.value(stat) for stat in stats]
+
+    def settings(self):
+        return (self.base, self.growth, self.threshold, self.diminishing_factor)
+
+class StatCurves:
+    """
+    The max HP, max mana, and spell slot curves of a campaign. Use stat_curves() to get one so equal settings share one object
+
+    Parameters:
+    - hp (tuple): (base, growth, threshold, diminishing factor) for max HP
+    - mana (tuple): (base, growth, threshold, diminishing factor) for max mana
+    - spell_slots (tuple): (base, attunement per slot) for spell slots
+    """
+    __slots__ = ("hp", "mana", "slot_base", "attunement_per_slot", "slot_table", "__weakref__")
+
+    def __init__(self, hp, mana, spell_slots):
+        self.hp = StatCurve(*hp)
+        self.mana = StatCurve(*mana)
+        self.slot_base, self.attunement_per_slot = spell_slots
+        self.slot_table = tuple(self.slot_base + (attunement // self.attunement_per_slot) for attunement in range(MAX_STAT + 1))
+
+    def __reduce__(self):
+        # Loading goes through stat_curves() so every player of a campaign shares the curves again
+        return stat_curves, self.settings()
+
+    def settings(self):
+        return (self.hp.settings(), self.mana.settings(), (self.slot_base, self.attunement_per_slot))
+
+    def spell_slots(self, attunement):
+        if 0 <= attunement <= MAX_STAT:
+            return self.slot_table[attunement]
+        return self.slot_base + (attunement // self.attunement_per_slot)
+
+    def apply_to(self, roster):
+        """
+        Recomputes max HP and max mana for a whole party or roster in one pass. Current HP and mana are lowered if they are above the
+        new maximum
+
+        Parameters:
+        - roster (list): Players
+        """
+        roster = list(roster)
+        max_hp = self.hp.values([member.effective("vigor") for member in roster])
+        max_mana = self.mana.values([member.effective("attunement") for member in roster])
+        for member, HP, MANA in zip(roster, max_hp, max_mana):
+            member.curves = self
+            member.store_max_stats(HP, MANA)
+
+DEFAULT_CURVES = stat_curves()
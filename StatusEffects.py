@@ -0,0 +1,130 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Timed status effects on players and mobs: poison and bleed that deal damage every few rounds, and buffs and debuffs that change a
+player's stats until they wear off.
+
+Each player and mob keeps its effects in its effects dict, which is saved with it. Effects store the round they tick next and the
+round they expire, counted on the session's round counter, and the session schedules them in a hierarchical timing wheel. Advancing a
+round only takes out the effects that tick or expire that round, however many effects are active. The wheel is not saved, it is
+rebuilt from the effects the first time it is needed.
+"""
+from Slotted import Slotted
+
+# Slots per wheel level, and how many levels there are. Level n covers delays up to WHEEL_SLOTS ** (n + 1) rounds
+WHEEL_SLOTS = 64
+WHEEL_LEVELS = 4
+
+class StatusEffect(Slotted):
+    """
+    A status effect on a player or mob
+
+    Parameters:
+    - name (str): The name of the effect, for example "Poison". A new effect with the same name replaces the old one
+    - rounds (int): How many rounds the effect lasts
+    - damage (int): Damage dealt every interval rounds
+    - bonuses (dict): {stat: bonus} added to a player's stats while the effect lasts, see Modifiers.py
+    - interval (int): How many rounds pass between damage ticks
+    """
+    __slots__ = ("name", "rounds", "damage", "bonuses", "interval", "expires", "next_tick")
+
+    def __init__(self, name, rounds, damage=0, bonuses=None, interval=1):
+        self.name = name
+        self.rounds = rounds
+        self.damage = damage
+        self.bonuses = dict(bonuses or {})
+        self.interval = max(1, interval)
+        self.expires = None
+        self.next_tick = None
+
+    def start(self, now):
+        """
+        Starts the effect on round now
+        """
+        self.expires = now + self.rounds
+        self.next_tick = now + self.interval if self.damage else None
+
+    def next_event(self):
+        """
+        Returns:
+        - round (int): The next round the effect ticks or expires
+        """
+        return self.expires if self.next_tick is None else min(self.next_tick, self.expires)
+
+    def modifier_name(self):
+        # The name of the player modifier that holds the effect's bonuses
+        return f"effect: {self.name}"
+
+    def describe(self, now):
+        parts = [f"{self.name} ({self.expires - now} rounds left)"]
+        if self.damage:
+            parts.append(f"{self.damage} damage every {self.interval} rounds")
+        if self.bonuses:
+            parts.append(", ".join(f"{stat} {bonus:+}" for stat, bonus in self.bonuses.items()))
+        return ", ".join(parts)
+
+class TimingWheel:
+    """
+    A hierarchical timing wheel. Entries are scheduled for a round and advance() returns the ones due on the next round. Far away
+    entries sit in the higher levels and move down a level at a time as their round comes closer, so each entry is only moved a
+    few times and advancing never looks at entries that are not due
+
+    Parameters:
+    - now (int): The current round
+    """
+    def __init__(self, now=0):
+        self.now = now
+        self.levels = [[[] for _ in range(WHEEL_SLOTS)] for _ in range(WHEEL_LEVELS)]
+        # Entries too far away for the top level
+        self.overflow = []
+
+    def schedule(self, due, entry):
+        """
+        Parameters:
+        - due (int): The round the entry is due. Rounds that already passed are due on the next round
+        - entry: Anything
+        """
+        self.place(max(due, self.now + 1), entry)
+
+    def place(self, due, entry):
+        delay = due - self.now
+        span = 1
+        for level in self.levels:
+            if delay < span * WHEEL_SLOTS:
+                level[(due // span) % WHEEL_SLOTS].append((due, entry))
+                return
+            span *= WHEEL_SLOTS
+        self.overflow.append((due, entry))
+
+    def advance(self):
+        """
+        Moves to the next round
+
+        Returns:
+        - entries (list): The entries due on the new round
+        """
+        self.now += 1
+        now = self.now
+        # Whenever a level's slot boundary is reached, its current slot moves down to the lower levels, highest level first
+        span = WHEEL_SLOTS ** (WHEEL_LEVELS - 1)
+        if now % span == 0:
+            pending, self.overflow = self.overflow, []
+            for due, entry in pending:
+                self.place(due, entry)
+        for level in range(WHEEL_LEVELS - 1, 0, -1):
+            span = WHEEL_SLOTS ** level
+            if now % span == 0:
+                slot = (now // span) % WHEEL_SLOTS
+                cascading, self.levels[level][slot] = self.levels[level][slot], []
+                for due, entry in cascading:
+                    self.place(due, entry)
+        slot = now % WHEEL_SLOTS
+        due, self.levels[0][slot] = self.levels[0][slot], []
+        return [entry for _, entry in due]
+
+def effects_of(target):
+    """
+    Returns:
+    - effects (dict): {name: StatusEffect} of a player or mob. Saves from before status effects have none
+    """
+    return getattr(target, "effects", {})
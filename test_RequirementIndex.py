@@ -0,0 +1,79 @@
+# Sergiu Cociuba
+# 2026-10-18
+"""
+Checks of the requirement index against going through every item. Run with pytest
+"""
+import math
+import random
+
+from Item import weapon, armor, ring
+from Leveling import REQUIREMENT_STATS, requirements
+from RequirementIndex import RequirementIndex, PENDING_LIMIT
+
+def linear_scan(entries, low, high):
+    # The ids of the items with requirements in the box, the slow way
+    return sorted(id(item_obj) for item_obj, place in entries
+                  if requirements(item_obj) is not None and all(c <= value <= d for value, c, d in zip(requirements(item_obj), low, high)))
+
+def found(results):
+    return sorted(id(item_obj) for item_obj, place in results)
+
+def test_new_vector_survives_rebuild():
+    index = RequirementIndex()
+    items = [weapon("d", f"W{idx}", 1, 6, idx, 0, 0, 0) for idx in range(PENDING_LIMIT + 1)]
+    for item_id, item_obj in enumerate(items):
+        index.add(item_obj, item_id)
+    # The last add crossed the pending limit and rebuilt the tree
+    assert index.pending == []
+    assert len(index) == len(items)
+    assert len(index.equippable((1000, 0, 0, 0))) == len(items)
+    index.remove(items[-1])
+    assert len(index) == len(items) - 1
+    assert found(index.equippable((1000, 0, 0, 0))) == sorted(map(id, items[:-1]))
+
+def test_matches_linear_scan():
+    rng = random.Random(7)
+    # {id(item): (item, place)} of what the index should hold
+    entries = {}
+
+    def random_item(idx):
+        needed = [rng.randrange(0, 12) for _ in REQUIREMENT_STATS]
+        kind = rng.random()
+        if kind < 0.4:
+            return weapon("d", f"I{idx}", 1, 6, *needed)
+        if kind < 0.8:
+            return armor("d", f"I{idx}", *needed, rng.randrange(1, 9), rng.randrange(5))
+        return ring("d", f"I{idx}", 0, 0, 1, 1, 1, 1)
+
+    for idx in range(300):
+        item_obj = random_item(idx)
+        entries[id(item_obj)] = (item_obj, idx)
+    index = RequirementIndex(entries.values())
+
+    for step in range(3000):
+        action = rng.random()
+        if action < 0.5 or not entries:
+            item_obj = random_item(300 + step)
+            entries[id(item_obj)] = (item_obj, step)
+            index.add(item_obj, step)
+        elif action < 0.8:
+            item_obj, place = entries.pop(rng.choice(list(entries)))
+            index.remove(item_obj)
+        else:
+            # Moving an item somewhere else keeps it once
+            item_obj, place = entries[rng.choice(list(entries))]
+            entries[id(item_obj)] = (item_obj, -step)
+            index.add(item_obj, -step)
+
+        if step % 50 == 0:
+            stats = tuple(rng.randrange(0, 14) for _ in REQUIREMENT_STATS)
+            assert len(index) == sum(requirements(item_obj) is not None for item_obj, place in entries.values())
+            assert found(index.equippable(stats)) == linear_scan(entries.values(), (-math.inf,) * len(stats), stats)
+            for stat_index, stat_name in enumerate(REQUIREMENT_STATS):
+                points = rng.randrange(1, 4)
+                low = [-math.inf] * len(stats)
+                high = list(stats)
+                low[stat_index] = stats[stat_index] + 1
+                high[stat_index] = stats[stat_index] + points
+                assert found(index.unlocked_by(stats, stat_name, points)) == linear_scan(entries.values(), low, high)
+            assert all(index.buckets[needed][key][1] == entries[key][1] for key, needed in index.indexed.items())